@@ -0,0 +1,126 @@
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column, or_, select, tuple_
+
+import models
+
+
+# Most rows a single history page may return
+MAX_PAGE_SIZE = 200
+
+STATUS_FILTERS = ('ok', 'error')
+
+
+def history_columns(SeoAnalysis, legacy: Sequence[str] = ()) -> List:
+    """Only the columns the history table shows; the wide Text fields stay on disk
+
+    legacy lists the inline columns of a database not yet migrated to
+    dimension ids; rows stored before the upgrade have no page_id and are
+    read from those.
+    """
+    return [
+        SeoAnalysis.id,
+        with_legacy_fallback(SeoAnalysis, SeoAnalysis.url, 'url', legacy),
+        with_legacy_fallback(SeoAnalysis, SeoAnalysis.domain, 'domain', legacy),
+        SeoAnalysis.overall_score,
+        SeoAnalysis.title,
+        SeoAnalysis.analysis_date,
+        SeoAnalysis.error_message
+    ]
+
+
+def with_legacy_fallback(SeoAnalysis, attribute, name: str, legacy: Sequence[str]):
+    """attribute, or the inline legacy column of the same name where the dimension id is missing"""
+    if name not in legacy:
+        return attribute
+    inline = literal_column(f'{SeoAnalysis.__tablename__}.{name}')
+    return func.coalesce(attribute, inline).label(name)
+
+
+def encode_cursor(analysis_date: datetime, analysis_id: int) -> str:
+    """Opaque cursor pointing just past the given row"""
+    raw = f'{analysis_date.isoformat()}|{analysis_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        analysis_date, analysis_id = raw.split('|')
+        return datetime.fromisoformat(analysis_date), int(analysis_id)
+    except ValueError as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def fetch_history_page(session, SeoAnalysis, domain: Optional[str] = None, min_score: Optional[int] = None,
+                       max_score: Optional[int] = None, status: Optional[str] = None,
+                       cursor: Optional[str] = None, limit: int = 50,
+                       legacy: Sequence[str] = ()) -> Tuple[List[Any], Optional[str]]:
+    """Return one page of analyses, newest first, and the cursor for the next page
+
+    Pages are keyed on (analysis_date, id) rather than OFFSET, so every page
+    is an index range scan no matter how deep the client has paged. legacy
+    is passed on to history_columns.
+    """
+    if status is not None and status not in STATUS_FILTERS:
+        raise ValueError(f'Unknown status filter: {status}')
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = select(*history_columns(SeoAnalysis, legacy))
+
+    if domain:
+        # Filter on the indexed id, not the joined-in name
+        matches = SeoAnalysis.domain_id == select(models.Domain.id).where(
+            models.Domain.name == domain.lower()
+        ).scalar_subquery()
+        if 'domain' in legacy:
+            matches = or_(matches, literal_column(f'{SeoAnalysis.__tablename__}.domain') == domain.lower())
+        query = query.where(matches)
+    if min_score is not None:
+        query = query.where(SeoAnalysis.overall_score >= min_score)
+    if max_score is not None:
+        query = query.where(SeoAnalysis.overall_score <= max_score)
+    if status == 'ok':
+        query = query.where(SeoAnalysis.error_message.is_(None))
+    elif status == 'error':
+        query = query.where(SeoAnalysis.error_message.is_not(None))
+    if cursor:
+        query = query.where(tuple_(SeoAnalysis.analysis_date, SeoAnalysis.id) < tuple_(*decode_cursor(cursor)))
+
+    # One extra row tells us whether there is a next page
+    query = query.order_by(SeoAnalysis.analysis_date.desc(), SeoAnalysis.id.desc()).limit(limit + 1)
+    rows = session.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].analysis_date, rows[-1].id)
+
+    return rows, next_cursor
+
+
+def parse_history_filters(args) -> Dict[str, Any]:
+    """Read history filters and paging from request query arguments"""
+    filters: Dict[str, Any] = {
+        'domain': args.get('domain') or None,
+        'status': args.get('status') or None,
+        'cursor': args.get('cursor') or None
+    }
+    for name in ('min_score', 'max_score', 'limit'):
+        value = args.get(name)
+        if value not in (None, ''):
+            try:
+                filters[name] = int(value)
+            except ValueError:
+                raise ValueError(f'"{name}" must be an integer')
+    return filters
+
+
+def history_row_to_dict(row) -> Dict[str, Any]:
+    """JSON form of one history row"""
+    data = row._asdict()
+    data['analysis_date'] = row.analysis_date.isoformat() if row.analysis_date else None
+    return data
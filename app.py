@@ -1,16 +1,29 @@
 import os
+import json
 import logging
 import time
-from datetime import datetime
+import click
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
-from flask import Flask, render_template, request, flash, redirect, url_for
+from flask import Flask, Response, jsonify, render_template, request, flash, redirect, stream_with_context, url_for
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-from seo_analyzer import SEOAnalyzer
+import analysis_history
+import archive
+import dimensions
+import instrumentation
+import jobs
+import offline
+import persistence
+import parse_pool
+import politeness
+import result_cache
+import rollups
+import seo_rules
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; DEBUG makes every library log each request, so it is opt-in
+logging.basicConfig(level=os.environ.get("SEO_LOG_LEVEL", "INFO").upper())
 
 
 class Base(DeclarativeBase):
@@ -38,6 +51,89 @@ db = SQLAlchemy(app, model_class=Base)
 
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# Analyzer settings
+app.config["SEO_STREAM_HEAD_ONLY"] = os.environ.get("SEO_STREAM_HEAD_ONLY", "").lower() in ("1", "true", "yes")
+app.config["SEO_BODY_BYTE_BUDGET"] = int(os.environ.get("SEO_BODY_BYTE_BUDGET", "0"))
+app.config["SEO_PARSER_BACKEND"] = os.environ.get("SEO_PARSER_BACKEND", "auto")
+# Per-stage timings stored with each analysis and kept as histograms; off makes them no-ops
+app.config["SEO_STAGE_TIMINGS"] = os.environ.get("SEO_STAGE_TIMINGS", "1").lower() in ("1", "true", "yes")
+instrumentation.metrics.enabled = app.config["SEO_STAGE_TIMINGS"]
+# H1/H2 texts kept per result (counts are always exact); 0 keeps them all
+app.config["SEO_MAX_HEADINGS"] = int(os.environ.get("SEO_MAX_HEADINGS", "50"))
+# Scoring rules; SEO_RULES_FILE points at a JSON rule table in the seo_rules.DEFAULT_RULES format
+app.config["SEO_RULES_FILE"] = os.environ.get("SEO_RULES_FILE", "")
+scoring_rules = seo_rules.load_rules(app.config["SEO_RULES_FILE"]) if app.config["SEO_RULES_FILE"] else seo_rules.RuleSet()
+
+# Parse/extract/validate in this many worker processes, so threaded workers use more than one core;
+# 0 parses in the request thread. The processes are started here, before the first request
+app.config["SEO_PARSE_PROCESSES"] = int(os.environ.get("SEO_PARSE_PROCESSES", "0"))
+parse_processes = None
+if app.config["SEO_PARSE_PROCESSES"] > 0:
+    parse_processes = parse_pool.ParsePool(
+        app.config["SEO_PARSE_PROCESSES"],
+        app.config["SEO_PARSER_BACKEND"],
+        scoring_rules.rules,
+        max_headings=app.config["SEO_MAX_HEADINGS"] or None
+    ).start()
+
+# Result cache in front of analyze_url; 'sqlite' shares it between worker processes
+analysis_cache = result_cache.create_cache(
+    os.environ.get("SEO_CACHE_BACKEND", "memory"),
+    ttl=float(os.environ.get("SEO_CACHE_TTL", "900")),
+    max_entries=int(os.environ.get("SEO_CACHE_MAX_ENTRIES", "1000")),
+    path=os.environ.get("SEO_CACHE_PATH", "seo_cache.db")
+)
+
+# Parse/validate output memoized by page content hash
+content_memo = result_cache.ContentHashMemo(max_entries=int(os.environ.get("SEO_CONTENT_MEMO_SIZE", "2048")))
+
+# Bulk analysis limits
+app.config["SEO_BULK_MAX_URLS"] = int(os.environ.get("SEO_BULK_MAX_URLS", "5000"))
+app.config["SEO_BULK_CONCURRENCY"] = int(os.environ.get("SEO_BULK_CONCURRENCY", "16"))
+app.config["SEO_BULK_PER_HOST_LIMIT"] = int(os.environ.get("SEO_BULK_PER_HOST_LIMIT", "4"))
+
+# Outbound HTTP connection pool, shared by all requests in this worker process; unset keeps
+# the http_client defaults. Applied when the first analyzer is created
+app.config["SEO_POOL_CONNECTIONS"] = os.environ.get("SEO_POOL_CONNECTIONS")
+app.config["SEO_POOL_MAXSIZE"] = os.environ.get("SEO_POOL_MAXSIZE")
+app.config["SEO_POOL_TIMEOUT"] = os.environ.get("SEO_POOL_TIMEOUT")
+
+# Per-host politeness for outbound fetches, shared by every analyzer in this process
+fetch_scheduler = None
+if os.environ.get("SEO_HOST_POLITENESS", "1").lower() in ("1", "true", "yes"):
+    fetch_scheduler = politeness.HostScheduler(
+        rate=float(os.environ.get("SEO_HOST_RATE", "2")),
+        burst=float(os.environ.get("SEO_HOST_BURST", "4")),
+        max_in_flight=int(os.environ.get("SEO_HOST_MAX_IN_FLIGHT", "4")),
+        backoff_max=float(os.environ.get("SEO_HOST_BACKOFF_MAX", "60")),
+        max_wait=float(os.environ.get("SEO_HOST_MAX_WAIT", "30")),
+        max_retries=int(os.environ.get("SEO_HOST_MAX_RETRIES", "2"))
+    )
+
+# Write-behind persistence: analyses are queued and written in batches off the request path
+app.config["SEO_WRITE_BEHIND"] = os.environ.get("SEO_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+app.config["SEO_WRITE_QUEUE_SIZE"] = int(os.environ.get("SEO_WRITE_QUEUE_SIZE", "10000"))
+app.config["SEO_WRITE_BATCH_SIZE"] = int(os.environ.get("SEO_WRITE_BATCH_SIZE", "200"))
+app.config["SEO_WRITE_FLUSH_INTERVAL"] = float(os.environ.get("SEO_WRITE_FLUSH_INTERVAL", "1.0"))
+
+# Hourly score rollups older than this are compacted into daily ones
+app.config["SEO_ROLLUP_HOURLY_RETENTION_DAYS"] = int(os.environ.get("SEO_ROLLUP_HOURLY_RETENTION_DAYS", "7"))
+
+# Analyses older than SEO_RETENTION_DAYS are moved to monthly archive files
+app.config["SEO_RETENTION_DAYS"] = int(os.environ.get("SEO_RETENTION_DAYS", "365"))
+analysis_archive = archive.AnalysisArchive(
+    os.environ.get("SEO_ARCHIVE_DIR", "archive"),
+    batch_size=int(os.environ.get("SEO_ARCHIVE_BATCH_SIZE", archive.DEFAULT_BATCH_SIZE))
+)
+
+# Background analysis jobs; SEO_ANALYZE_ASYNC makes the /analyze form use them too
+app.config["SEO_ANALYZE_ASYNC"] = os.environ.get("SEO_ANALYZE_ASYNC", "").lower() in ("1", "true", "yes")
+app.config["SEO_JOB_WORKERS"] = int(os.environ.get("SEO_JOB_WORKERS", "4"))
+app.config["SEO_JOB_QUEUE_SIZE"] = int(os.environ.get("SEO_JOB_QUEUE_SIZE", "1000"))
+app.config["SEO_JOB_MAX_PER_DOMAIN"] = int(os.environ.get("SEO_JOB_MAX_PER_DOMAIN", "100"))
+app.config["SEO_JOB_RESULT_TTL"] = float(os.environ.get("SEO_JOB_RESULT_TTL", "3600"))
+app.config["SEO_JOB_RETRY_AFTER"] = int(os.environ.get("SEO_JOB_RETRY_AFTER", "5"))
+
 @app.route('/')
 def index():
     """Main page with URL input form"""
@@ -52,125 +148,414 @@ def analyze():
         flash('Please enter a URL to analyze', 'error')
         return redirect(url_for('index'))
     
-    # Add protocol if missing
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
+    url = normalize_url(url)
     
-    start_time = time.time()
+    if app.config["SEO_ANALYZE_ASYNC"]:
+        # Hand the fetch to a background worker; the job page polls until it is done
+        try:
+            job = analysis_jobs.submit(url)
+        except jobs.QueueFull as e:
+            flash(f'{e}. Please try again in a moment.', 'error')
+            return redirect(url_for('index'))
+        return redirect(url_for('job_page', job_id=job.id))
     
     try:
-        analyzer = SEOAnalyzer()
-        results = analyzer.analyze_url(url)
-        
-        if results['error']:
-            # Save failed analysis to database
-            save_analysis_to_db(url, None, results['error'], time.time() - start_time)
-            flash(results['error'], 'error')
-            return redirect(url_for('index'))
-        
-        # Save successful analysis to database
-        processing_time = time.time() - start_time
-        save_analysis_to_db(url, results, None, processing_time)
-        
-        return render_template('results.html', results=results, url=url)
+        results = run_analysis(url)
     
-    except Exception as e:
-        app.logger.error(f"Error analyzing URL {url}: {str(e)}")
-        save_analysis_to_db(url, None, str(e), time.time() - start_time)
+    except Exception:
         flash('An error occurred while analyzing the website. Please try again.', 'error')
         return redirect(url_for('index'))
+    
+    if results['error']:
+        flash(results['error'], 'error')
+        return redirect(url_for('index'))
+    
+    return render_template('results.html', results=results, url=url)
+
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    """Show a background analysis: a waiting page until it finishes, then its results"""
+    job = analysis_jobs.get(job_id)
+    
+    if job is None:
+        flash('That analysis is no longer available. Please run it again.', 'error')
+        return redirect(url_for('index'))
+    
+    if job.status == jobs.FAILED:
+        flash(job.error, 'error')
+        return redirect(url_for('index'))
+    
+    if job.status == jobs.DONE:
+        return render_template('results.html', results=job.results, url=job.url)
+    
+    return render_template('job.html', job=job)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue an analysis and return its job id without waiting for it"""
+    payload = request.get_json(silent=True) or {}
+    url = str(payload.get('url') or '').strip()
+    
+    if not url:
+        return jsonify({'error': 'Provide a "url"'}), 400
+    
+    try:
+        job = analysis_jobs.submit(normalize_url(url))
+    except jobs.QueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(app.config["SEO_JOB_RETRY_AFTER"])
+        return response, 503
+    
+    return jsonify(dict(job.to_dict(), status_url=url_for('job_status', job_id=job.id),
+                        stream_url=url_for('job_stream', job_id=job.id))), 202
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Report a job's status, with its results once it is done"""
+    job = analysis_jobs.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Stream a job's status as one JSON line per change until it finishes"""
+    job = analysis_jobs.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    
+    def generate():
+        version = job.version
+        yield json.dumps(job.to_dict()) + '\n'
+        while job.status not in jobs.FINISHED_STATES:
+            # A repeated line doubles as a keep-alive while the job is waiting
+            version = analysis_jobs.wait_for_change(job, version, timeout=15)
+            yield json.dumps(job.to_dict()) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs/stats')
+def job_stats():
+    """Report job queue depth, worker use and wait times"""
+    return jsonify(analysis_jobs.stats())
+
+@app.route('/api/analyze/bulk', methods=['POST'])
+def analyze_bulk():
+    """Analyze a list of URLs, streaming one JSON result per line as each finishes"""
+    payload = request.get_json(silent=True) or {}
+    urls = payload.get('urls')
+    
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': 'Provide a non-empty "urls" list'}), 400
+    
+    if len(urls) > app.config["SEO_BULK_MAX_URLS"]:
+        return jsonify({'error': f'At most {app.config["SEO_BULK_MAX_URLS"]} URLs per request'}), 400
+    
+    try:
+        max_concurrency = min(int(payload.get('concurrency', app.config["SEO_BULK_CONCURRENCY"])),
+                              app.config["SEO_BULK_CONCURRENCY"])
+        per_host_limit = min(int(payload.get('per_host_limit', app.config["SEO_BULK_PER_HOST_LIMIT"])),
+                             app.config["SEO_BULK_PER_HOST_LIMIT"])
+    except (TypeError, ValueError):
+        return jsonify({'error': '"concurrency" and "per_host_limit" must be integers'}), 400
+    
+    urls = [normalize_url(str(url).strip()) for url in urls if str(url).strip()]
+    
+    def generate():
+        analyzer = create_analyzer()
+        for results in analyzer.analyze_urls(urls, max_concurrency=max_concurrency, per_host_limit=per_host_limit):
+            record_result(results)
+            yield json.dumps(results, default=dict) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Report result cache hit/miss/revalidation counters"""
+    stats = analysis_cache.stats() if analysis_cache is not None else {}
+    return jsonify(dict(stats, enabled=analysis_cache is not None, content_memo=content_memo.stats()))
+
+@app.route('/api/fetch/stats')
+def fetch_stats():
+    """Report per-host request counts, throttling and politeness queue wait times"""
+    stats = fetch_scheduler.stats() if fetch_scheduler is not None else {}
+    return jsonify(dict(stats, enabled=fetch_scheduler is not None))
+
+@app.route('/api/parse/stats')
+def parse_stats():
+    """Report parse worker process counts, pooled tasks and in-thread fallbacks"""
+    stats = parse_processes.stats() if parse_processes is not None else {}
+    return jsonify(dict(stats, enabled=parse_processes is not None))
+
+@app.route('/api/metrics/stages')
+def stage_metrics():
+    """Per-stage latency histograms; ?format=prometheus for the text exposition format"""
+    if request.args.get('format') == 'prometheus':
+        return Response(instrumentation.metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify({'enabled': instrumentation.metrics.enabled, 'stages': instrumentation.metrics.snapshot()})
+
+@app.route('/api/persistence/stats')
+def persistence_stats():
+    """Report write-behind queue depth and flush latency"""
+    stats = analysis_writer.stats() if analysis_writer is not None else {}
+    return jsonify(dict(stats, enabled=analysis_writer is not None))
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
     return render_template('index.html'), 404
 
-def save_analysis_to_db(url, results, error_message, processing_time):
-    """Save analysis results to database"""
+def normalize_url(url):
+    """Add a protocol to URLs entered without one"""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+def configure_fetching():
+    """Size the outbound connection pool; the HTTP and parsing stack is only imported here, on first use"""
+    global fetching_configured
+    import http_client
+    http_client.configure_pool(
+        pool_connections=int(app.config["SEO_POOL_CONNECTIONS"] or http_client.DEFAULT_POOL_SETTINGS["pool_connections"]),
+        pool_maxsize=int(app.config["SEO_POOL_MAXSIZE"] or http_client.DEFAULT_POOL_SETTINGS["pool_maxsize"]),
+        pool_timeout=float(app.config["SEO_POOL_TIMEOUT"] or http_client.DEFAULT_POOL_SETTINGS["pool_timeout"])
+    )
+    fetching_configured = True
+
+fetching_configured = False
+
+def create_analyzer():
+    """Build an SEOAnalyzer from the app configuration"""
+    from seo_analyzer import SEOAnalyzer
+    if not fetching_configured:
+        configure_fetching()
+    return SEOAnalyzer(
+        stream_head_only=app.config["SEO_STREAM_HEAD_ONLY"],
+        body_byte_budget=app.config["SEO_BODY_BYTE_BUDGET"],
+        parser_backend=app.config["SEO_PARSER_BACKEND"],
+        cache=analysis_cache,
+        content_memo=content_memo,
+        max_headings=app.config["SEO_MAX_HEADINGS"] or None,
+        scheduler=fetch_scheduler,
+        instrument=app.config["SEO_STAGE_TIMINGS"],
+        rules=scoring_rules,
+        parse_pool=parse_processes
+    )
+
+def create_async_analyzer(executor=None):
+    """Build an AsyncSEOAnalyzer sharing the cache, memo, scheduler and rules of create_analyzer"""
+    from async_analyzer import AsyncSEOAnalyzer
+    if not fetching_configured:
+        configure_fetching()
+    return AsyncSEOAnalyzer(
+        stream_head_only=app.config["SEO_STREAM_HEAD_ONLY"],
+        body_byte_budget=app.config["SEO_BODY_BYTE_BUDGET"],
+        parser_backend=app.config["SEO_PARSER_BACKEND"],
+        cache=analysis_cache,
+        content_memo=content_memo,
+        max_headings=app.config["SEO_MAX_HEADINGS"] or None,
+        scheduler=fetch_scheduler,
+        instrument=app.config["SEO_STAGE_TIMINGS"],
+        rules=scoring_rules,
+        parse_pool=parse_processes,
+        executor=executor
+    )
+
+def run_analysis(url):
+    """Analyze a URL and record the outcome in the database"""
+    start_time = time.time()
+    
     try:
-        
-        # Extract domain from URL
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
-        
-        # Create new analysis record
-        analysis = SeoAnalysis(
-            url=url,
-            domain=domain,
-            processing_time=processing_time,
-            error_message=error_message
-        )
-        
-        if results and not error_message:
-            # Extract meta data
-            meta_data = results.get('meta_data', {})
-            analysis.title = meta_data.get('title')
-            analysis.title_length = len(meta_data.get('title', ''))
-            analysis.description = meta_data.get('description')
-            analysis.description_length = len(meta_data.get('description', ''))
-            analysis.keywords = meta_data.get('keywords')
+        analyzer = create_analyzer()
+        results = analyzer.analyze_url(url)
+    
+    except Exception as e:
+        app.logger.error(f"Error analyzing URL {url}: {str(e)}")
+        save_analysis_to_db(url, None, str(e), time.time() - start_time)
+        raise
+    
+    if results['error']:
+        # Save failed analysis to database
+        save_analysis_to_db(url, None, results['error'], time.time() - start_time)
+    elif results.get('cache') in (None, 'miss', 'refreshed'):
+        # Save successful analysis to database, unless it was served from the cache
+        save_analysis_to_db(url, results, None, time.time() - start_time)
+    
+    return results
+
+def run_analysis_job(url):
+    """Job queue entry point: run_analysis inside an app context"""
+    with app.app_context():
+        results = run_analysis(url)
+    if not results['error']:
+        # Job results are served as JSON as well as HTML
+        results['previews'] = dict(results['previews'])
+    return results
+
+def record_result(results):
+    """Save one bulk or crawl result, skipping pages whose bytes have not changed"""
+    if results['error']:
+        save_analysis_to_db(results['url'], None, results['error'], results['processing_time'])
+    elif is_unchanged(results['url'], results['content_hash']):
+        # Same bytes as the last stored analysis, nothing new to record
+        results['unchanged'] = True
+    else:
+        save_analysis_to_db(results['url'], results, None, results['processing_time'])
+
+def is_unchanged(url, content_hash):
+    """Check whether the latest stored analysis of a URL saw the same page bytes"""
+    latest = db.session.query(SeoAnalysis.content_hash).join(
+        PageUrl, PageUrl.id == SeoAnalysis.page_id
+    ).filter(
+        PageUrl.url_hash == dimensions.value_hash(url)
+    ).order_by(SeoAnalysis.analysis_date.desc()).first()
+    return latest is not None and latest.content_hash == content_hash
+
+def build_analysis_row(url, results, error_message, processing_time):
+    """Turn analysis results into SeoAnalysis column values"""
+    
+    # Extract domain from URL
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc.lower()
+    
+    # Stamp the row now so queued writes keep the time the analysis ran
+    row = {
+        'url': url,
+        'domain': domain,
+        'analysis_date': datetime.utcnow(),
+        'processing_time': processing_time,
+        'error_message': error_message
+    }
+    
+    if results and not error_message:
+        # Extract meta data
+        meta_data = results.get('meta_data', {})
+        validation = results.get('validation', {})
+        row.update({
+            'title': meta_data.get('title'),
+            'title_length': len(meta_data.get('title', '')),
+            'description': meta_data.get('description'),
+            'description_length': len(meta_data.get('description', '')),
+            'keywords': meta_data.get('keywords'),
             
             # Extract Open Graph data
-            analysis.og_title = meta_data.get('og:title')
-            analysis.og_description = meta_data.get('og:description')
-            analysis.og_image = meta_data.get('og:image')
-            analysis.og_url = meta_data.get('og:url')
-            analysis.og_type = meta_data.get('og:type')
-            analysis.og_site_name = meta_data.get('og:site_name')
+            'og_title': meta_data.get('og_title'),
+            'og_description': meta_data.get('og_description'),
+            'og_image': meta_data.get('og_image'),
+            'og_url': meta_data.get('og_url'),
+            'og_type': meta_data.get('og_type'),
+            'og_site_name': meta_data.get('og_site_name'),
             
             # Extract Twitter Card data
-            analysis.twitter_card = meta_data.get('twitter:card')
-            analysis.twitter_title = meta_data.get('twitter:title')
-            analysis.twitter_description = meta_data.get('twitter:description')
-            analysis.twitter_image = meta_data.get('twitter:image')
-            analysis.twitter_site = meta_data.get('twitter:site')
+            'twitter_card': meta_data.get('twitter_card'),
+            'twitter_title': meta_data.get('twitter_title'),
+            'twitter_description': meta_data.get('twitter_description'),
+            'twitter_image': meta_data.get('twitter_image'),
+            'twitter_site': meta_data.get('twitter_site'),
             
             # Extract scores
-            validation = results.get('validation', {})
-            analysis.overall_score = validation.get('overall_score', 0)
-            analysis.title_score = validation.get('title_score', 0)
-            analysis.description_score = validation.get('description_score', 0)
-            analysis.og_score = validation.get('og_score', 0)
-            analysis.twitter_score = validation.get('twitter_score', 0)
+            'overall_score': validation.get('overall_score', 0),
+            'title_score': validation.get('title_score', 0),
+            'description_score': validation.get('description_score', 0),
+            'og_score': validation.get('og_score', 0),
+            'twitter_score': validation.get('twitter_score', 0),
+            
+            # Rule inputs not derivable from the other columns, for re-scoring
+            'h1_count': meta_data.get('h1_count', len(meta_data.get('h1_tags', []))),
+            'image_alt_missing': meta_data.get('image_alt_missing'),
+            'total_images': meta_data.get('total_images'),
             
             # Set validation flags
-            analysis.has_title = bool(meta_data.get('title'))
-            analysis.has_description = bool(meta_data.get('description'))
-            analysis.has_keywords = bool(meta_data.get('keywords'))
-            analysis.has_og_tags = any([
-                meta_data.get('og:title'),
-                meta_data.get('og:description'),
-                meta_data.get('og:image')
-            ])
-            analysis.has_twitter_cards = any([
-                meta_data.get('twitter:card'),
-                meta_data.get('twitter:title'),
-                meta_data.get('twitter:description')
-            ])
+            'has_title': bool(meta_data.get('title')),
+            'has_description': bool(meta_data.get('description')),
+            'has_keywords': bool(meta_data.get('keywords')),
+            'has_og_tags': any([
+                meta_data.get('og_title'),
+                meta_data.get('og_description'),
+                meta_data.get('og_image')
+            ]),
+            'has_twitter_cards': any([
+                meta_data.get('twitter_card'),
+                meta_data.get('twitter_title'),
+                meta_data.get('twitter_description')
+            ]),
+            
+            'content_hash': results.get('content_hash'),
+            'stage_timings': results.get('timings'),
             
             # Additional metadata
-            analysis.canonical_url = meta_data.get('canonical')
-            analysis.robots = meta_data.get('robots')
-            analysis.viewport = meta_data.get('viewport')
-            analysis.charset = meta_data.get('charset')
+            'canonical_url': meta_data.get('canonical'),
+            'robots': meta_data.get('robots'),
+            'viewport': meta_data.get('viewport'),
+            'charset': meta_data.get('charset')
+        })
+    
+    return row
+
+def write_analyses(rows):
+    """Insert analysis rows in one statement and fold them into DomainStats, one update per domain"""
+    started = time.perf_counter()
+    try:
         
-        # Save to database
-        db.session.add(analysis)
+        # URL, domain and repeated strings become ids into their dimension tables
+        normalized, resolved = dimension_resolver.normalize_rows(db, rows)
         
-        # Update or create domain statistics
-        if not error_message:
-            domain_stats = DomainStats.query.filter_by(domain=domain).first()
-            if not domain_stats:
-                domain_stats = DomainStats(domain=domain)
-                db.session.add(domain_stats)
-            
-            domain_stats.update_stats(analysis)
+        # Bulk insert; rows with different column sets are batched separately. Until
+        # migrate-dimensions has run, the first release's NOT NULL inline columns are filled too
+        legacy = inline_columns()
+        if legacy:
+            db.session.execute(*dimensions.legacy_insert(SeoAnalysis.__table__, legacy, rows, normalized))
+        else:
+            db.session.execute(db.insert(SeoAnalysis), normalized)
+        
+        # Aggregate the successful analyses per domain
+        batches = {}
+        for row in rows:
+            if row['error_message']:
+                continue
+            batch = batches.setdefault(row['domain'], models.DomainStatsBatch())
+            batch.add(row)
         
+        # Atomic per-domain increments, safe against concurrent writers
+        for domain, batch in batches.items():
+            DomainStats.apply_batch(domain, batch)
+        
+        GlobalStats.apply_rows(rows)
+        rollups.record_analyses(ScoreRollup, rows)
+        
+        # Per batch, so these reach the histograms but not the stored rows
+        committing = time.perf_counter()
+        instrumentation.metrics.observe('db_write', committing - started)
         db.session.commit()
+        instrumentation.metrics.observe('db_commit', time.perf_counter() - committing)
+        dimension_resolver.remember(resolved)
+    
+    except Exception:
+        db.session.rollback()
+        raise
+
+def flush_analyses(rows):
+    """Write-behind flush callback; runs on the writer thread, outside any request"""
+    with app.app_context():
+        write_analyses(rows)
+
+def save_analysis_to_db(url, results, error_message, processing_time):
+    """Save analysis results to database"""
+    row = build_analysis_row(url, results, error_message, processing_time)
+    
+    if analysis_writer is not None:
+        # Queued; written by the background writer in the next batch
+        analysis_writer.submit(row)
+        return
+    
+    try:
+        write_analyses([row])
         app.logger.info(f"Saved analysis for {url} to database")
-        
+    
     except Exception as e:
-        db.session.rollback()
         app.logger.error(f"Error saving analysis to database: {str(e)}")
 
 
@@ -179,12 +564,17 @@ def history():
     """Show analysis history"""
     try:
         
-        # Get recent analyses (last 50)
-        analyses = SeoAnalysis.query.order_by(
-            SeoAnalysis.analysis_date.desc()
-        ).limit(50).all()
+        # One keyset page of recent analyses, loading only the columns shown
+        filters = analysis_history.parse_history_filters(request.args)
+        analyses, next_cursor = analysis_history.fetch_history_page(db.session, SeoAnalysis, legacy=inline_columns(),
+                                                                    **filters)
         
-        return render_template('history.html', analyses=analyses)
+        return render_template('history.html', analyses=analyses, next_cursor=next_cursor,
+                               filters={name: value for name, value in filters.items() if name != 'cursor'})
+    
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('history'))
     
     except Exception as e:
         app.logger.error(f"Error fetching history: {str(e)}")
@@ -192,6 +582,75 @@ def history():
         return redirect(url_for('index'))
 
 
+@app.route('/api/history')
+def history_api():
+    """Page through analyses as JSON, filtered by domain, score range and status"""
+    try:
+        filters = analysis_history.parse_history_filters(request.args)
+        analyses, next_cursor = analysis_history.fetch_history_page(db.session, SeoAnalysis, legacy=inline_columns(),
+                                                                    **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'analyses': [analysis_history.history_row_to_dict(row) for row in analyses],
+        'next_cursor': next_cursor
+    })
+
+
+@app.route('/api/domains/<domain>/trend')
+def domain_trend(domain):
+    """Score trend for a domain from the hourly/daily rollups"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        trend = rollups.query_trend(
+            db.session, ScoreRollup, domain,
+            granularity=request.args.get('granularity', 'day'),
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'domain': domain.lower(), 'buckets': trend})
+
+
+def parse_archive_range(args):
+    """Read optional ISO start/end timestamps from query arguments"""
+    start = args.get('start')
+    end = args.get('end')
+    return (datetime.fromisoformat(start) if start else None,
+            datetime.fromisoformat(end) if end else None)
+
+
+@app.route('/api/archive/history')
+def archive_history():
+    """Archived analyses, newest first, filtered by domain and date range"""
+    try:
+        start, end = parse_archive_range(request.args)
+        limit = max(1, min(int(request.args.get('limit', 100)), analysis_history.MAX_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    columns = [column.key for column in analysis_history.history_columns(SeoAnalysis)]
+    rows = analysis_archive.history(columns, domain=request.args.get('domain'), start=start, end=end, limit=limit)
+    for row in rows:
+        row['analysis_date'] = row['analysis_date'].isoformat()
+    return jsonify({'analyses': rows})
+
+
+@app.route('/api/archive/stats')
+def archive_stats():
+    """Counts and average score over archived analyses"""
+    try:
+        start, end = parse_archive_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(analysis_archive.stats(domain=request.args.get('domain'), start=start, end=end))
+
+
 @app.route('/stats')
 def stats():
     """Show domain statistics"""
@@ -202,9 +661,10 @@ def stats():
             DomainStats.total_analyses.desc()
         ).limit(20).all()
         
-        # Get overall statistics
-        total_analyses = SeoAnalysis.query.count()
-        avg_score = db.session.query(db.func.avg(SeoAnalysis.overall_score)).scalar() or 0
+        # Get overall statistics from the materialized totals
+        global_stats = GlobalStats.current()
+        total_analyses = global_stats.total_analyses
+        avg_score = global_stats.avg_score
         
         return render_template('stats.html', 
                              top_domains=top_domains,
@@ -226,12 +686,320 @@ def internal_error(error):
 
 # Import and initialize models
 import models
-SeoAnalysis, DomainStats = models.init_models(db)
+SeoAnalysis, DomainStats, GlobalStats, ScoreRollup = models.init_models(db)
+PageUrl = models.PageUrl
+dimension_resolver = dimensions.DimensionResolver(models.Domain, models.PageUrl, models.TextValue)
+
+# Inline columns left from before normalized storage; None until first looked up
+legacy_inline_columns = None
 
-with app.app_context():
+def inline_columns():
+    """Inline url/domain/text columns seo_analyses still has, looked up once per process"""
+    global legacy_inline_columns
+    if legacy_inline_columns is None:
+        legacy_inline_columns = dimensions.legacy_columns(db)
+    return legacy_inline_columns
+
+def init_database():
+    """Create missing tables and columns and backfill missing stats
+
+    Inline url/domain/text columns from before normalized storage are left
+    alone: moving them drops columns, so it only happens when
+    `flask --app app migrate-dimensions` is run. Until then the domain stats
+    backfill waits too, as it finds analyses through their domain ids.
+    """
+    global legacy_inline_columns
     db.create_all()
+    models.upgrade_schema(db)
+    models.rebuild_global_stats(db, only_missing=True)
+    legacy = legacy_inline_columns = dimensions.legacy_columns(db)
+    if legacy:
+        app.logger.warning("seo_analyses still has the inline columns %s; run `flask --app app migrate-dimensions`",
+                           ", ".join(legacy))
+        return
+    models.rebuild_domain_stats(db, only_missing=True)
     app.logger.info("Database tables created")
 
+# Fast start keeps the database out of the import path; run `flask --app app init-db` on deploy instead
+app.config["SEO_FAST_START"] = os.environ.get("SEO_FAST_START", "").lower() in ("1", "true", "yes")
+if not app.config["SEO_FAST_START"]:
+    with app.app_context():
+        init_database()
+
+analysis_writer = None
+if app.config["SEO_WRITE_BEHIND"]:
+    analysis_writer = persistence.WriteBehindWriter(
+        flush_analyses,
+        max_queue=app.config["SEO_WRITE_QUEUE_SIZE"],
+        batch_size=app.config["SEO_WRITE_BATCH_SIZE"],
+        flush_interval=app.config["SEO_WRITE_FLUSH_INTERVAL"]
+    )
+
+# Worker threads start on the first submitted job
+analysis_jobs = jobs.AnalysisJobQueue(
+    run_analysis_job,
+    workers=app.config["SEO_JOB_WORKERS"],
+    max_depth=app.config["SEO_JOB_QUEUE_SIZE"],
+    max_per_domain=app.config["SEO_JOB_MAX_PER_DOMAIN"],
+    result_ttl=app.config["SEO_JOB_RESULT_TTL"]
+)
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema; needed before the first start with SEO_FAST_START"""
+    init_database()
+    print("Database schema is up to date")
+
+
+@app.cli.command('migrate-dimensions')
+@click.option('--chunk-size', type=int, default=5000, help='Analyses converted per transaction')
+@click.confirmation_option(prompt='This drops the inline url/domain/text columns from seo_analyses and cannot be '
+                                  'undone. Back up the database first. Continue?')
+def migrate_dimensions_command(chunk_size):
+    """Move inline url/domain/text columns into the dimension tables, then drop them"""
+    global legacy_inline_columns
+    db.create_all()
+    models.upgrade_schema(db)
+    legacy = dimensions.legacy_columns(db)
+    if not legacy:
+        print("Nothing to migrate")
+        return
+    converted = dimensions.migrate_legacy_columns(db, dimension_resolver, chunk_size=chunk_size)
+    legacy_inline_columns = []
+    domains = models.rebuild_domain_stats(db, only_missing=True)
+    print(f"Migrated {converted} analyses, dropped {', '.join(legacy)} and backfilled {domains} domain stats rows")
+
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the global and per-domain statistics from seo_analyses"""
+    rebuild_stats()
+
+
+def rebuild_stats():
+    """Recompute every score aggregate (global, per-domain, rollups) from seo_analyses and the archive"""
+    models.rebuild_global_stats(db)
+    domains = models.rebuild_domain_stats(db)
+    rolled_up = rollups.rebuild_rollups(db, ScoreRollup, SeoAnalysis)
+    archived = fold_archived_stats()
+    global_stats = GlobalStats.current()
+    print(f"Rebuilt global stats ({global_stats.total_analyses} analyses) and {domains} domain stats rows")
+    compacted = compact_rollups_before()
+    print(f"Rebuilt score rollups from {rolled_up} analyses and {archived} archived ones, "
+          f"compacted {compacted} hourly buckets")
+
+
+def fold_archived_stats(chunk_size=5000):
+    """Add archived analyses back onto aggregates just rebuilt from seo_analyses
+
+    Archiving deletes rows but not what they added to the stats, so after a
+    rebuild the archive is replayed through the same increments that
+    write_analyses applies. Returns the number of archived analyses.
+    """
+    columns = ['domain', 'analysis_date', 'error_message'] + list(models.DomainStatsBatch.SCORE_COLUMNS)
+    batches = {}
+    pending = []
+    folded = 0
+    
+    def flush():
+        GlobalStats.apply_rows(pending)
+        rollups.record_analyses(ScoreRollup, pending)
+        db.session.commit()
+    
+    for row in analysis_archive.iter_rows(columns):
+        if not row['error_message']:
+            batches.setdefault(row['domain'], models.DomainStatsBatch()).add(row)
+        pending.append(row)
+        folded += 1
+        if len(pending) >= chunk_size:
+            flush()
+            pending = []
+    if pending:
+        flush()
+    
+    for domain, batch in batches.items():
+        DomainStats.apply_batch(domain, batch)
+    db.session.commit()
+    return folded
+
+
+def compact_rollups_before(days=None):
+    """Compact hourly rollups older than the configured retention"""
+    if days is None:
+        days = app.config["SEO_ROLLUP_HOURLY_RETENTION_DAYS"]
+    return rollups.compact_hourly(db, ScoreRollup, datetime.utcnow() - timedelta(days=days))
+
+
+@app.cli.command('compact-rollups')
+@click.option('--days', type=int, default=None, help='Keep hourly buckets for this many days')
+def compact_rollups_command(days):
+    """Merge old hourly score rollups into daily buckets"""
+    compacted = compact_rollups_before(days)
+    print(f"Compacted {compacted} hourly buckets")
+
+
+
+@app.cli.command('archive-analyses')
+@click.option('--days', type=int, default=None, help='Archive analyses older than this many days')
+def archive_analyses_command(days):
+    """Move old analyses from seo_analyses into the monthly archive"""
+    if days is None:
+        days = app.config["SEO_RETENTION_DAYS"]
+    archived = analysis_archive.archive_before(db, SeoAnalysis, datetime.utcnow() - timedelta(days=days))
+    print(f"Archived {archived} analyses to {analysis_archive.root}")
+
+
+
+@app.cli.command('rescore-analyses')
+@click.option('--chunk-size', type=int, default=5000, help='Analyses scored and updated per transaction')
+@click.option('--no-rebuild-stats', is_flag=True, help='Leave the score aggregates for a later rebuild-stats')
+def rescore_analyses_command(chunk_size, no_rebuild_stats):
+    """Recompute stored overall scores with the current rules, without refetching"""
+    started = time.perf_counter()
+    counts = seo_rules.rescore_analyses(db, SeoAnalysis, scoring_rules, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Rescored {counts['scanned']} analyses with rules {scoring_rules.version} in {elapsed:.2f}s, "
+          f"{counts['changed']} rows updated")
+    if not no_rebuild_stats:
+        rebuild_stats()
+
+
+@app.cli.command('crawl')
+@click.argument('root_url')
+@click.option('--max-pages', type=int, default=1000, help='Stop after analyzing this many pages')
+@click.option('--max-depth', type=int, default=3, help='Follow links this many hops from the root')
+@click.option('--concurrency', type=int, default=8, help='Pages fetched and analyzed at once')
+@click.option('--no-sitemaps', is_flag=True, help='Only discover pages through links')
+@click.option('--output', type=click.File('w'), default=None, help='Also write each result as a JSON line here')
+@click.option('--no-save', is_flag=True, help='Do not store the analyses in the database')
+def crawl_command(root_url, max_pages, max_depth, concurrency, no_sitemaps, output, no_save):
+    """Analyze a whole site, found through its sitemaps and links"""
+    import crawl
+    analyzer = create_analyzer()
+    # Links live in the body, so the crawl always reads whole pages
+    analyzer.stream_head_only = False
+    crawler = crawl.SiteCrawler(analyzer, max_pages=max_pages, max_depth=max_depth, concurrency=concurrency,
+                                use_sitemaps=not no_sitemaps)
+    
+    # Each result is stored and written out as it arrives, never collected
+    for count, results in enumerate(crawler.crawl(normalize_url(root_url)), 1):
+        if not no_save:
+            record_result(results)
+        if output is not None:
+            output.write(json.dumps(results, default=dict) + '\n')
+        if count % 100 == 0:
+            print(f"{count} pages crawled, {len(crawler.frontier)} queued")
+    
+    print(json.dumps(dict(crawler.stats, urls_seen=crawler.frontier.seen), sort_keys=True))
+
+
+@app.cli.command('analyze-urls')
+@click.argument('urls', nargs=-1)
+@click.option('--input', 'input_file', type=click.File('r'), default=None, help='Also analyze the URLs in this file, one per line')
+@click.option('--concurrency', type=int, default=32, help='Analyses in flight at once on the event loop')
+@click.option('--output', type=click.File('w'), default=None, help='Also write each result as a JSON line here')
+@click.option('--no-save', is_flag=True, help='Do not store the analyses in the database')
+def analyze_urls_command(urls, input_file, concurrency, output, no_save):
+    """Analyze a list of URLs with the asyncio analyzer"""
+    import async_analyzer
+    
+    def iter_urls():
+        yield from urls
+        if input_file is not None:
+            for line in input_file:
+                if line.strip() and not line.lstrip().startswith('#'):
+                    yield line.strip()
+    
+    started = time.perf_counter()
+    count = errors = 0
+    for results in async_analyzer.analyze_many(create_async_analyzer(), (normalize_url(url) for url in iter_urls()),
+                                               concurrency=concurrency):
+        count += 1
+        errors += bool(results['error'])
+        if not no_save and results.get('cache') in (None, 'miss', 'refreshed'):
+            record_result(results)
+        if output is not None:
+            output.write(json.dumps(results, default=dict) + '\n')
+    
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {count} URLs ({errors} failed) in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f}/s)")
+
+
+@app.cli.command('analyze-offline')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--output', required=True, type=click.Path(dir_okay=False), help='JSONL or CSV file to write results to')
+@click.option('--format', 'output_format', type=click.Choice(['jsonl', 'csv']), default=None,
+              help='Output format; by default taken from the output file extension')
+@click.option('--workers', type=int, default=None, help='Parse processes (default: one per core, 1 parses in-process)')
+@click.option('--base-url', default=None, help='URL of each directory given, for HTML files; default file:// URLs')
+@click.option('--resume', is_flag=True, help='Continue an interrupted run, keeping the results already written')
+@click.option('--load-db', is_flag=True, help='Also bulk-load the results into seo_analyses')
+@click.option('--batch-size', type=int, default=500, help='Results per database insert and output flush')
+def analyze_offline_command(paths, output, output_format, workers, base_url, resume, load_db, batch_size):
+    """Score saved pages from HTML files and WARC archives, without fetching anything"""
+    output_format = output_format or ('csv' if output.lower().endswith('.csv') else 'jsonl')
+    workers = workers or os.cpu_count() or 1
+    writer = offline.ResultWriter(output, output_format, resume=resume)
+    if writer.completed:
+        print(f"Resuming after {writer.completed} results already in {output}")
+    
+    analyzer = create_analyzer()
+    pool = None
+    if workers > 1 and analyzer.parse_pool is None:
+        pool = analyzer.parse_pool = parse_pool.ParsePool(
+            workers, app.config["SEO_PARSER_BACKEND"], scoring_rules.rules,
+            max_headings=app.config["SEO_MAX_HEADINGS"] or None
+        ).start()
+    
+    # A run that died between loading a batch and writing it out may have stored that batch already
+    check_unchanged = resume and load_db
+    started = time.perf_counter()
+    count, batch = 0, []
+    
+    def flush(batch):
+        nonlocal check_unchanged
+        if load_db and batch:
+            rows = [
+                build_analysis_row(results['url'], None if results['error'] else results, results['error'],
+                                   results['processing_time'])
+                for results in batch
+                if not (check_unchanged and not results['error'] and is_unchanged(results['url'], results['content_hash']))
+            ]
+            if rows:
+                write_analyses(rows)
+            check_unchanged = False
+        for results in batch:
+            writer.write(results)
+        writer.flush()
+    
+    try:
+        sources = offline.iter_sources(paths, base_url)
+        for results in offline.analyze_sources(sources, analyzer, threads=workers, skip=writer.completed,
+                                               last_skipped=writer.last_source):
+            batch.append(results)
+            count += 1
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+                print(f"{writer.completed + count} pages analyzed ({count / (time.perf_counter() - started):.1f}/s)")
+        flush(batch)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.close()
+    
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {count} pages in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f}/s), results in {output}")
+
+
+@app.cli.command('storage-report')
+def storage_report_command():
+    """Print the bytes used by each table and index"""
+    print(json.dumps(dimensions.storage_report(db), indent=2, sort_keys=True))
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,183 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import inspect, select
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; archives fall back to gzipped JSON columns
+    pyarrow = None
+
+
+# Archive files hold at most this many rows; each batch is one file
+DEFAULT_BATCH_SIZE = 5000
+
+PARQUET_SUFFIX = '.parquet'
+JSON_SUFFIX = '.cols.json.gz'
+
+
+def month_key(moment: datetime) -> str:
+    """Archive directory name for the month a timestamp falls in"""
+    return moment.strftime('%Y-%m')
+
+
+def _write_columns(path: str, columns: Dict[str, List[Any]]) -> None:
+    """Write column lists to path atomically, as Parquet or gzipped JSON"""
+    temporary = path + '.tmp'
+    if path.endswith(PARQUET_SUFFIX):
+        pyarrow.parquet.write_table(pyarrow.table(columns), temporary, compression='zstd')
+    else:
+        encoded = {
+            name: [value.isoformat() if isinstance(value, datetime) else value for value in values]
+            for name, values in columns.items()
+        }
+        with gzip.open(temporary, 'wt', encoding='utf-8', compresslevel=9) as handle:
+            json.dump({'columns': encoded}, handle, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+def _read_columns(path: str, names: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """Read an archive file back into column lists"""
+    if path.endswith(PARQUET_SUFFIX):
+        return pyarrow.parquet.read_table(path, columns=names).to_pydict()
+
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        columns = json.load(handle)['columns']
+    if names is not None:
+        columns = {name: columns[name] for name in names}
+    if 'analysis_date' in columns:
+        columns['analysis_date'] = [datetime.fromisoformat(value) for value in columns['analysis_date']]
+    return columns
+
+
+class AnalysisArchive:
+    """Monthly columnar archive of seo_analyses rows
+
+    Rows older than the retention window are written to
+    <root>/<YYYY-MM>/part-<first id>-<last id> files and then deleted from
+    the live table in small batches. Parquet (zstd) is used when pyarrow is
+    installed, otherwise column-oriented JSON compressed with gzip.
+    """
+
+    def __init__(self, root: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.root = root
+        self.batch_size = batch_size
+        self.suffix = PARQUET_SUFFIX if pyarrow is not None else JSON_SUFFIX
+
+    # Archiving
+
+    def archive_before(self, db, SeoAnalysis, cutoff: datetime) -> int:
+        """Move every analysis older than cutoff into the archive; returns the row count"""
+        table = SeoAnalysis.__table__
+        # Every mapped attribute, so url/domain/text values are archived as strings
+        names = [attribute.key for attribute in inspect(SeoAnalysis).column_attrs]
+        archived = 0
+
+        while True:
+            rows = db.session.execute(
+                select(*[getattr(SeoAnalysis, name) for name in names]).where(SeoAnalysis.analysis_date < cutoff)
+                .order_by(SeoAnalysis.analysis_date, SeoAnalysis.id).limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+
+            by_month: Dict[str, List[Any]] = {}
+            for row in rows:
+                by_month.setdefault(month_key(row.analysis_date), []).append(row)
+
+            # Files are named by id range, so a rerun after a crash rewrites the same file
+            for month, month_rows in by_month.items():
+                directory = os.path.join(self.root, month)
+                os.makedirs(directory, exist_ok=True)
+                ids = [row.id for row in month_rows]
+                path = os.path.join(directory, f'part-{min(ids):012d}-{max(ids):012d}{self.suffix}')
+                _write_columns(path, {name: [getattr(row, name) for row in month_rows] for name in names})
+
+            # Delete only after the files are safely on disk; one short transaction per batch
+            db.session.execute(table.delete().where(table.c.id.in_([row.id for row in rows])))
+            db.session.commit()
+            archived += len(rows)
+
+        return archived
+
+    # Reading
+
+    def months(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """Archived months overlapping [start, end), oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        months = sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+        if start is not None:
+            months = [month for month in months if month >= month_key(start)]
+        if end is not None:
+            months = [month for month in months if month <= month_key(end)]
+        return months
+
+    def _files(self, month: str) -> List[str]:
+        directory = os.path.join(self.root, month)
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith((PARQUET_SUFFIX, JSON_SUFFIX))
+        )
+
+    def iter_rows(self, columns: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  domain: Optional[str] = None, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield archived rows with the given columns, one file in memory at a time"""
+        wanted = list(dict.fromkeys(columns + ['id', 'analysis_date', 'domain']))
+        domain = domain.lower() if domain else None
+
+        months = self.months(start, end)
+        for month in reversed(months) if newest_first else months:
+            files = self._files(month)
+            for path in reversed(files) if newest_first else files:
+                data = _read_columns(path, wanted)
+                indexes = range(len(data['id']))
+                if newest_first:
+                    indexes = sorted(indexes, key=lambda i: (data['analysis_date'][i], data['id'][i]), reverse=True)
+                for i in indexes:
+                    if domain and data['domain'][i] != domain:
+                        continue
+                    analysis_date = data['analysis_date'][i]
+                    if (start is not None and analysis_date < start) or (end is not None and analysis_date >= end):
+                        continue
+                    yield {name: data[name][i] for name in columns}
+
+    def history(self, columns: List[str], domain: Optional[str] = None, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Archived analyses, newest first"""
+        rows = []
+        for row in self.iter_rows(columns, start, end, domain, newest_first=True):
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def stats(self, domain: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> Dict[str, Any]:
+        """Analysis count, error count and average score over archived rows, overall and per month"""
+        totals = {'analyses': 0, 'errors': 0, 'score_sum': 0, 'scored': 0}
+        per_month: Dict[str, Dict[str, Any]] = {}
+
+        for row in self.iter_rows(['analysis_date', 'error_message', 'overall_score'], start, end, domain):
+            month = per_month.setdefault(month_key(row['analysis_date']),
+                                         {'analyses': 0, 'errors': 0, 'score_sum': 0, 'scored': 0})
+            for bucket in (totals, month):
+                bucket['analyses'] += 1
+                if row['error_message']:
+                    bucket['errors'] += 1
+                if row['overall_score'] is not None:
+                    bucket['score_sum'] += row['overall_score']
+                    bucket['scored'] += 1
+
+        def summarize(bucket):
+            return {
+                'analyses': bucket['analyses'],
+                'errors': bucket['errors'],
+                'avg_score': round(bucket['score_sum'] / bucket['scored'], 1) if bucket['scored'] else 0
+            }
+
+        return dict(summarize(totals), months={month: summarize(bucket) for month, bucket in per_month.items()})
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+import validators
+
+import instrumentation
+from seo_analyzer import HeadLimitedBuffer, SEOAnalyzer
+
+try:
+    import aiohttp
+except ImportError:  # without aiohttp pages are fetched with requests in the executor
+    aiohttp = None
+
+
+class AsyncSEOAnalyzer(SEOAnalyzer):
+    """SEOAnalyzer with a non-blocking analyze_url for asyncio code
+
+    Pages are fetched with aiohttp on the event loop when it is installed,
+    otherwise with the pooled requests session in the executor. Cache
+    lookups and the CPU-bound parse/extract/validate stages always run in
+    the executor, so the loop stays free for other analyses. Results go
+    through the same result cache, content memo and HostScheduler as the
+    sync analyze_url. Create one instance per event loop and reuse it: it
+    owns a pooled aiohttp session.
+    """
+
+    def __init__(self, *args, executor: Optional[Executor] = None, max_connections: int = 1000,
+                 per_host_connections: int = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # None runs the blocking stages on the event loop's default executor
+        self.executor = executor
+        self.max_connections = max_connections
+        self.per_host_connections = per_host_connections
+        self._client: Optional['aiohttp.ClientSession'] = None
+
+    async def __aenter__(self) -> 'AsyncSEOAnalyzer':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the pooled aiohttp session"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def analyze_url_async(self, url: str) -> Dict[str, Any]:
+        """Analyze a URL without blocking the event loop; same result as analyze_url"""
+        timer = self._new_timer()
+        results = await self._analyze_url_async(url, timer)
+        return self._finish_timer(results, timer)
+
+    async def _analyze_url_async(self, url: str, timer) -> Dict[str, Any]:
+        """analyze_url_async without the timing wrapper"""
+
+        # Validate URL format
+        if not validators.url(url):
+            return {'error': 'Invalid URL format. Please enter a valid URL.'}
+
+        try:
+            # Serve fresh cached results without touching the network
+            entry, cached = await self._offload(timer, self._cache_lookup, url)
+            if cached is not None:
+                return cached
+
+            # Fetch the webpage, revalidating a stale cache entry if there is one
+            content, fetch_info = await self._fetch_async(url, timer, entry.conditional_headers() if entry else None)
+
+            revalidated = await self._offload(timer, self._cache_revalidated, url, entry, fetch_info)
+            if revalidated is not None:
+                return revalidated
+
+            # Parse, validate and cache off the event loop
+            results = await self._offload(timer, self._analyze_content, content, url, fetch_info)
+            return await self._offload(timer, self._cache_store, url, entry, results)
+
+        except Exception as e:
+            return {'error': self._describe_error(e)}
+
+    async def _offload(self, timer, function, *args):
+        """Run a blocking step in the executor, recording its stages on this analysis' timer"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, instrumentation.run_with, timer, function, *args)
+
+    async def _fetch_async(self, url: str, timer,
+                           extra_headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, Dict[str, Any]]:
+        """_fetch for coroutines: waits for the host's politeness slot without blocking the loop"""
+
+        headers = dict(self.headers, **extra_headers) if extra_headers else self.headers
+
+        if self.scheduler is None:
+            return await self._fetch_page_async(url, headers, timer)
+
+        host = urlparse(url).netloc.lower()
+        attempt = 0
+        while True:
+            await self.scheduler.acquire_async(host)
+            try:
+                content, fetch_info = await self._fetch_page_async(url, headers, timer)
+            except Exception as e:
+                status_code, retry_after = self._error_status(e)
+                throttled = self.scheduler.release(host, status_code, retry_after)
+                if not throttled or attempt >= self.scheduler.max_retries:
+                    raise
+                # Try again once the host's penalty has passed
+                attempt += 1
+                continue
+
+            self.scheduler.release(host, fetch_info['status_code'])
+            return content, fetch_info
+
+    async def _fetch_page_async(self, url: str, headers: Dict[str, str], timer) -> Tuple[bytes, Dict[str, Any]]:
+        """Fetch the page body, streaming only the head when configured"""
+
+        if aiohttp is None:
+            return await self._offload(timer, self._fetch_page, url, headers)
+
+        started = time.perf_counter()
+        async with self._get_client().get(url, headers=headers) as response:
+            responded = time.perf_counter()
+            timer.add('ttfb', responded - started)
+            response.raise_for_status()
+
+            if not self.stream_head_only:
+                content = await response.read()
+                timer.add('download', time.perf_counter() - responded)
+                return content, self._full_fetch_info(content, response.status, response.headers, str(response.url))
+
+            buffer = HeadLimitedBuffer(self.body_byte_budget)
+            async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+                if buffer.feed(chunk):
+                    break
+            timer.add('download', time.perf_counter() - responded)
+
+        content = buffer.content()
+        return content, self._stream_fetch_info(content, buffer.truncated, response.status, response.headers,
+                                                str(response.url))
+
+    def _get_client(self) -> 'aiohttp.ClientSession':
+        """Return the keep-alive aiohttp session, creating it on first use"""
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.per_host_connections,
+                                             ttl_dns_cache=300)
+            # Like the pooled requests sessions, never carry one site's cookies into the next analysis
+            self._client = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                 cookie_jar=aiohttp.DummyCookieJar(),
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._client
+
+    def _error_status(self, error: Exception) -> Tuple[Optional[int], Optional[str]]:
+        """The HTTP status and Retry-After header of a failed fetch, if it got a response"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response.status_code, error.response.headers.get('Retry-After')
+        if aiohttp is not None and isinstance(error, aiohttp.ClientResponseError):
+            return error.status, (error.headers or {}).get('Retry-After')
+        return None, None
+
+    def _describe_error(self, error: Exception) -> str:
+        """Map aiohttp errors onto the same messages the sync path uses"""
+        if isinstance(error, asyncio.TimeoutError):
+            return 'Request timed out. The website took too long to respond.'
+        if aiohttp is not None:
+            if isinstance(error, aiohttp.ClientResponseError):
+                return f'HTTP error {error.status}: {error.message}'
+            if isinstance(error, aiohttp.ClientConnectionError):
+                return 'Could not connect to the website. Please check the URL and try again.'
+        return super()._describe_error(error)
+
+
+def analyze_many(analyzer: AsyncSEOAnalyzer, urls: Iterable[str], concurrency: int = 16) -> Iterator[Dict[str, Any]]:
+    """Analyze URLs with up to concurrency analyses in flight, yielding each result as it finishes
+
+    For synchronous callers such as the CLI: the event loop runs in a
+    background thread, and at most concurrency finished results wait for the
+    caller before the analyses pause. Each result carries its url and
+    processing_time, like the ones SEOAnalyzer.analyze_urls yields.
+    """
+    loop = asyncio.new_event_loop()
+    finished = asyncio.Queue(maxsize=max(1, concurrency))
+    done = object()
+
+    async def worker(pending: Iterator[str]) -> None:
+        # Workers share one iterator, so a slow page never holds up the rest of the list
+        for url in pending:
+            started = time.perf_counter()
+            results = await analyzer.analyze_url_async(url)
+            results['url'] = url
+            results['processing_time'] = time.perf_counter() - started
+            await finished.put(results)
+
+    async def run() -> None:
+        pending = iter(urls)
+        try:
+            await asyncio.gather(*(worker(pending) for _ in range(max(1, concurrency))))
+            outcome = done
+        except Exception as e:
+            outcome = e
+        finally:
+            await analyzer.close()
+        await finished.put(outcome)
+
+    async def stop() -> None:
+        main.cancel()
+        await asyncio.wait([main])
+
+    main = loop.create_task(run())
+    thread = threading.Thread(target=loop.run_forever, name='seo-async', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = asyncio.run_coroutine_threadsafe(finished.get(), loop).result()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # The caller may stop consuming early; cancel whatever is still running
+        asyncio.run_coroutine_threadsafe(stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
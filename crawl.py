@@ -0,0 +1,353 @@
+import gzip
+import hashlib
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+import instrumentation
+from meta_extractor import decode_markup
+
+
+# Sitemap index files are followed this many levels deep
+MAX_SITEMAP_DEPTH = 3
+
+# Link targets that are never HTML pages worth analyzing
+SKIPPED_EXTENSIONS = (
+    '.css', '.js', '.json', '.xml', '.txt', '.pdf', '.zip', '.gz', '.png', '.jpg', '.jpeg', '.gif', '.svg',
+    '.webp', '.ico', '.mp3', '.mp4', '.webm', '.woff', '.woff2'
+)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """Canonical form used to deduplicate the frontier, or None for non-HTTP URLs
+
+    Lowercases the scheme and host, drops default ports and fragments, and
+    gives empty paths a trailing slash.
+    """
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f'{host}:{port}'
+
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def site_hosts(netloc: str) -> Set[str]:
+    """A host and its www. counterpart, which almost always serve the same site"""
+    if netloc.startswith('www.'):
+        return {netloc, netloc[len('www.'):]}
+    return {netloc, 'www.' + netloc}
+
+
+def url_key(url: str) -> bytes:
+    """Compact fingerprint of a normalized URL; the frontier stores these instead of the URLs"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=12).digest()
+
+
+class LinkExtractor(HTMLParser):
+    """Collect <a href> targets, skipping rel=nofollow, resolved against <base href>"""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == 'base':
+            href = dict(attrs).get('href')
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+        elif tag == 'a':
+            attributes = dict(attrs)
+            href = attributes.get('href')
+            if href and 'nofollow' not in (attributes.get('rel') or '').lower().split():
+                self.links.append(urljoin(self.base_url, href))
+
+
+def extract_links(content: bytes, url: str) -> List[str]:
+    """Absolute link targets found in a page"""
+    extractor = LinkExtractor(url)
+    extractor.feed(decode_markup(content))
+    extractor.close()
+    return extractor.links
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[str], List[str]]:
+    """Page URLs and nested sitemap URLs listed in a sitemap or sitemap index"""
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+
+    pages, sitemaps = [], []
+    root = ElementTree.fromstring(content)
+    # Namespaced or not, the element names are what matter
+    target = sitemaps if root.tag.rsplit('}', 1)[-1] == 'sitemapindex' else pages
+    for element in root.iter():
+        if element.tag.rsplit('}', 1)[-1] == 'loc' and element.text:
+            target.append(element.text.strip())
+    return pages, sitemaps
+
+
+class RobotsCache:
+    """Parsed robots.txt per host, fetched once and kept for ttl seconds
+
+    Follows RFC 9309: a missing robots.txt (4xx) allows everything, while
+    401/403, server errors and unreachable hosts disallow everything until
+    the entry expires.
+    """
+
+    def __init__(self, fetch: Callable[[str], bytes], user_agent: str = '*', ttl: float = 3600,
+                 max_hosts: int = 10000):
+        self.fetch = fetch
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self._rules: 'OrderedDict[str, Tuple[RobotFileParser, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rules(self, url: str) -> RobotFileParser:
+        """Parsed robots.txt for the scheme and host of url"""
+        parts = urlsplit(url)
+        origin = f'{parts.scheme}://{parts.netloc}'
+
+        with self._lock:
+            cached = self._rules.get(origin)
+            if cached is not None and time.time() - cached[1] < self.ttl:
+                self._rules.move_to_end(origin)
+                return cached[0]
+
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            parser.parse(decode_markup(self.fetch(origin + '/robots.txt')).splitlines())
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code
+            if status in (401, 403) or status >= 500:
+                parser.disallow_all = True
+            else:
+                parser.allow_all = True
+        except Exception:
+            parser.disallow_all = True
+
+        with self._lock:
+            self._rules[origin] = (parser, time.time())
+            self._rules.move_to_end(origin)
+            while len(self._rules) > self.max_hosts:
+                self._rules.popitem(last=False)
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        """Check whether robots.txt lets us fetch url"""
+        return self.rules(url).can_fetch(self.user_agent, url)
+
+    def sitemaps(self, url: str) -> List[str]:
+        """Sitemap URLs declared in the host's robots.txt"""
+        return self.rules(url).site_maps() or []
+
+
+class Frontier:
+    """URLs waiting to be crawled, breadth first, each admitted at most once
+
+    Admitted URLs are remembered by a 12-byte fingerprint, so even a crawl
+    of hundreds of thousands of pages keeps the seen set small.
+    """
+
+    def __init__(self):
+        self._queue: Deque[Tuple[str, int]] = deque()
+        self._seen: Set[bytes] = set()
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue url unless it has been seen before; returns True if it was queued"""
+        key = url_key(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._queue.append((url, depth))
+        return True
+
+    def mark_seen(self, url: str) -> None:
+        """Remember url without queueing it, e.g. a page already fetched under another URL"""
+        self._seen.add(url_key(url))
+
+    def pop(self) -> Tuple[str, int]:
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def seen(self) -> int:
+        return len(self._seen)
+
+
+class SiteCrawler:
+    """Analyze a whole site, starting from a root URL
+
+    Pages come from the site's sitemaps and from links on crawled pages,
+    staying on the root's host (with or without www., and wherever the
+    root itself redirects to), within max_depth link hops of the root
+    (sitemap URLs count as seeds) and up to max_pages analyses. robots.txt
+    is respected, and pages whose robots meta says nofollow contribute no
+    links. Fetches go through the analyzer, so its session, politeness
+    scheduler and parser backend apply; it should read whole pages
+    (stream_head_only off) or links in the body are missed. crawl() yields
+    each result as soon as it is ready and keeps none of them.
+    """
+
+    def __init__(self, analyzer, max_pages: int = 1000, max_depth: int = 3, concurrency: int = 8,
+                 use_sitemaps: bool = True, robots: Optional[RobotsCache] = None):
+        self.analyzer = analyzer
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = max(1, concurrency)
+        self.use_sitemaps = use_sitemaps
+        self.robots = robots or RobotsCache(self._fetch_bytes)
+        self.frontier = Frontier()
+        self.host: Optional[str] = None
+        # Hosts treated as the crawled site
+        self.hosts: Set[str] = set()
+        self.stats = {'analyzed': 0, 'errors': 0, 'disallowed': 0, 'sitemap_urls': 0}
+
+    def crawl(self, root_url: str) -> Iterator[Dict[str, Any]]:
+        """Yield one analysis result per crawled page, each with its link depth"""
+        root = normalize_url(root_url)
+        if root is None:
+            yield {'error': 'Invalid URL format. Please enter a valid URL.', 'url': root_url, 'depth': 0,
+                   'processing_time': 0.0}
+            return
+        self.host = urlsplit(root).netloc
+        self.hosts = site_hosts(self.host)
+
+        self.frontier.add(root, 0)
+        if self.use_sitemaps:
+            self._seed_from_sitemaps(root)
+
+        dispatched = 0
+        running: Dict[Future, Tuple[str, int, float]] = {}
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='seo-crawl')
+        try:
+            while running or (self.frontier and dispatched < self.max_pages):
+                while self.frontier and dispatched < self.max_pages and len(running) < self.concurrency:
+                    url, depth = self.frontier.pop()
+                    if not self.robots.allowed(url):
+                        self.stats['disallowed'] += 1
+                        continue
+                    running[pool.submit(self._crawl_page, url, depth)] = (url, depth, time.perf_counter())
+                    dispatched += 1
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth, started = running.pop(future)
+                    try:
+                        results, links = future.result()
+                    except Exception as e:
+                        results, links = {'error': self.analyzer._describe_error(e), 'url': url}, []
+                    results['processing_time'] = time.perf_counter() - started
+
+                    if results.get('error'):
+                        self.stats['errors'] += 1
+                    else:
+                        self.stats['analyzed'] += 1
+                        if url == root:
+                            self._follow_root_redirect(results)
+                    if depth < self.max_depth:
+                        for link in links:
+                            self._admit(link, depth + 1)
+
+                    results['depth'] = depth
+                    yield results
+        finally:
+            # The caller may stop consuming early; drop whatever has not started
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _crawl_page(self, url: str, depth: int) -> Tuple[Dict[str, Any], List[str]]:
+        """Fetch and analyze one page, returning its results and outgoing links"""
+        timer = self.analyzer._new_timer()
+        content, fetch_info = instrumentation.run_with(timer, self.analyzer._fetch, url)
+        results = instrumentation.run_with(timer, self.analyzer._analyze_content, content, url, fetch_info)
+        self.analyzer._finish_timer(results, timer)
+
+        directives = {directive.strip() for directive in results['meta_data']['robots'].lower().split(',')}
+        if depth >= self.max_depth or directives & {'nofollow', 'none'}:
+            return results, []
+        # Relative links resolve against where the page was actually served from
+        return results, extract_links(content, fetch_info.get('final_url') or url)
+
+    def _follow_root_redirect(self, results: Dict[str, Any]) -> None:
+        """Adopt the host the root URL redirected to, e.g. a canonical www. or https host"""
+        final_url = normalize_url(results.get('fetch', {}).get('final_url') or '')
+        if final_url is None:
+            return
+        self.hosts |= site_hosts(urlsplit(final_url).netloc)
+        # Already analyzed as the root; links back to it should not queue it again
+        self.frontier.mark_seen(final_url)
+
+    def _admit(self, link: str, depth: int) -> None:
+        """Queue a discovered URL if it is an unseen page on the crawled site"""
+        url = normalize_url(link)
+        if url is None or urlsplit(url).netloc not in self.hosts:
+            return
+        if urlsplit(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+            return
+        self.frontier.add(url, depth)
+
+    def _seed_from_sitemaps(self, root: str) -> None:
+        """Queue every page listed in the host's sitemaps, following sitemap indexes"""
+        pending = deque((url, 0) for url in self.robots.sitemaps(root) or [urljoin(root, '/sitemap.xml')])
+        visited = set()
+
+        while pending:
+            sitemap_url, level = pending.popleft()
+            if sitemap_url in visited or level > MAX_SITEMAP_DEPTH:
+                continue
+            visited.add(sitemap_url)
+            try:
+                pages, nested = parse_sitemap(self._fetch_bytes(sitemap_url))
+            except Exception:
+                continue
+
+            pending.extend((url, level + 1) for url in nested)
+            for page in pages:
+                before = len(self.frontier)
+                self._admit(page, 0)
+                self.stats['sitemap_urls'] += len(self.frontier) - before
+
+    def _fetch_bytes(self, url: str) -> bytes:
+        """Fetch a robots.txt or sitemap body through the analyzer's session and scheduler"""
+        scheduler = self.analyzer.scheduler
+        host = urlsplit(url).netloc.lower()
+        if scheduler is not None:
+            scheduler.acquire(host)
+
+        response = None
+        try:
+            response = self.analyzer._get_session().get(url, headers=self.analyzer.headers,
+                                                        timeout=self.analyzer.timeout)
+            response.raise_for_status()
+            return response.content
+        finally:
+            if scheduler is not None:
+                if response is None:
+                    scheduler.release(host)
+                else:
+                    scheduler.release(host, response.status_code, response.headers.get('Retry-After'))
@@ -0,0 +1,225 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from models import UPSERT_DIALECTS, upsert_insert
+
+
+# SeoAnalysis string fields stored once in text_values and referenced by id
+TEXT_VALUE_FIELDS = ('og_image', 'og_site_name', 'twitter_site')
+
+# seo_analyses columns that held these strings before they were normalized
+LEGACY_COLUMNS = ('url', 'domain') + TEXT_VALUE_FIELDS
+
+# Keys per SELECT ... IN (...) lookup
+LOOKUP_CHUNK_SIZE = 500
+
+
+def value_hash(value: str) -> str:
+    """Key a URL or text value is deduplicated by"""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+class DimensionResolver:
+    """Turn URL, domain and repeated text values into ids in their dimension tables
+
+    Known ids are kept in a per-process LRU, so steady-state writes need no
+    lookups at all. Ids are only remembered once the transaction that
+    created them has committed.
+    """
+
+    def __init__(self, Domain, PageUrl, TextValue, max_entries: int = 100000):
+        self.Domain = Domain
+        self.PageUrl = PageUrl
+        self.TextValue = TextValue
+        self.max_entries = max_entries
+        self._known: 'OrderedDict[Tuple[str, str], int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize_rows(self, db, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict]:
+        """Replace the string fields of SeoAnalysis row dicts with dimension ids
+
+        Returns the rewritten rows and the ids resolved for them; pass the
+        latter to remember() after the transaction commits.
+        """
+        domain_ids = self._resolve(db, self.Domain.__table__, 'name', {
+            row['domain']: {} for row in rows
+        })
+        page_ids = self._resolve(db, self.PageUrl.__table__, 'url_hash', {
+            value_hash(row['url']): {'url': row['url'], 'domain_id': domain_ids[row['domain']]} for row in rows
+        })
+        text_ids = self._resolve(db, self.TextValue.__table__, 'value_hash', {
+            value_hash(row[field]): {'value': row[field]}
+            for row in rows for field in TEXT_VALUE_FIELDS if row.get(field)
+        })
+
+        normalized = []
+        for row in rows:
+            row = dict(row)
+            row['page_id'] = page_ids[value_hash(row.pop('url'))]
+            row['domain_id'] = domain_ids[row.pop('domain')]
+            for field in TEXT_VALUE_FIELDS:
+                value = row.pop(field, None)
+                if value:
+                    row[field + '_id'] = text_ids[value_hash(value)]
+            normalized.append(row)
+
+        resolved = {}
+        for table, ids in (('domains', domain_ids), ('page_urls', page_ids), ('text_values', text_ids)):
+            resolved.update({(table, key): value for key, value in ids.items()})
+        return normalized, resolved
+
+    def remember(self, resolved: Dict[Tuple[str, str], int]) -> None:
+        """Cache ids from a committed transaction"""
+        with self._lock:
+            for key, value in resolved.items():
+                self._known[key] = value
+                self._known.move_to_end(key)
+            while len(self._known) > self.max_entries:
+                self._known.popitem(last=False)
+
+    def _resolve(self, db, table, key_column: str, entries: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """Ids for every key in entries, inserting the ones the table does not have yet"""
+        ids = {}
+        with self._lock:
+            for key in entries:
+                known = self._known.get((table.name, key))
+                if known is not None:
+                    ids[key] = known
+
+        missing = [key for key in entries if key not in ids]
+        ids.update(self._lookup(db, table, key_column, missing))
+
+        missing = [key for key in missing if key not in ids]
+        if missing:
+            self._insert(db, table, key_column, [dict(entries[key], **{key_column: key}) for key in missing])
+            ids.update(self._lookup(db, table, key_column, missing))
+
+        return ids
+
+    def _lookup(self, db, table, key_column: str, keys: List[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            rows = db.session.execute(select(table.c[key_column], table.c.id).where(table.c[key_column].in_(chunk)))
+            found.update({key: row_id for key, row_id in rows})
+        return found
+
+    def _insert(self, db, table, key_column: str, values: List[Dict[str, Any]]) -> None:
+        """Insert new dimension rows, tolerating rows a concurrent writer just added"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect in UPSERT_DIALECTS:
+            statement = upsert_insert(dialect, table).on_conflict_do_nothing(index_elements=[table.c[key_column]])
+            db.session.execute(statement, values)
+            return
+
+        for value in values:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert().values(**value))
+            except IntegrityError:
+                pass
+
+
+def legacy_columns(db) -> List[str]:
+    """Inline string columns still present in seo_analyses, i.e. not yet migrated"""
+    inspector = inspect(db.engine)
+    if not inspector.has_table('seo_analyses'):
+        return []
+    existing = {column['name'] for column in inspector.get_columns('seo_analyses')}
+    return [column for column in LEGACY_COLUMNS if column in existing]
+
+
+def legacy_insert(table, legacy: Sequence[str], rows: List[Dict[str, Any]],
+                  normalized: List[Dict[str, Any]]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """INSERT statement and parameters for seo_analyses while it still has inline columns
+
+    The first release declared url and domain NOT NULL, so until
+    migrate-dimensions drops them new rows fill them in alongside their
+    dimension ids. rows are the rows as built, normalized what
+    DimensionResolver.normalize_rows made of them. Every row gets every
+    column, with the scalar column defaults the ORM insert would apply.
+    """
+    columns = [column for column in table.columns if not column.primary_key]
+    target = Table(table.name, MetaData(), *[Column(column.name, column.type) for column in columns],
+                   *[Column(name, String) for name in legacy])
+    defaults = {column.name: column.default.arg for column in columns
+                if column.default is not None and column.default.is_scalar}
+    params = []
+    for row, values in zip(rows, normalized):
+        values = dict(values, **{name: row.get(name) for name in legacy})
+        params.append({column.name: values.get(column.name, defaults.get(column.name)) for column in target.columns})
+    return target.insert(), params
+
+
+def migrate_legacy_columns(db, resolver: DimensionResolver, chunk_size: int = 5000) -> int:
+    """Move url/domain/text strings stored inline in seo_analyses into the dimension tables
+
+    Rows are converted in chunks, one transaction each, so the migration
+    can be interrupted and resumed. The legacy columns and their indexes
+    are dropped once every row points at its dimension rows, which cannot
+    be undone; only the migrate-dimensions command runs this. Returns the
+    number of rows converted.
+    """
+    legacy = legacy_columns(db)
+    if not legacy:
+        return 0
+
+    update = text(
+        'UPDATE seo_analyses SET page_id = :page_id, domain_id = :domain_id, '
+        + ', '.join(f'{field}_id = :{field}_id' for field in TEXT_VALUE_FIELDS)
+        + ' WHERE id = :id'
+    )
+
+    converted = 0
+    while True:
+        rows = db.session.execute(
+            text(f'SELECT id, {", ".join(legacy)} FROM seo_analyses WHERE page_id IS NULL ORDER BY id LIMIT :limit'),
+            {'limit': chunk_size}
+        ).mappings().all()
+        if not rows:
+            break
+
+        normalized, resolved = resolver.normalize_rows(db, [dict(row) for row in rows])
+        db.session.execute(update, [
+            dict({field + '_id': None for field in TEXT_VALUE_FIELDS}, **row) for row in normalized
+        ])
+        db.session.commit()
+        resolver.remember(resolved)
+        converted += len(rows)
+
+    # Indexes must go first; SQLite refuses to drop an indexed column
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        existing = {column['name'] for column in inspector.get_columns('seo_analyses')}
+        for index in inspector.get_indexes('seo_analyses'):
+            if set(index['column_names']) & set(legacy):
+                connection.execute(text(f'DROP INDEX {index["name"]}'))
+        for column in legacy:
+            if column in existing:
+                connection.execute(text(f'ALTER TABLE seo_analyses DROP COLUMN {column}'))
+
+    return converted
+
+
+def storage_report(db, tables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Bytes used by each table and index (SQLite dbstat or PostgreSQL size functions)"""
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as connection:
+        if dialect == 'sqlite':
+            rows = connection.execute(text('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')).all()
+        elif dialect == 'postgresql':
+            rows = connection.execute(text(
+                "SELECT c.relname, pg_relation_size(c.oid) FROM pg_class c "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'i')"
+            )).all()
+        else:
+            raise ValueError(f'Storage report is not supported on {dialect}')
+
+    sizes = {name: size for name, size in rows if tables is None or name in tables}
+    return {'objects': sizes, 'total_bytes': sum(sizes.values())}
@@ -0,0 +1,195 @@
+"""Local stand-in for the websites the analyzer fetches, for benchmarks
+
+Serves a fixed corpus of pages shaped like the hard cases seen in the
+wild, with optional latency, server errors and 429 throttling:
+
+    with FixtureServer(latency=0.05, throttle_rate=0.1) as server:
+        SEOAnalyzer().analyze_url(server.url('huge', 1))
+
+Every URL's query string is echoed into the page, so distinct URLs have
+distinct bytes and are never answered from the content-hash memo.
+"""
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+
+def _tiny_page() -> str:
+    return '<html><head><title>Tiny</title></head><body><p>Hi</p></body></html>'
+
+
+def _typical_page() -> str:
+    """A well-formed article page that passes most checks"""
+    paragraphs = ''.join(f'<p>Paragraph {i} of the article, with <a href="/p{i}">a link</a>.</p>' for i in range(40))
+    images = ''.join(f'<img src="/img/{i}.jpg" alt="Figure {i}">' for i in range(8))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        '<title>A typical article page with a reasonable title</title>'
+        f'<meta name="description" content="{"A description of the article that is long enough. " * 3}">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        '<link rel="canonical" href="https://example.com/article">'
+        '<meta property="og:title" content="A typical article"><meta property="og:description" content="About it">'
+        '<meta property="og:image" content="https://example.com/og.jpg">'
+        '<meta name="twitter:card" content="summary_large_image"><meta name="twitter:image" content="https://example.com/tw.jpg">'
+        f'</head><body><h1>A typical article</h1><h2>Section</h2>{paragraphs}{images}</body></html>'
+    )
+
+
+def _huge_page() -> str:
+    """About 2 MB of body after a normal head"""
+    block = ''.join(f'<div class="row"><h2>Item {i}</h2><p>{"Lorem ipsum dolor sit amet. " * 12}</p></div>'
+                    for i in range(5000))
+    return ('<html><head><title>A very large page with thousands of rows of content</title>'
+            '<meta name="description" content="Large page"></head>'
+            f'<body><h1>Huge</h1>{block}</body></html>')
+
+
+def _many_images_page() -> str:
+    """2000 images, a third of them without alt text"""
+    images = ''.join(f'<img src="/img/{i}.png">' if i % 3 == 0 else f'<img src="/img/{i}.png" alt="Image {i}">'
+                     for i in range(2000))
+    return ('<html><head><title>Gallery page with a great many images on it</title></head>'
+            f'<body><h1>Gallery</h1>{images}</body></html>')
+
+
+def _deep_head_page() -> str:
+    """A head padded with hundreds of scripts, styles and meta tags before the SEO tags"""
+    padding = ''.join(
+        f'<meta name="x-tracking-{i}" content="{i}"><link rel="preload" href="/asset{i}.js" as="script">'
+        f'<script>window.config{i} = {{"key": "{"v" * 200}"}};</script><style>.c{i} {{ color: red; }}</style>'
+        for i in range(400)
+    )
+    return (f'<html><head>{padding}<title>Page whose SEO tags come after a very deep head</title>'
+            '<meta name="description" content="Deep head"><link rel="canonical" href="https://example.com/deep">'
+            '</head><body><h1>Deep</h1></body></html>')
+
+
+# name -> page builder; the bodies are built once, when the server starts
+PAGES = {
+    'tiny': _tiny_page,
+    'typical': _typical_page,
+    'huge': _huge_page,
+    'many-images': _many_images_page,
+    'deep-head': _deep_head_page
+}
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connection bursts, which then wait a second for a SYN retry
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address) -> None:
+        # Head-only fetches hang up mid-body on purpose
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """Threaded HTTP server on localhost serving PAGES at /<name>
+
+    latency (plus up to jitter) seconds are slept before answering.
+    error_rate of the responses are 500s and throttle_rate are 429s
+    with Retry-After: retry_after; seed makes that sequence repeatable.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, seed: int = 0, port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.port = port
+        self.bodies = {name: build() for name, build in PAGES.items()}
+        self.counts: Dict[str, int] = {'requests': 0, 'ok': 0, 'errors': 0, 'throttled': 0, 'not_found': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def __enter__(self) -> 'FixtureServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> 'FixtureServer':
+        self._server = _QuietHTTPServer(('127.0.0.1', self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, page: str, n: Optional[int] = None) -> str:
+        """URL of a corpus page; a distinct n gives distinct page bytes"""
+        query = f'?n={n}' if n is not None else ''
+        return f'http://127.0.0.1:{self.port}/{page}{query}'
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counts)
+
+    def _outcome(self) -> str:
+        """ok, error or throttled for the next response"""
+        with self._lock:
+            self.counts['requests'] += 1
+            roll = self._random.random()
+            delay = self.latency + self._random.random() * self.jitter
+        if roll < self.error_rate:
+            outcome = 'errors'
+        elif roll < self.error_rate + self.throttle_rate:
+            outcome = 'throttled'
+        else:
+            outcome = 'ok'
+        if delay:
+            time.sleep(delay)
+        return outcome
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; with Nagle the body waits on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                body = server.bodies.get(parts.path.lstrip('/'))
+                outcome = server._outcome()
+                if body is None:
+                    outcome = 'not_found'
+                with server._lock:
+                    server.counts[outcome] += 1
+
+                if outcome == 'ok':
+                    payload = body.replace('</body>', f'<!-- {parts.query} --></body>', 1).encode('utf-8')
+                    self._respond(200, payload, {'Content-Type': 'text/html; charset=utf-8'})
+                elif outcome == 'throttled':
+                    self._respond(429, b'Too Many Requests', {'Retry-After': str(server.retry_after)})
+                elif outcome == 'errors':
+                    self._respond(500, b'Internal Server Error')
+                else:
+                    self._respond(404, b'Not Found')
+
+            def _respond(self, status: int, payload: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
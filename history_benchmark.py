@@ -0,0 +1,151 @@
+"""History query latency on a large seo_analyses table: keyset pages versus OFFSET and full rows
+
+Fills a throwaway SQLite database (or DATABASE_URL, which must be empty)
+with --rows analyses spread over --domains domains, then times, as the
+median of --repeat runs in milliseconds:
+
+    python history_benchmark.py --rows 2000000 [--page 200] [--repeat 5]
+
+- full_rows_page_1: the original /history query, every column of the
+  newest 50 analyses through the ORM
+- keyset_page_1 / keyset_page_N: fetch_history_page on the first page and
+  on page N, reached by following next_cursor
+- offset_page_N: the same columns and order with OFFSET
+- domain_score_filter and errors_only: filtered first pages
+
+Many analyses share an analysis_date, as bulk runs write them, so paging
+also crosses timestamp ties.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+# Rows per INSERT statement while filling the table
+FILL_CHUNK = 20000
+
+
+def fill(app_module, rows: int, domains: int, seed: int) -> float:
+    """Insert rows analyses with their domains and URLs; returns the seconds taken"""
+    import dimensions
+    db, models = app_module.db, app_module.models
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    names = [f'site{i}.example.com' for i in range(domains)]
+    urls_per_domain = max(1, rows // domains // 4)
+    newest = datetime(2025, 1, 1)
+
+    with db.engine.begin() as connection:
+        connection.execute(models.Domain.__table__.insert(), [{'id': i + 1, 'name': name} for i, name in enumerate(names)])
+        pages = []
+        for domain_id, name in enumerate(names, 1):
+            for n in range(urls_per_domain):
+                url = f'https://{name}/page/{n}'
+                pages.append({'id': len(pages) + 1, 'url': url, 'url_hash': dimensions.value_hash(url),
+                              'domain_id': domain_id})
+        for start in range(0, len(pages), FILL_CHUNK):
+            connection.execute(models.PageUrl.__table__.insert(), pages[start:start + FILL_CHUNK])
+
+        table = app_module.SeoAnalysis.__table__
+        for start in range(0, rows, FILL_CHUNK):
+            chunk = []
+            for i in range(start, min(rows, start + FILL_CHUNK)):
+                page = pages[rng.randrange(len(pages))]
+                failed = rng.random() < 0.05
+                chunk.append({
+                    'page_id': page['id'],
+                    'domain_id': page['domain_id'],
+                    'title': f'Page title number {i} with the usual length',
+                    'description': 'A description of the page that is long enough to be realistic. ' * 2,
+                    'og_description': 'Open Graph description of the page. ' * 2,
+                    'overall_score': None if failed else rng.randrange(0, 101),
+                    # Ten analyses per second, as a bulk run stores them: timestamps repeat
+                    'analysis_date': newest - timedelta(seconds=i // 10),
+                    'processing_time': rng.random(),
+                    'error_message': 'HTTP error 500: Internal Server Error' if failed else None
+                })
+            connection.execute(table.insert(), chunk)
+
+    return time.perf_counter() - started
+
+
+def median_ms(call: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def measure(app_module, page: int, repeat: int, limit: int = 50) -> Dict[str, float]:
+    import analysis_history
+    from sqlalchemy import select
+    db, SeoAnalysis = app_module.db, app_module.SeoAnalysis
+
+    def keyset(**filters):
+        return analysis_history.fetch_history_page(db.session, SeoAnalysis, limit=limit, **filters)
+
+    # The cursor of the page before page N, found by walking the pages once
+    cursor = None
+    for _ in range(page - 1):
+        _, cursor = keyset(cursor=cursor)
+
+    offset_query = select(*analysis_history.history_columns(SeoAnalysis)).order_by(
+        SeoAnalysis.analysis_date.desc(), SeoAnalysis.id.desc()
+    ).offset((page - 1) * limit).limit(limit)
+
+    return {
+        'full_rows_page_1': median_ms(
+            lambda: SeoAnalysis.query.order_by(SeoAnalysis.analysis_date.desc()).limit(limit).all(), repeat),
+        'keyset_page_1': median_ms(lambda: keyset(), repeat),
+        f'keyset_page_{page}': median_ms(lambda: keyset(cursor=cursor), repeat),
+        f'offset_page_{page}': median_ms(lambda: db.session.execute(offset_query).all(), repeat),
+        'domain_score_filter': median_ms(lambda: keyset(domain='site7.example.com', min_score=60, max_score=90), repeat),
+        'errors_only': median_ms(lambda: keyset(status='error'), repeat)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000, help='Analyses in the table')
+    parser.add_argument('--domains', type=int, default=100, help='Domains the analyses are spread over')
+    parser.add_argument('--page', type=int, default=200, help='Deep page timed for keyset and OFFSET paging')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='seo-history-')
+    try:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(scratch, "history.db")}')
+        os.environ.setdefault('SEO_ARCHIVE_DIR', os.path.join(scratch, 'archive'))
+        os.environ.setdefault('SEO_CACHE_PATH', os.path.join(scratch, 'cache.db'))
+        os.environ.setdefault('SEO_LOG_LEVEL', 'WARNING')
+
+        # After the environment is set; app reads it at import
+        import app as app_module
+
+        with app_module.app.app_context():
+            fill_seconds = fill(app_module, args.rows, args.domains, args.seed)
+            report = {
+                'rows': args.rows,
+                'domains': args.domains,
+                'fill_seconds': round(fill_seconds, 1),
+                'database': app_module.db.engine.dialect.name,
+                'python': sys.version.split()[0],
+                'queries_ms': measure(app_module, args.page, args.repeat)
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import instrumentation
+
+
+# Process-wide connection pool settings
+DEFAULT_POOL_SETTINGS = {
+    'pool_connections': 100,  # Number of distinct hosts kept in the pool
+    'pool_maxsize': 10,       # Keep-alive connections kept per host
+    'pool_block': True,       # Wait for a free connection instead of exceeding pool_maxsize
+    'pool_timeout': 10.0      # Seconds a fetch waits for that connection before failing
+}
+
+_pool_settings: Dict[str, Any] = dict(DEFAULT_POOL_SETTINGS)
+_adapter: Optional[HTTPAdapter] = None
+_adapter_pid: Optional[int] = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+# Connection setup timing. requests does not expose DNS/connect/TLS times,
+# so the pooled connections time connect() themselves; DNS lookup, TCP
+# connect and the TLS handshake are one 'connect' stage. Reused keep-alive
+# connections skip it.
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        with instrumentation.current().stage('connect'):
+            super().connect()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        with instrumentation.current().stage('connect'):
+            super().connect()
+
+
+class BoundedWaitPoolMixin:
+    """Waits at most pool_timeout for a free connection in a blocking pool
+
+    requests never passes a pool timeout, so with pool_block a fetch beyond
+    pool_maxsize would otherwise wait for a connection indefinitely.
+    """
+
+    def _get_conn(self, timeout: Optional[float] = None):
+        return super()._get_conn(timeout=_pool_settings['pool_timeout'] if timeout is None else timeout)
+
+
+class TimedHTTPConnectionPool(BoundedWaitPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(BoundedWaitPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections report their connect time to instrumentation"""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = POOL_CLASSES
+
+
+def configure_pool(pool_connections: Optional[int] = None,
+                   pool_maxsize: Optional[int] = None,
+                   pool_block: Optional[bool] = None,
+                   pool_timeout: Optional[float] = None) -> None:
+    """Change the pool sizes; the pool is rebuilt on next use"""
+    global _adapter
+
+    with _adapter_lock:
+        if pool_connections is not None:
+            _pool_settings['pool_connections'] = pool_connections
+        if pool_maxsize is not None:
+            _pool_settings['pool_maxsize'] = pool_maxsize
+        if pool_block is not None:
+            _pool_settings['pool_block'] = pool_block
+        if pool_timeout is not None:
+            _pool_settings['pool_timeout'] = pool_timeout
+
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
+
+
+def _get_adapter() -> HTTPAdapter:
+    """Return the shared adapter, creating a fresh one after a fork"""
+    global _adapter, _adapter_pid
+
+    pid = os.getpid()
+    if _adapter is not None and _adapter_pid == pid:
+        return _adapter
+
+    with _adapter_lock:
+        if _adapter is None or _adapter_pid != pid:
+            # Sockets inherited from a parent process must not be reused
+            _adapter = TimedHTTPAdapter(
+                pool_connections=_pool_settings['pool_connections'],
+                pool_maxsize=_pool_settings['pool_maxsize'],
+                pool_block=_pool_settings['pool_block']
+            )
+            _adapter_pid = pid
+        return _adapter
+
+
+class RejectAllCookies(DefaultCookiePolicy):
+    """Cookie policy that neither stores nor sends any cookie"""
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+
+def get_session() -> requests.Session:
+    """Return this thread's session, backed by the process-wide connection pool
+
+    urllib3 pools are thread-safe, but requests.Session state (cookies,
+    redirects) is not, so each thread gets its own session mounting the
+    shared adapter. A session outlives many analyses of unrelated sites,
+    so it keeps no cookies; only the connections are shared.
+    """
+    adapter = _get_adapter()
+    session = getattr(_local, 'session', None)
+
+    if session is None or getattr(_local, 'adapter', None) is not adapter:
+        session = requests.Session()
+        session.cookies.set_policy(RejectAllCookies())
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+        _local.adapter = adapter
+
+    return session
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Report the configured pool sizes and the hosts currently pooled"""
+    stats = dict(_pool_settings)
+    adapter = _adapter
+    stats['pooled_hosts'] = len(adapter.poolmanager.pools) if adapter is not None else 0
+    return stats
@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List
+
+
+# Stages in hot-path order; db_write and db_commit are per batch, the rest per analysis
+STAGES = ('connect', 'ttfb', 'download', 'parse', 'extract', 'validate', 'previews', 'db_write', 'db_commit')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageTimer:
+    """Seconds spent in each stage of one analysis"""
+
+    __slots__ = ('stages',)
+
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def stage(self, name: str) -> '_Stage':
+        """Context manager adding the time spent inside it to a stage"""
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self, name: str) -> float:
+        return self.stages.get(name, 0.0)
+
+    def rounded(self) -> Dict[str, float]:
+        """Stage timings in milliseconds, as stored with the analysis"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer: StageTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.timer.add(self.name, time.perf_counter() - self.started)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class NullTimer:
+    """Stand-in used when instrumentation is off; every call is a no-op"""
+
+    __slots__ = ()
+
+    enabled = False
+
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def total(self, name: str) -> float:
+        return 0.0
+
+    def rounded(self) -> Dict[str, float]:
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+_local = threading.local()
+
+
+def current():
+    """The timer recording on this thread, or NULL_TIMER"""
+    return getattr(_local, 'timer', NULL_TIMER)
+
+
+def run_with(timer, function: Callable, *args, **kwargs):
+    """Call function with timer recording on this thread, e.g. inside a worker pool"""
+    previous = getattr(_local, 'timer', NULL_TIMER)
+    _local.timer = timer
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _local.timer = previous
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as exposed by Prometheus"""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Count, sum and cumulative bucket counts, smallest bound first"""
+        cumulative, buckets = 0, []
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            buckets.append({'le': '+Inf' if bound == float('inf') else repr(bound), 'count': cumulative})
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': buckets}
+
+
+class StageMetrics:
+    """Per-stage latency histograms for this process"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histograms[stage].observe(seconds)
+
+    def observe_timer(self, timer) -> None:
+        """Add every stage of a finished analysis"""
+        if not self.enabled or not timer.enabled:
+            return
+        with self._lock:
+            for stage, seconds in timer.stages.items():
+                self._histograms[stage].observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {stage: histogram.to_dict() for stage, histogram in self._histograms.items()}
+
+    def prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format"""
+        name = 'seo_stage_duration_seconds'
+        lines: List[str] = [f'# HELP {name} Time spent in each analysis stage', f'# TYPE {name} histogram']
+        for stage, histogram in self.snapshot().items():
+            for bucket in histogram['buckets']:
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bucket["le"]}"}} {bucket["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Histograms shared by every analyzer and writer in the process
+metrics = StageMetrics()
+
+
+def record_response(timer, started: float, elapsed: float, connect_before: float) -> None:
+    """Split a finished fetch into ttfb and download
+
+    elapsed is requests' Response.elapsed: from sending the request until
+    the headers were parsed, including any connection setup, which the
+    'connect' stage already holds.
+    """
+    if not timer.enabled:
+        return
+    connected = timer.total('connect') - connect_before
+    timer.add('ttfb', max(0.0, elapsed - connected))
+    timer.add('download', max(0.0, time.perf_counter() - started - elapsed))
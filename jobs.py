@@ -0,0 +1,236 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+logger = logging.getLogger(__name__)
+
+# Job states, in the order a job moves through them
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+FINISHED_STATES = (DONE, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised when a job cannot be accepted because the queue is at capacity"""
+
+
+class Job:
+    """One queued URL analysis and, once it has run, its results"""
+
+    __slots__ = ('id', 'url', 'domain', 'status', 'submitted_at', 'started_at', 'finished_at',
+                 'results', 'error', 'version')
+
+    def __init__(self, url: str):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.domain = urlparse(url).netloc.lower()
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Bumped on every status change, so streams can wait for the next one
+        self.version = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready view of the job; results are only included once it is done"""
+        job = {
+            'job_id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error
+        }
+        if self.status == DONE:
+            job['results'] = self.results
+        return job
+
+
+class AnalysisJobQueue:
+    """Run URL analyses on a pool of background threads
+
+    Submitting returns a Job straight away; workers call run_job(url) and
+    store what it returns. The queue is bounded in total (max_depth) and per
+    domain (max_per_domain), and submit() raises QueueFull beyond either, so
+    callers can push back on clients. Workers take jobs from domains in
+    round-robin order, so one site with many URLs cannot starve the others.
+    Finished jobs are kept for result_ttl seconds, at most max_finished of
+    them. Job state lives in this process only.
+    """
+
+    def __init__(self, run_job: Callable[[str], Dict[str, Any]], workers: int = 4, max_depth: int = 1000,
+                 max_per_domain: int = 100, max_finished: int = 1000, result_ttl: float = 3600):
+        self.run_job = run_job
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_per_domain = max_per_domain
+        self.max_finished = max_finished
+        self.result_ttl = result_ttl
+
+        self._jobs: Dict[str, Job] = {}
+        self._finished: 'OrderedDict[str, Job]' = OrderedDict()
+        # Pending jobs per domain, and the domains with pending jobs in service order
+        self._pending: Dict[str, Deque[Job]] = {}
+        self._rotation: Deque[str] = deque()
+        self._depth = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._threads_pid: Optional[int] = None
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'total_wait_seconds': 0.0,
+            'total_run_seconds': 0.0
+        }
+
+    def submit(self, url: str) -> Job:
+        """Queue an analysis of url, raising QueueFull when there is no room for it"""
+        self._ensure_started()
+        job = Job(url)
+
+        with self._lock:
+            pending = self._pending.get(job.domain)
+            if self._depth >= self.max_depth:
+                self._stats['rejected'] += 1
+                raise QueueFull(f'The analysis queue is full ({self.max_depth} jobs)')
+            if pending is not None and len(pending) >= self.max_per_domain:
+                self._stats['rejected'] += 1
+                raise QueueFull(f'Too many queued analyses for {job.domain} ({self.max_per_domain} jobs)')
+
+            if pending is None:
+                pending = self._pending[job.domain] = deque()
+                self._rotation.append(job.domain)
+            pending.append(job)
+            self._jobs[job.id] = job
+            self._depth += 1
+            self._stats['submitted'] += 1
+            self._changed.notify_all()
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job that is queued, running or recently finished"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def wait_for_change(self, job: Job, version: int, timeout: float) -> int:
+        """Block until job's status moves past version or timeout passes; returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout)
+            return job.version
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth, worker use and average wait/run times"""
+        with self._lock:
+            self._expire()
+            stats = dict(self._stats)
+            stats['queue_depth'] = self._depth
+            stats['running'] = self._running
+            stats['domains_waiting'] = len(self._rotation)
+            stats['finished_retained'] = len(self._finished)
+
+        total_wait = stats.pop('total_wait_seconds')
+        total_run = stats.pop('total_run_seconds')
+        started = stats['completed'] + stats['failed']
+        stats['avg_wait_seconds'] = round(total_wait / started, 4) if started else 0.0
+        stats['avg_run_seconds'] = round(total_run / started, 4) if started else 0.0
+        stats['workers'] = self.workers
+        stats['max_depth'] = self.max_depth
+        stats['max_per_domain'] = self.max_per_domain
+        return stats
+
+    def _ensure_started(self) -> None:
+        """Start the worker threads in this process, e.g. after a gunicorn fork"""
+        pid = os.getpid()
+        with self._lock:
+            if self._threads_pid == pid:
+                return
+            self._threads = [
+                threading.Thread(target=self._work, name=f'seo-job-{number}', daemon=True)
+                for number in range(self.workers)
+            ]
+            self._threads_pid = pid
+            for thread in self._threads:
+                thread.start()
+
+    def _next_job(self) -> Job:
+        """Take the oldest job of the next domain in the rotation, waiting for one if needed"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._rotation)
+            domain = self._rotation.popleft()
+            pending = self._pending[domain]
+            job = pending.popleft()
+            if pending:
+                self._rotation.append(domain)
+            else:
+                del self._pending[domain]
+
+            self._depth -= 1
+            self._running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.version += 1
+            self._changed.notify_all()
+            return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            results, error = None, None
+            try:
+                results = self.run_job(job.url)
+            except Exception as e:
+                logger.error(f"Error running analysis job for {job.url}: {str(e)}")
+                error = 'An error occurred while analyzing the website. Please try again.'
+            self._finish(job, results, error)
+
+    def _finish(self, job: Job, results: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._changed:
+            job.finished_at = time.time()
+            if error is None and results is not None and results.get('error'):
+                error = results['error']
+            if error is None:
+                job.status = DONE
+                job.results = results
+                self._stats['completed'] += 1
+            else:
+                job.status = FAILED
+                job.error = error
+                self._stats['failed'] += 1
+            self._stats['total_wait_seconds'] += job.started_at - job.submitted_at
+            self._stats['total_run_seconds'] += job.finished_at - job.started_at
+
+            self._running -= 1
+            self._finished[job.id] = job
+            while len(self._finished) > self.max_finished:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
+            job.version += 1
+            self._changed.notify_all()
+
+    def _expire(self) -> None:
+        """Forget finished jobs older than result_ttl; the lock must be held"""
+        cutoff = time.time() - self.result_ttl
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if job.finished_at >= cutoff:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
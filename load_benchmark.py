@@ -0,0 +1,294 @@
+"""Load-test the analyzer and the web routes against a local fixture site
+
+Starts a FixtureServer (see fixture_server.py) and drives each target at
+a fixed concurrency, then prints throughput, latency percentiles and peak
+memory per target as JSON so runs can be compared:
+
+    python load_benchmark.py --requests 200 --concurrency 8 --latency 0.05 --output run.json
+    python load_benchmark.py --compare run.json
+
+Targets run in the order given: analyzer calls SEOAnalyzer.analyze_url
+directly, analyze POSTs to /analyze (and stores each result), history and
+stats GET those pages. A throwaway SQLite database and archive directory
+are used unless DATABASE_URL / SEO_ARCHIVE_DIR are set.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fixture_server import PAGES, FixtureServer
+
+
+TARGETS = ('analyzer', 'analyze', 'history', 'stats')
+
+# Metrics compared against a baseline run, and whether higher is better
+COMPARED_METRICS = {
+    ('throughput_rps',): True,
+    ('latency_ms', 'p50'): False,
+    ('latency_ms', 'p95'): False,
+    ('latency_ms', 'p99'): False,
+    ('peak_rss_mb',): False
+}
+
+
+class MemorySampler:
+    """Highest resident set size seen while running, sampled from a background thread
+
+    ru_maxrss only ever grows over the life of the process, so it cannot
+    tell targets apart; /proc/self/statm is used where it exists.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'MemorySampler':
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    @staticmethod
+    def _rss() -> int:
+        try:
+            with open('/proc/self/statm') as handle:
+                return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            # Kilobytes on Linux, bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize_latencies(seconds: List[float]) -> Dict[str, float]:
+    ordered = sorted(seconds)
+    return {
+        'mean': round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+        'p50': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99': round(percentile(ordered, 0.99) * 1000, 2),
+        'max': round(ordered[-1] * 1000, 2) if ordered else 0.0
+    }
+
+
+def run_target(call: Callable[[int], Tuple[str, bool, str]], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue requests calls at the given concurrency; call(i) returns (page, ok, status)"""
+    samples: List[Tuple[str, bool, str, float]] = []
+
+    def timed(index: int) -> None:
+        started = time.perf_counter()
+        page, ok, status = call(index)
+        samples.append((page, ok, status, time.perf_counter() - started))
+
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='seo-load') as pool:
+            list(pool.map(timed, range(requests)))
+        duration = time.perf_counter() - started
+
+    statuses: Dict[str, int] = {}
+    by_page: Dict[str, List[float]] = {}
+    for page, ok, status, seconds in samples:
+        statuses[status] = statuses.get(status, 0) + 1
+        by_page.setdefault(page, []).append(seconds)
+    ok_count = sum(1 for sample in samples if sample[1])
+    report = {
+        'requests': len(samples),
+        'ok': ok_count,
+        'errors': len(samples) - ok_count,
+        'statuses': dict(sorted(statuses.items())),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(samples) / duration, 2) if duration else 0.0,
+        'latency_ms': summarize_latencies([sample[3] for sample in samples]),
+        'peak_rss_mb': round(memory.peak / (1 << 20), 1)
+    }
+    if len(by_page) > 1:
+        report['latency_ms_by_page'] = {page: summarize_latencies(seconds) for page, seconds in sorted(by_page.items())}
+    return report
+
+
+def build_calls(app_module, server: FixtureServer, pages: List[str]) -> Dict[str, Callable[[int], Tuple[str, bool, str]]]:
+    """One request function per target"""
+    # Every fetch gets a URL never seen before, so neither the result cache nor the content memo answers it
+    numbers = itertools.count()
+    clients = threading.local()
+
+    def client():
+        if not hasattr(clients, 'client'):
+            clients.client = app_module.app.test_client()
+        return clients.client
+
+    def analyzer(index: int) -> Tuple[str, bool, str]:
+        page = pages[index % len(pages)]
+        results = app_module.create_analyzer().analyze_url(server.url(page, next(numbers)))
+        return page, not results.get('error'), 'error' if results.get('error') else 'ok'
+
+    def analyze(index: int) -> Tuple[str, bool, str]:
+        page = pages[index % len(pages)]
+        response = client().post('/analyze', data={'url': server.url(page, next(numbers))})
+        # Failed analyses redirect back to the form with a flashed message
+        return page, response.status_code == 200, str(response.status_code)
+
+    def get(path: str) -> Callable[[int], Tuple[str, bool, str]]:
+        def call(index: int) -> Tuple[str, bool, str]:
+            response = client().get(path)
+            return path, response.status_code == 200, str(response.status_code)
+        return call
+
+    return {'analyzer': analyzer, 'analyze': analyze, 'history': get('/history'), 'stats': get('/stats')}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Per target and metric: baseline, current and the change in percent (positive is better)"""
+    comparison = {}
+    for target, current in report['targets'].items():
+        previous = baseline.get('targets', {}).get(target)
+        if previous is None:
+            continue
+        metrics = {}
+        for path, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous, current
+            for key in path:
+                old, new = old.get(key), new.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            metrics['.'.join(path)] = {
+                'baseline': old,
+                'current': new,
+                'improvement_pct': round(change if higher_is_better else -change, 1)
+            }
+        comparison[target] = metrics
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', default=','.join(TARGETS), help=f'Comma-separated, from {", ".join(TARGETS)}')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per target')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+    parser.add_argument('--pages', default=','.join(PAGES), help=f'Fixture pages to cycle through, from {", ".join(PAGES)}')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fixture server waits before answering')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fixture responses that are 500s')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of fixture responses that are 429s')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the fixture server\'s errors and jitter')
+    parser.add_argument('--politeness', action='store_true',
+                        help='Keep per-host rate limiting on (all fixture pages share one host)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against')
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    pages = [page.strip() for page in args.pages.split(',') if page.strip()]
+    unknown = [name for name in targets if name not in TARGETS] + [name for name in pages if name not in PAGES]
+    if unknown:
+        parser.error(f'Unknown target or page: {", ".join(unknown)}')
+
+    scratch = tempfile.mkdtemp(prefix='seo-load-')
+    try:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(scratch, "load.db")}')
+        os.environ.setdefault('SEO_ARCHIVE_DIR', os.path.join(scratch, 'archive'))
+        os.environ.setdefault('SEO_CACHE_PATH', os.path.join(scratch, 'cache.db'))
+        os.environ.setdefault('SEO_LOG_LEVEL', 'WARNING')
+        if not args.politeness:
+            os.environ['SEO_HOST_POLITENESS'] = '0'
+
+        # After the environment is set; app reads it at import
+        import app as app_module
+
+        report: Dict[str, Any] = {
+            'settings': {
+                'targets': targets,
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'pages': pages,
+                'latency': args.latency,
+                'jitter': args.jitter,
+                'error_rate': args.error_rate,
+                'throttle_rate': args.throttle_rate,
+                'politeness': args.politeness
+            },
+            'environment': {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'revision': git_revision(),
+                'parse_processes': app_module.app.config['SEO_PARSE_PROCESSES'],
+                'cache_backend': os.environ.get('SEO_CACHE_BACKEND', 'memory')
+            },
+            'targets': {}
+        }
+
+        with FixtureServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed) as server:
+            calls = build_calls(app_module, server, pages)
+            for target in targets:
+                before = server.stats()
+                result = run_target(calls[target], args.requests, args.concurrency)
+                after = server.stats()
+                if target in ('analyzer', 'analyze'):
+                    result['fixture_server'] = {name: after[name] - before[name] for name in after}
+                report['targets'][target] = result
+
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as handle:
+                report['comparison'] = compare(report, json.load(handle))
+
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        print(output)
+    finally:
+        # Flush queued writes and stop worker processes before their files go
+        app_module = sys.modules.get('app')
+        if getattr(app_module, 'analysis_writer', None) is not None:
+            app_module.analysis_writer.shutdown()
+        if getattr(app_module, 'parse_processes', None) is not None:
+            app_module.parse_processes.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Memory retained per analysis result, with and without the heading cap and lazy previews
+
+Builds many results for one page with hundreds of H2s and keeps them all,
+the way the result cache and write-behind queue do, then reports the
+bytes still allocated per result (tracemalloc) and the JSON size of one
+result:
+
+    python memory_benchmark.py --results 200 --headings 800 [--max-headings 50]
+
+eager keeps every heading and builds all four previews up front, as
+results did before; capped keeps --max-headings headings and leaves the
+previews lazy.
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Dict, List
+
+from seo_analyzer import SEOAnalyzer
+
+
+def heading_page(headings: int) -> bytes:
+    sections = ''.join(f'<h2>Section heading number {i}</h2><p>Some text for section {i}.</p>' for i in range(headings))
+    return ('<html><head><title>A long page with very many section headings</title>'
+            '<meta name="description" content="Many headings"></head>'
+            f'<body><h1>Headings</h1>{sections}</body></html>').encode('utf-8')
+
+
+def measure(analyzer: SEOAnalyzer, content: bytes, count: int, eager_previews: bool) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results: List[Dict[str, Any]] = []
+    for i in range(count):
+        result = analyzer._analyze_content(content, f'https://example.com/page/{i}', {})
+        if eager_previews:
+            result['previews'] = {platform: dict(preview) for platform, preview in result['previews'].items()}
+        results.append(result)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        'retained_kb_per_result': round(retained / count / 1024, 1),
+        'json_bytes': len(json.dumps(results[0], default=dict))
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--results', type=int, default=200, help='Results built and kept per mode')
+    parser.add_argument('--headings', type=int, default=800, help='H2 headings on the page')
+    parser.add_argument('--max-headings', type=int, default=50, help='Heading cap in capped mode')
+    parser.add_argument('--parser-backend', default='single_pass', help='Parser backend for both modes')
+    args = parser.parse_args()
+
+    content = heading_page(args.headings)
+    report = {
+        'results': args.results,
+        'headings': args.headings,
+        'page_bytes': len(content),
+        'python': sys.version.split()[0],
+        'modes': {
+            'eager': measure(SEOAnalyzer(parser_backend=args.parser_backend), content, args.results, True),
+            'capped': measure(SEOAnalyzer(parser_backend=args.parser_backend, max_headings=args.max_headings),
+                              content, args.results, False)
+        }
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
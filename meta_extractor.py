@@ -0,0 +1,301 @@
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Union
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+
+# Meta tag lookups, checked in order; the first (attribute, value) hit wins
+META_FIELD_LOOKUPS = (
+    ('name', {
+        'description': 'description',
+        'keywords': 'keywords',
+        'robots': 'robots',
+        'viewport': 'viewport'
+    }),
+    ('property', {
+        'og:title': 'og_title',
+        'og:description': 'og_description',
+        'og:image': 'og_image',
+        'og:url': 'og_url',
+        'og:type': 'og_type',
+        'og:site_name': 'og_site_name'
+    }),
+    ('name', {
+        'twitter:card': 'twitter_card',
+        'twitter:title': 'twitter_title',
+        'twitter:description': 'twitter_description',
+        'twitter:image': 'twitter_image',
+        'twitter:site': 'twitter_site'
+    })
+)
+
+# Tags whose text is collected, mapped to the meta_data field it goes into
+TEXT_CAPTURE_TAGS = {'title': 'title', 'h1': 'h1_tags', 'h2': 'h2_tags'}
+
+# Same tag classes BeautifulSoup uses, so text is attributed identically
+VOID_TAGS = HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS
+PRESERVE_WHITESPACE_TAGS = HTMLTreeBuilder.DEFAULT_PRESERVE_WHITESPACE_TAGS
+STRING_CONTAINER_TAGS = set(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+_NUMERIC_REFERENCE = {
+    10: re.compile('^([0-9]+)(.*)'),
+    16: re.compile('^([0-9a-f]+)(.*)')
+}
+
+
+def empty_meta_data() -> Dict[str, Any]:
+    """Return a meta_data dict with every field at its default"""
+    return {
+        'title': '',
+        'description': '',
+        'keywords': '',
+        'canonical': '',
+        'robots': '',
+        'viewport': '',
+        'charset': '',
+        'og_title': '',
+        'og_description': '',
+        'og_image': '',
+        'og_url': '',
+        'og_type': '',
+        'og_site_name': '',
+        'twitter_card': '',
+        'twitter_title': '',
+        'twitter_description': '',
+        'twitter_image': '',
+        'twitter_site': '',
+        'h1_tags': [],
+        'h2_tags': [],
+        'image_alt_missing': 0,
+        'total_images': 0
+    }
+
+
+def decode_markup(markup: Union[bytes, str]) -> str:
+    """Decode raw page content the same way BeautifulSoup does"""
+    if isinstance(markup, str):
+        return markup
+
+    decoded = UnicodeDammit(markup, is_html=True).unicode_markup
+    if decoded is None:
+        raise ValueError('Could not decode the page content')
+    return decoded
+
+
+def apply_meta_tag(meta_data: Dict[str, Any], attributes: Dict[str, str]) -> None:
+    """Record one <meta> tag's attributes into meta_data"""
+    for attribute, fields in META_FIELD_LOOKUPS:
+        field = fields.get(attributes.get(attribute, '').lower())
+        if field:
+            meta_data[field] = attributes.get('content', '').strip()
+            return
+
+    if attributes.get('charset'):
+        meta_data['charset'] = attributes['charset']
+
+
+def is_canonical_link(attributes: Dict[str, str]) -> bool:
+    """Check whether a <link> tag's attributes mark it as the canonical URL"""
+    return 'canonical' in attributes.get('rel', '').split()
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse a whitespace-only string the way BeautifulSoup stores it"""
+    if text.strip(ASCII_SPACES):
+        return text
+    return '\n' if '\n' in text else ' '
+
+
+class _TextCapture:
+    """Text being collected for one open title/h1/h2 element"""
+
+    __slots__ = ('depth', 'field', 'slot', 'parts')
+
+    def __init__(self, depth: int, field: str, slot: Optional[int]):
+        self.depth = depth
+        self.field = field
+        self.slot = slot
+        self.parts: List[str] = []
+
+
+class SinglePassMetaExtractor(HTMLParser):
+    """Collect meta_data in one pass over the parser events, without a tree
+
+    Mirrors how BeautifulSoup's html.parser builder nests elements and
+    splits text, so the result matches SEOAnalyzer._extract_meta_tags.
+    """
+
+    def __init__(self):
+        # Character references are resolved here the way bs4 does it
+        super().__init__(convert_charrefs=False)
+        self.meta_data = empty_meta_data()
+
+        self._stack: List[str] = []
+        self._preserve_depth = 0
+        self._containers: List[int] = []
+        self._captures: List[_TextCapture] = []
+        self._pending: List[str] = []
+        self._already_closed: List[str] = []
+        self._title_found = False
+        self._canonical_found = False
+
+    def extract(self, markup: str) -> Dict[str, Any]:
+        """Feed a whole document and return the collected meta_data"""
+        self.feed(markup)
+        self.close()
+        self._flush_text()
+        self._pop_to(0)
+        return self.meta_data
+
+    # Parser events
+
+    def handle_starttag(self, tag: str, attrs: List, handle_empty_element: bool = True) -> None:
+        self._flush_text()
+        attributes = {key: value or '' for key, value in attrs}
+
+        if tag == 'meta':
+            apply_meta_tag(self.meta_data, attributes)
+        elif tag == 'img':
+            self.meta_data['total_images'] += 1
+            if not attributes.get('alt'):
+                self.meta_data['image_alt_missing'] += 1
+        elif tag == 'link' and not self._canonical_found:
+            if is_canonical_link(attributes):
+                self.meta_data['canonical'] = attributes.get('href', '')
+                self._canonical_found = True
+
+        self._push(tag)
+
+        if tag in VOID_TAGS and handle_empty_element:
+            # A later explicit end tag for this element is then ignored
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List) -> None:
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag: str, check_already_closed: bool = True) -> None:
+        if check_already_closed and tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+
+        self._flush_text()
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth] == tag:
+                self._pop_to(depth)
+                break
+
+    def handle_data(self, data: str) -> None:
+        self._pending.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        base = 10
+        if name[:1] in ('x', 'X'):
+            name = name[1:]
+            base = 16
+
+        try:
+            code_point = int(name, base)
+            extra = ''
+        except ValueError:
+            match = _NUMERIC_REFERENCE[base].search(name)
+            if match is None:
+                self.handle_data(name)
+                return
+            code_point = int(match.group(1), base)
+            extra = match.group(2)
+
+        character, _ = UnicodeDammit.numeric_character_reference(code_point)
+        self.handle_data(character)
+        self.handle_data(extra)
+
+    def handle_entityref(self, name: str) -> None:
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else '&' + name)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_text()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush_text()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush_text()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush_text()
+        if data.upper().startswith('CDATA['):
+            # CDATA sections count as text even inside script-like tags
+            self._pending.append(data[len('CDATA['):])
+            self._flush_text(is_cdata=True)
+
+    # Element stack
+
+    def _push(self, tag: str) -> None:
+        depth = len(self._stack)
+        self._stack.append(tag)
+
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+        if tag in STRING_CONTAINER_TAGS:
+            self._containers.append(depth)
+
+        field = TEXT_CAPTURE_TAGS.get(tag)
+        if field == 'title':
+            if not self._title_found:
+                self._title_found = True
+                self._captures.append(_TextCapture(depth, field, None))
+        elif field:
+            # Reserve the slot now so headings stay in document order
+            headings = self.meta_data[field]
+            headings.append('')
+            self._captures.append(_TextCapture(depth, field, len(headings) - 1))
+
+    def _pop_to(self, depth: int) -> None:
+        """Close every open element at or below the given stack depth"""
+        while len(self._stack) > depth:
+            tag = self._stack.pop()
+            if tag in PRESERVE_WHITESPACE_TAGS:
+                self._preserve_depth -= 1
+
+        while self._containers and self._containers[-1] >= depth:
+            self._containers.pop()
+
+        while self._captures and self._captures[-1].depth >= depth:
+            capture = self._captures.pop()
+            text = ''.join(capture.parts).strip()
+            if capture.slot is None:
+                self.meta_data[capture.field] = text
+            else:
+                self.meta_data[capture.field][capture.slot] = text
+
+    def _flush_text(self, is_cdata: bool = False) -> None:
+        """Hand the text seen since the last tag event to the open captures"""
+        if not self._pending:
+            return
+
+        text = ''.join(self._pending)
+        self._pending = []
+
+        if not self._captures:
+            return
+
+        # Text inside script/style/template/ruby annotations is not page text
+        if self._containers and not is_cdata:
+            return
+
+        if not self._preserve_depth:
+            text = collapse_whitespace(text)
+
+        for capture in self._captures:
+            capture.parts.append(text)
+
+
+def extract_meta_tags(markup: Union[bytes, str]) -> Dict[str, Any]:
+    """Extract meta_data from raw page content in a single parser pass"""
+    return SinglePassMetaExtractor().extract(decode_markup(markup))
@@ -1,22 +1,194 @@
+import importlib
 from datetime import datetime
+from sqlalchemy import case, func, inspect, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import column_property
 
 
 # Models will be created after db is initialized
 SeoAnalysis = None
 DomainStats = None
+GlobalStats = None
+ScoreRollup = None
+Domain = None
+PageUrl = None
+TextValue = None
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE, used by atomic_upsert
+UPSERT_DIALECTS = ('postgresql', 'sqlite')
+
+
+def upsert_insert(dialect, table):
+    """INSERT supporting ON CONFLICT for one of UPSERT_DIALECTS; the dialect module loads on first use"""
+    return importlib.import_module(f'sqlalchemy.dialects.{dialect}').insert(table)
+
+
+def greatest(column, incoming):
+    """SET expression keeping the larger of the stored and incoming values"""
+    if incoming is None:
+        # Only the fallback path passes plain values; a batch of errors has no score range
+        return column
+    return case((or_(column.is_(None), column < incoming), incoming), else_=column)
+
+
+def least(column, incoming):
+    """SET expression keeping the smaller of the stored and incoming values"""
+    if incoming is None:
+        return column
+    return case((or_(column.is_(None), column > incoming), incoming), else_=column)
+
+
+def atomic_upsert(db, table, key_columns, values, increments):
+    """Insert a row, or fold values into the existing one inside the database
+
+    increments(incoming) returns the SET clause; incoming is the upsert's
+    excluded row or, on the fallback path, the values dict itself. Either
+    way the merge happens in SQL, so concurrent writers never lose updates.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in UPSERT_DIALECTS:
+        statement = upsert_insert(dialect, table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key_columns],
+            set_=increments(statement.excluded)
+        )
+        db.session.execute(statement)
+        return
+    
+    # Portable fallback: update, insert if the row is new, and update again
+    # if a concurrent writer inserted it first
+    update = table.update().where(*[table.c[name] == values[name] for name in key_columns])
+    if db.session.execute(update.values(**increments(values))).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**values))
+    except IntegrityError:
+        db.session.execute(update.values(**increments(values)))
+
+
+class DomainStatsBatch:
+    """Score totals for several analyses of one domain, applied to DomainStats at once"""
+    
+    SCORE_COLUMNS = ('overall_score', 'title_score', 'description_score', 'og_score', 'twitter_score')
+    
+    def __init__(self):
+        self.count = 0
+        self.sums = {column: 0 for column in self.SCORE_COLUMNS}
+        self.best_score = None
+        self.worst_score = None
+        self.last_analysis = None
+    
+    def add(self, scores):
+        """Add one analysis, given as a dict of its score columns and analysis_date"""
+        self.count += 1
+        for column in self.SCORE_COLUMNS:
+            self.sums[column] += scores.get(column) or 0
+        
+        overall = scores.get('overall_score') or 0
+        if self.best_score is None or overall > self.best_score:
+            self.best_score = overall
+        if self.worst_score is None or overall < self.worst_score:
+            self.worst_score = overall
+        
+        analysis_date = scores.get('analysis_date') or datetime.utcnow()
+        if self.last_analysis is None or analysis_date > self.last_analysis:
+            self.last_analysis = analysis_date
+
+
+class RollupBatch:
+    """Counts, score sums and score range for one domain's time bucket"""
+    
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.sums = {column: 0 for column in DomainStatsBatch.SCORE_COLUMNS}
+        self.min_score = None
+        self.max_score = None
+    
+    def add(self, row):
+        """Add one SeoAnalysis row dict; failed analyses only count as errors"""
+        self.count += 1
+        if row.get('error_message'):
+            self.error_count += 1
+            return
+        
+        for column in DomainStatsBatch.SCORE_COLUMNS:
+            self.sums[column] += row.get(column) or 0
+        self._extend_range(row.get('overall_score') or 0, row.get('overall_score') or 0)
+    
+    def merge(self, rollup):
+        """Add a stored ScoreRollup bucket, e.g. an hourly one folded into its day"""
+        self.count += rollup.analysis_count
+        self.error_count += rollup.error_count
+        for column in DomainStatsBatch.SCORE_COLUMNS:
+            self.sums[column] += getattr(rollup, 'sum_' + column) or 0
+        if rollup.min_score is not None:
+            self._extend_range(rollup.min_score, rollup.max_score)
+    
+    def _extend_range(self, low, high):
+        if self.min_score is None or low < self.min_score:
+            self.min_score = low
+        if self.max_score is None or high > self.max_score:
+            self.max_score = high
 
 
 def init_models(db):
     """Initialize models with database instance"""
-    global SeoAnalysis, DomainStats
+    global SeoAnalysis, DomainStats, GlobalStats, ScoreRollup, Domain, PageUrl, TextValue
+    
+    class Domain(db.Model):
+        """Each distinct analyzed domain, stored once"""
+        __tablename__ = 'domains'
+        
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(255), unique=True, nullable=False)
+    
+    class PageUrl(db.Model):
+        """Each distinct analyzed URL, stored once and looked up by its hash"""
+        __tablename__ = 'page_urls'
+        
+        id = db.Column(db.Integer, primary_key=True)
+        url_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the URL
+        url = db.Column(db.String(2048), nullable=False)
+        domain_id = db.Column(db.Integer, db.ForeignKey('domains.id'), nullable=False, index=True)
+    
+    class TextValue(db.Model):
+        """Deduplicated strings that repeat across analyses (og:image, og:site_name, twitter:site)"""
+        __tablename__ = 'text_values'
+        
+        id = db.Column(db.Integer, primary_key=True)
+        value_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the value
+        value = db.Column(db.Text, nullable=False)
+    
+    def text_value(column):
+        """Read-only attribute resolving a text_values reference back to its string"""
+        return column_property(
+            select(TextValue.value).where(TextValue.id == column).correlate_except(TextValue).scalar_subquery()
+        )
     
     class SeoAnalysis(db.Model):
         """Store SEO analysis results for websites"""
         __tablename__ = 'seo_analyses'
+        __table_args__ = (
+            # Keyset pagination for history, newest first, overall and per domain
+            db.Index('ix_seo_analyses_date_id', 'analysis_date', 'id'),
+            db.Index('ix_seo_analyses_domain_id_date_id', 'domain_id', 'analysis_date', 'id'),
+            # Latest analysis of a page
+            db.Index('ix_seo_analyses_page_id_date', 'page_id', 'analysis_date'),
+        )
         
         id = db.Column(db.Integer, primary_key=True)
-        url = db.Column(db.String(2048), nullable=False, index=True)
-        domain = db.Column(db.String(255), nullable=False, index=True)
+        
+        # URL and domain live in page_urls/domains; url and domain are read through them
+        page_id = db.Column(db.Integer, db.ForeignKey('page_urls.id'), nullable=False)
+        domain_id = db.Column(db.Integer, db.ForeignKey('domains.id'), nullable=False)
+        url = column_property(
+            select(PageUrl.url).where(PageUrl.id == page_id).correlate_except(PageUrl).scalar_subquery()
+        )
+        domain = column_property(
+            select(Domain.name).where(Domain.id == domain_id).correlate_except(Domain).scalar_subquery()
+        )
         
         # Meta tag data
         title = db.Column(db.Text)
@@ -28,17 +200,20 @@ def init_models(db):
         # Open Graph data
         og_title = db.Column(db.Text)
         og_description = db.Column(db.Text)
-        og_image = db.Column(db.String(2048))
+        og_image_id = db.Column(db.Integer, db.ForeignKey('text_values.id'))
+        og_image = text_value(og_image_id)
         og_url = db.Column(db.String(2048))
         og_type = db.Column(db.String(100))
-        og_site_name = db.Column(db.String(255))
+        og_site_name_id = db.Column(db.Integer, db.ForeignKey('text_values.id'))
+        og_site_name = text_value(og_site_name_id)
         
         # Twitter Card data
         twitter_card = db.Column(db.String(100))
         twitter_title = db.Column(db.Text)
         twitter_description = db.Column(db.Text)
         twitter_image = db.Column(db.String(2048))
-        twitter_site = db.Column(db.String(255))
+        twitter_site_id = db.Column(db.Integer, db.ForeignKey('text_values.id'))
+        twitter_site = text_value(twitter_site_id)
         
         # SEO scores and validation
         overall_score = db.Column(db.Integer, default=0)
@@ -47,6 +222,12 @@ def init_models(db):
         og_score = db.Column(db.Integer, default=0)
         twitter_score = db.Column(db.Integer, default=0)
         
+        # Scoring rule inputs kept so analyses can be re-scored without refetching
+        h1_count = db.Column(db.Integer)
+        image_alt_missing = db.Column(db.Integer)
+        total_images = db.Column(db.Integer)
+        legacy_deduction = db.Column(db.Integer)  # og/twitter/content points deducted from rows stored before h1_count
+        
         # Validation flags
         has_title = db.Column(db.Boolean, default=False)
         has_description = db.Column(db.Boolean, default=False)
@@ -58,6 +239,8 @@ def init_models(db):
         analysis_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
         processing_time = db.Column(db.Float)  # Time taken to analyze in seconds
         error_message = db.Column(db.Text)  # Store any errors encountered
+        content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the fetched page bytes
+        stage_timings = db.Column(db.JSON)  # Milliseconds per stage (connect, ttfb, download, parse, ...)
         
         # Additional metadata
         canonical_url = db.Column(db.String(2048))
@@ -95,12 +278,12 @@ def init_models(db):
         total_analyses = db.Column(db.Integer, default=0)
         last_analysis = db.Column(db.DateTime)
         
-        # Average scores
-        avg_overall_score = db.Column(db.Float, default=0.0)
-        avg_title_score = db.Column(db.Float, default=0.0)
-        avg_description_score = db.Column(db.Float, default=0.0)
-        avg_og_score = db.Column(db.Float, default=0.0)
-        avg_twitter_score = db.Column(db.Float, default=0.0)
+        # Score sums; averages are derived from these on read
+        sum_overall_score = db.Column(db.BigInteger, default=0)
+        sum_title_score = db.Column(db.BigInteger, default=0)
+        sum_description_score = db.Column(db.BigInteger, default=0)
+        sum_og_score = db.Column(db.BigInteger, default=0)
+        sum_twitter_score = db.Column(db.BigInteger, default=0)
         
         # Best and worst scores
         best_score = db.Column(db.Integer, default=0)
@@ -112,27 +295,274 @@ def init_models(db):
         def __repr__(self):
             return f'<DomainStats {self.domain}>'
         
-        def update_stats(self, new_analysis):
-            """Update domain statistics with new analysis"""
-            self.total_analyses += 1
-            self.last_analysis = datetime.utcnow()
+        def _average(self, column):
+            if not self.total_analyses:
+                return 0.0
+            return (getattr(self, 'sum_' + column) or 0) / self.total_analyses
+        
+        @property
+        def avg_overall_score(self):
+            return self._average('overall_score')
+        
+        @property
+        def avg_title_score(self):
+            return self._average('title_score')
+        
+        @property
+        def avg_description_score(self):
+            return self._average('description_score')
+        
+        @property
+        def avg_og_score(self):
+            return self._average('og_score')
+        
+        @property
+        def avg_twitter_score(self):
+            return self._average('twitter_score')
+        
+        @classmethod
+        def apply_batch(cls, domain, batch):
+            """Add a batch of analyses to a domain's statistics in one atomic statement
+            
+            The increments happen in the database (x = x + :v), so concurrent
+            writers for the same domain never overwrite each other.
+            """
+            table = cls.__table__
+            now = datetime.utcnow()
+            values = {
+                'domain': domain,
+                'total_analyses': batch.count,
+                'last_analysis': batch.last_analysis,
+                'best_score': batch.best_score,
+                'worst_score': batch.worst_score,
+                'created_date': now,
+                'updated_date': now
+            }
+            for column in DomainStatsBatch.SCORE_COLUMNS:
+                values['sum_' + column] = batch.sums[column]
+            
+            atomic_upsert(db, table, ('domain',), values, cls._increments)
+        
+        @classmethod
+        def _increments(cls, incoming):
+            """SET clause adding incoming counts/sums onto the stored ones
             
-            # Update averages (simple running average)
-            total = self.total_analyses
-            self.avg_overall_score = ((self.avg_overall_score * (total - 1)) + new_analysis.overall_score) / total
-            self.avg_title_score = ((self.avg_title_score * (total - 1)) + new_analysis.title_score) / total
-            self.avg_description_score = ((self.avg_description_score * (total - 1)) + new_analysis.description_score) / total
-            self.avg_og_score = ((self.avg_og_score * (total - 1)) + new_analysis.og_score) / total
-            self.avg_twitter_score = ((self.avg_twitter_score * (total - 1)) + new_analysis.twitter_score) / total
+            incoming is the upsert's excluded row or the plain values dict.
+            """
+            table = cls.__table__
             
-            # Update best/worst scores
-            if new_analysis.overall_score > self.best_score:
-                self.best_score = new_analysis.overall_score
-            if new_analysis.overall_score < self.worst_score:
-                self.worst_score = new_analysis.overall_score
+            assignments = {
+                'total_analyses': func.coalesce(table.c.total_analyses, 0) + incoming['total_analyses'],
+                'last_analysis': greatest(table.c.last_analysis, incoming['last_analysis']),
+                'best_score': greatest(table.c.best_score, incoming['best_score']),
+                'worst_score': least(table.c.worst_score, incoming['worst_score']),
+                'updated_date': incoming['updated_date']
+            }
+            for column in DomainStatsBatch.SCORE_COLUMNS:
+                name = 'sum_' + column
+                assignments[name] = func.coalesce(table.c[name], 0) + incoming[name]
+            return assignments
+    
+    class GlobalStats(db.Model):
+        """Totals over every stored analysis, kept in one row so /stats reads it in O(1)"""
+        __tablename__ = 'global_stats'
+        
+        ROW_ID = 1
+        
+        id = db.Column(db.Integer, primary_key=True)
+        total_analyses = db.Column(db.BigInteger, nullable=False, default=0)
+        error_count = db.Column(db.BigInteger, nullable=False, default=0)
+        
+        # Sum and count of non-NULL overall_score values, i.e. AVG(overall_score)
+        score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+        scored_count = db.Column(db.BigInteger, nullable=False, default=0)
+        
+        updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+        
+        def __repr__(self):
+            return f'<GlobalStats {self.total_analyses}>'
+        
+        @property
+        def avg_score(self):
+            return self.score_sum / self.scored_count if self.scored_count else 0.0
+        
+        @classmethod
+        def current(cls):
+            """The stats row, or an empty one if it has not been created yet"""
+            return db.session.get(cls, cls.ROW_ID) or cls(total_analyses=0, error_count=0, score_sum=0,
+                                                            scored_count=0)
+        
+        @classmethod
+        def apply_rows(cls, rows):
+            """Add a batch of SeoAnalysis rows to the totals in one atomic UPDATE"""
+            # Rows without an overall_score get the column default of 0
+            scores = [row.get('overall_score', 0) for row in rows]
+            scores = [score for score in scores if score is not None]
+            
+            table = cls.__table__
+            db.session.execute(table.update().where(table.c.id == cls.ROW_ID).values(
+                total_analyses=table.c.total_analyses + len(rows),
+                error_count=table.c.error_count + sum(1 for row in rows if row['error_message']),
+                score_sum=table.c.score_sum + sum(scores),
+                scored_count=table.c.scored_count + len(scores),
+                updated_date=datetime.utcnow()
+            ))
+    
+    class ScoreRollup(db.Model):
+        """Per-domain score totals for one hour or one day"""
+        __tablename__ = 'score_rollups'
+        __table_args__ = (
+            db.UniqueConstraint('domain', 'granularity', 'bucket_start', name='uq_score_rollups_bucket'),
+            # Compaction walks the oldest hourly buckets
+            db.Index('ix_score_rollups_granularity_start', 'granularity', 'bucket_start'),
+        )
+        
+        id = db.Column(db.Integer, primary_key=True)
+        domain = db.Column(db.String(255), nullable=False)
+        granularity = db.Column(db.String(8), nullable=False)  # 'hour' or 'day'
+        bucket_start = db.Column(db.DateTime, nullable=False)
+        
+        # Analysis counts; scores only cover the successful ones
+        analysis_count = db.Column(db.Integer, nullable=False, default=0)
+        error_count = db.Column(db.Integer, nullable=False, default=0)
+        
+        sum_overall_score = db.Column(db.BigInteger, nullable=False, default=0)
+        sum_title_score = db.Column(db.BigInteger, nullable=False, default=0)
+        sum_description_score = db.Column(db.BigInteger, nullable=False, default=0)
+        sum_og_score = db.Column(db.BigInteger, nullable=False, default=0)
+        sum_twitter_score = db.Column(db.BigInteger, nullable=False, default=0)
+        
+        min_score = db.Column(db.Integer)
+        max_score = db.Column(db.Integer)
+        
+        def __repr__(self):
+            return f'<ScoreRollup {self.domain} {self.granularity} {self.bucket_start}>'
+        
+        @classmethod
+        def apply_batch(cls, domain, granularity, bucket_start, batch):
+            """Add a RollupBatch to one bucket in a single atomic statement"""
+            values = {
+                'domain': domain,
+                'granularity': granularity,
+                'bucket_start': bucket_start,
+                'analysis_count': batch.count,
+                'error_count': batch.error_count,
+                'min_score': batch.min_score,
+                'max_score': batch.max_score
+            }
+            for column in DomainStatsBatch.SCORE_COLUMNS:
+                values['sum_' + column] = batch.sums[column]
+            
+            atomic_upsert(db, cls.__table__, ('domain', 'granularity', 'bucket_start'), values, cls._increments)
+        
+        @classmethod
+        def _increments(cls, incoming):
+            table = cls.__table__
+            assignments = {
+                'analysis_count': table.c.analysis_count + incoming['analysis_count'],
+                'error_count': table.c.error_count + incoming['error_count'],
+                'min_score': least(table.c.min_score, incoming['min_score']),
+                'max_score': greatest(table.c.max_score, incoming['max_score'])
+            }
+            for column in DomainStatsBatch.SCORE_COLUMNS:
+                name = 'sum_' + column
+                assignments[name] = table.c[name] + incoming[name]
+            return assignments
     
     # Set global variables
     globals()['SeoAnalysis'] = SeoAnalysis
     globals()['DomainStats'] = DomainStats
+    globals()['GlobalStats'] = GlobalStats
+    globals()['ScoreRollup'] = ScoreRollup
+    globals()['Domain'] = Domain
+    globals()['PageUrl'] = PageUrl
+    globals()['TextValue'] = TextValue
+    
+    return SeoAnalysis, DomainStats, GlobalStats, ScoreRollup
+
+
+def upgrade_schema(db):
+    """Add columns and indexes introduced after the tables were first created
+
+    db.create_all() only creates missing tables, so existing databases are
+    brought up to date here. New columns must be nullable.
+    """
+    inspector = inspect(db.engine)
     
-    return SeoAnalysis, DomainStats
\ No newline at end of file
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def rebuild_domain_stats(db, only_missing=False):
+    """Recompute DomainStats counts, sums and best/worst from the stored analyses
+
+    With only_missing, just rows without score sums are rebuilt, i.e. rows
+    written before the sums replaced the running averages.
+    """
+    table = DomainStats.__table__
+    analyses = SeoAnalysis.__table__
+    domains = Domain.__table__
+    
+    def aggregate(expression):
+        return select(expression).select_from(
+            analyses.join(domains, domains.c.id == analyses.c.domain_id)
+        ).where(
+            domains.c.name == table.c.domain,
+            analyses.c.error_message.is_(None)
+        ).scalar_subquery()
+    
+    values = {
+        'total_analyses': aggregate(func.count()),
+        'last_analysis': aggregate(func.max(analyses.c.analysis_date)),
+        'best_score': aggregate(func.coalesce(func.max(analyses.c.overall_score), 0)),
+        'worst_score': aggregate(func.coalesce(func.min(analyses.c.overall_score), 100))
+    }
+    for column in DomainStatsBatch.SCORE_COLUMNS:
+        values['sum_' + column] = aggregate(func.coalesce(func.sum(analyses.c[column]), 0))
+    
+    statement = table.update().values(**values)
+    if only_missing:
+        statement = statement.where(table.c.sum_overall_score.is_(None))
+    
+    with db.engine.begin() as connection:
+        return connection.execute(statement).rowcount
+
+
+def rebuild_global_stats(db, only_missing=False):
+    """Recompute GlobalStats from seo_analyses in a single statement
+
+    With only_missing, nothing is done if the stats row already exists.
+    """
+    table = GlobalStats.__table__
+    analyses = SeoAnalysis.__table__
+    
+    with db.engine.begin() as connection:
+        exists = connection.execute(select(table.c.id).where(table.c.id == GlobalStats.ROW_ID)).first()
+        if exists and only_missing:
+            return False
+        if not exists:
+            connection.execute(table.insert().values(id=GlobalStats.ROW_ID, total_analyses=0, error_count=0,
+                                                     score_sum=0, scored_count=0))
+        
+        def aggregate(expression):
+            return select(expression).select_from(analyses).scalar_subquery()
+        
+        connection.execute(table.update().where(table.c.id == GlobalStats.ROW_ID).values(
+            total_analyses=aggregate(func.count()),
+            error_count=aggregate(func.count(analyses.c.error_message)),
+            score_sum=aggregate(func.coalesce(func.sum(analyses.c.overall_score), 0)),
+            scored_count=aggregate(func.count(analyses.c.overall_score)),
+            updated_date=datetime.utcnow()
+        ))
+    return True
@@ -0,0 +1,275 @@
+import csv
+import gzip
+import json
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import instrumentation
+
+
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+WARC_EXTENSIONS = ('.warc', '.warc.gz')
+
+# Columns of the CSV output; JSONL lines carry the full result instead
+CSV_COLUMNS = (
+    'source', 'url', 'error', 'overall_score', 'title', 'title_length', 'description', 'description_length',
+    'h1_count', 'image_alt_missing', 'total_images', 'og_title', 'og_image', 'twitter_card', 'canonical',
+    'viewport', 'content_hash', 'processing_time'
+)
+
+# A saved page: where it came from (file path, or WARC path#record), its URL and its bytes
+Source = Tuple[str, str, bytes]
+
+
+def iter_sources(paths: Iterable[str], base_url: Optional[str] = None) -> Iterator[Source]:
+    """Pages in HTML files and WARC archives, walking directories in a stable order
+
+    HTML files get base_url plus their path relative to the directory given
+    (or a file:// URL without base_url); WARC records keep their target URI.
+    The order only depends on the file names, which is what lets a run resume.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    file_path = os.path.join(directory, filename)
+                    if filename.lower().endswith(WARC_EXTENSIONS):
+                        yield from iter_warc_records(file_path)
+                    elif filename.lower().endswith(HTML_EXTENSIONS):
+                        yield _read_html_file(file_path, os.path.relpath(file_path, path), base_url)
+        elif path.lower().endswith(WARC_EXTENSIONS):
+            yield from iter_warc_records(path)
+        else:
+            yield _read_html_file(path, os.path.basename(path), base_url)
+
+
+def _read_html_file(path: str, relative: str, base_url: Optional[str]) -> Source:
+    if base_url:
+        url = base_url.rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+    else:
+        url = Path(path).resolve().as_uri()
+    with open(path, 'rb') as handle:
+        return path, url, handle.read()
+
+
+def iter_warc_records(path: str) -> Iterator[Source]:
+    """Successful HTML responses stored in a WARC file, one record in memory at a time
+
+    response records hold the HTTP message, which is de-chunked and
+    decompressed; resource records hold the page itself. Other record types
+    and non-HTML or non-200 responses are skipped.
+    """
+    opener = gzip.open if path.lower().endswith('.gz') else open
+    with opener(path, 'rb') as handle:
+        number = 0
+        while True:
+            headers = _read_warc_headers(handle, path)
+            if headers is None:
+                return
+            block = handle.read(int(headers.get('content-length', '0')))
+            number += 1
+
+            record_type = headers.get('warc-type')
+            url = headers.get('warc-target-uri', '').strip('<>')
+            if record_type == 'response':
+                body = _http_html_body(block)
+            elif record_type == 'resource' and 'html' in headers.get('content-type', ''):
+                body = block
+            else:
+                body = None
+            if body is not None and url:
+                yield f'{path}#{number}', url, body
+
+
+def _read_warc_headers(handle: BinaryIO, path: str) -> Optional[Dict[str, str]]:
+    """Header fields of the next WARC record, lowercased, or None at the end of the file"""
+    line = handle.readline()
+    # Records are separated by blank lines
+    while line in (b'\r\n', b'\n'):
+        line = handle.readline()
+    if not line:
+        return None
+    if not line.startswith(b'WARC/'):
+        raise ValueError(f'{path}: expected a WARC record, found {line[:40]!r}')
+
+    headers = {}
+    for line in iter(handle.readline, b''):
+        if not line.strip():
+            break
+        name, _, value = line.decode('utf-8', 'replace').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _http_html_body(message: bytes) -> Optional[bytes]:
+    """Body of a stored HTTP response if it is a 200 with HTML content, decoded"""
+    head, _, body = message.partition(b'\r\n\r\n')
+    lines = head.decode('iso-8859-1').split('\r\n')
+    status = lines[0].split(None, 2)
+    if len(status) < 2 or status[1] != '200':
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    content_type = headers.get('content-type', '')
+    if content_type and 'html' not in content_type:
+        return None
+
+    try:
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            body = _dechunk(body)
+        encoding = headers.get('content-encoding', '')
+        if encoding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body, -zlib.MAX_WBITS if body[:1] != b'\x78' else zlib.MAX_WBITS)
+    except (ValueError, OSError, zlib.error):
+        # Stored exactly as received, which is what the analyzer would have seen
+        pass
+    return body
+
+
+def _dechunk(body: bytes) -> bytes:
+    chunks, position = [], 0
+    while True:
+        end = body.index(b'\r\n', position)
+        size = int(body[position:end].split(b';', 1)[0], 16)
+        if size == 0:
+            return b''.join(chunks)
+        chunks.append(body[end + 2:end + 2 + size])
+        position = end + 2 + size + 2
+
+
+def analyze_sources(sources: Iterable[Source], analyzer, threads: int = 4, skip: int = 0,
+                    last_skipped: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Analyze saved pages, yielding results in input order
+
+    Pages are parsed on threads calling the analyzer's usual content path,
+    so its parse process pool (if any) spreads them over cores. At most
+    threads * 4 pages are held at once however many sources there are.
+    The first skip sources are passed over without being parsed; when
+    resuming, last_skipped is the source the previous run ended with, and
+    a mismatch means the inputs changed in between.
+    """
+    window = max(1, threads) * 4
+    pending: Deque = deque()
+
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='seo-offline') as pool:
+        for index, (key, url, content) in enumerate(sources):
+            if index < skip:
+                if index == skip - 1 and last_skipped is not None and key != last_skipped:
+                    raise ValueError(f'Cannot resume: result {skip} was for {last_skipped}, but that input is now {key}')
+                continue
+            pending.append(pool.submit(_analyze_one, analyzer, key, url, content))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _analyze_one(analyzer, key: str, url: str, content: bytes) -> Dict[str, Any]:
+    started = time.perf_counter()
+    timer = analyzer._new_timer()
+    try:
+        results = instrumentation.run_with(timer, analyzer._analyze_content, content, url, {})
+    except Exception as e:
+        results = {'error': analyzer._describe_error(e), 'url': url}
+    analyzer._finish_timer(results, timer)
+    # Previews are derived on demand, and there was no fetch
+    results.pop('previews', None)
+    results.pop('fetch', None)
+    results['source'] = key
+    results['processing_time'] = time.perf_counter() - started
+    return results
+
+
+def csv_row(results: Dict[str, Any]) -> List[Any]:
+    """Flat CSV values of a result; newlines become spaces so every row is one line"""
+    meta_data = results.get('meta_data') or {}
+    values = {
+        'source': results['source'],
+        'url': results['url'],
+        'error': results.get('error') or '',
+        'overall_score': (results.get('validation') or {}).get('overall_score', ''),
+        'title_length': len(meta_data['title']) if meta_data else '',
+        'description_length': len(meta_data['description']) if meta_data else '',
+        'content_hash': results.get('content_hash', ''),
+        'processing_time': round(results['processing_time'], 6)
+    }
+    for column in CSV_COLUMNS:
+        if column not in values:
+            values[column] = meta_data.get(column, '')
+    return [' '.join(str(values[column]).splitlines()) for column in CSV_COLUMNS]
+
+
+class ResultWriter:
+    """Streams results to a JSONL or CSV file, one line per result
+
+    With resume, an existing file is kept: a partly written last line is cut
+    off and completed counts the results already in it, which are the first
+    sources in iteration order.
+    """
+
+    def __init__(self, path: str, output_format: str = 'jsonl', resume: bool = False):
+        if output_format not in ('jsonl', 'csv'):
+            raise ValueError(f'Unknown output format: {output_format}')
+        self.path = path
+        self.output_format = output_format
+        self.completed = 0
+        self.last_source: Optional[str] = None
+
+        if resume and os.path.exists(path):
+            self.completed = self._truncate_to_complete_lines()
+        self._handle = open(path, 'a' if self.completed else 'w', encoding='utf-8', newline='')
+        self._csv = csv.writer(self._handle, lineterminator='\n') if output_format == 'csv' else None
+        if self._csv is not None and not self.completed:
+            self._csv.writerow(CSV_COLUMNS)
+
+    def write(self, results: Dict[str, Any]) -> None:
+        if self._csv is not None:
+            self._csv.writerow(csv_row(results))
+        else:
+            self._handle.write(json.dumps(results, default=dict) + '\n')
+
+    def flush(self) -> None:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def _truncate_to_complete_lines(self) -> int:
+        """Drop a trailing partial line; returns the number of results in the file"""
+        lines, end, offset, tail, last_line = 0, 0, 0, b'', b''
+        with open(self.path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b''):
+                newline = chunk.rfind(b'\n')
+                if newline < 0:
+                    tail += chunk
+                else:
+                    lines += chunk.count(b'\n')
+                    last_line = (tail + chunk[:newline]).rsplit(b'\n', 1)[-1]
+                    tail = chunk[newline + 1:]
+                    end = offset + newline + 1
+                offset += len(chunk)
+        with open(self.path, 'r+b') as handle:
+            handle.truncate(end)
+
+        if self.output_format == 'csv':
+            # The header line is not a result; without it the file starts over
+            if lines <= 1:
+                return 0
+            self.last_source = next(csv.reader([last_line.decode('utf-8')]))[0]
+            return lines - 1
+        if lines:
+            self.last_source = json.loads(last_line)['source']
+        return lines
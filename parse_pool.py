@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import instrumentation
+
+
+START_METHOD = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Analyzer owned by each worker process, built once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(parser_backend: str, rules: List[Dict[str, Any]], max_headings: Optional[int]) -> None:
+    """Build the worker's analyzer; imports and parser setup happen once per process"""
+    global _worker_analyzer
+    from seo_analyzer import SEOAnalyzer
+    from seo_rules import RuleSet
+    _worker_analyzer = SEOAnalyzer(parser_backend=parser_backend, rules=RuleSet(rules), max_headings=max_headings)
+
+
+def _ready() -> int:
+    # Long enough that an idle worker takes the next one, so every worker gets to answer
+    time.sleep(0.01)
+    return os.getpid()
+
+
+def _derive(content: bytes) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, float]]:
+    """meta_data, validation and stage seconds for one page, computed in the worker"""
+    timer = instrumentation.StageTimer()
+    meta_data, validation = instrumentation.run_with(timer, _worker_analyzer._derive, content)
+    return meta_data, validation, timer.stages
+
+
+class ParsePool:
+    """Warm worker processes for the CPU-bound parse/extract/validate stages
+
+    Threads parsing pages in one process contend on the GIL, so a threaded
+    worker never uses more than one core. derive() ships the raw page bytes
+    to a worker process and gets back only the compact meta_data and
+    validation. start() launches every worker up front, so no request pays
+    for their setup; call it at startup, before other threads exist, since
+    the workers are forked where fork is available (spawn would re-import
+    the __main__ script, i.e. the whole app, in every worker). A pool
+    inherited through fork, or broken by a crashed worker, is replaced;
+    derive() returns None meanwhile, and the caller parses in its own
+    thread. Errors raised while parsing a page are the caller's, as they
+    would be in-thread, and leave the pool running.
+    """
+
+    def __init__(self, workers: int, parser_backend: str, rules: List[Dict[str, Any]],
+                 max_headings: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.initargs = (parser_backend, rules, max_headings)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._counters = {'tasks': 0, 'fallbacks': 0, 'restarts': 0}
+
+    def start(self) -> 'ParsePool':
+        """Launch every worker and wait until each has finished its imports"""
+        executor = self._get_executor()
+        # A worker only takes tasks once it is initialized, so wait for an answer from each
+        ready = set()
+        while len(ready) < self.workers:
+            ready.update(future.result() for future in [executor.submit(_ready) for _ in range(self.workers)])
+        return self
+
+    def derive(self, content: bytes) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """meta_data and validation for page content, or None if the pool is unavailable"""
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_derive, content)
+        except BrokenProcessPool:
+            self._restart(executor)
+            self._count('fallbacks')
+            return None
+        except RuntimeError:
+            # Shut down by close() or another thread's restart since _get_executor()
+            self._count('fallbacks')
+            return None
+
+        # Anything else result() raises came from parsing this page
+        try:
+            meta_data, validation, stages = future.result()
+        except BrokenProcessPool:
+            self._restart(executor)
+            self._count('fallbacks')
+            return None
+        except CancelledError:
+            self._count('fallbacks')
+            return None
+
+        timer = instrumentation.current()
+        for stage, seconds in stages.items():
+            timer.add(stage, seconds)
+        self._count('tasks')
+        return meta_data, validation
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counters, workers=self.workers, running=self._executor is not None)
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """This process' executor; a pool inherited through fork cannot be used"""
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._pid != pid:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                    initializer=_init_worker,
+                    initargs=self.initargs
+                )
+                self._pid = pid
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Drop a broken executor; the next derive() starts a fresh one"""
+        with self._lock:
+            # Every task of a broken pool fails; only the first to notice replaces it
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self._counters['restarts'] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,93 @@
+"""Parse throughput with the stages in request threads versus in a ParsePool
+
+Runs parse/extract/validate for a fixed corpus of pages from --threads
+threads, the way threaded gunicorn workers do, first in the threads
+themselves (in-thread, the SEO_PARSE_PROCESSES=0 default) and then
+through a ParsePool of 1, 2, ... --max-workers processes. Prints pages/s,
+per-page latency and the speedup over in-thread for each, as JSON:
+
+    python parse_pool_benchmark.py --pages 400 --threads 8 [--max-workers 8] [--page typical]
+
+The pool can only beat in-thread parsing with spare cores: on one core it
+adds the cost of pickling each page and its results. --max-workers
+defaults to the number of cores.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fixture_server import PAGES
+from load_benchmark import summarize_latencies
+from parse_pool import ParsePool
+from seo_analyzer import SEOAnalyzer
+from seo_rules import RuleSet
+
+
+def corpus(page: Optional[str], count: int) -> List[bytes]:
+    """count distinct page bodies, cycling through PAGES unless one page is given"""
+    names = [page] if page else list(PAGES)
+    bodies = {name: PAGES[name]() for name in names}
+    return [bodies[names[i % len(names)]].replace('</body>', f'<p>{i}</p></body>').encode('utf-8')
+            for i in range(count)]
+
+
+def run_mode(derive: Callable[[bytes], Any], pages: List[bytes], threads: int) -> Dict[str, Any]:
+    def timed(content: bytes) -> float:
+        started = time.perf_counter()
+        derive(content)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        samples = list(pool.map(timed, pages))
+    duration = time.perf_counter() - started
+    return {
+        'pages_per_s': round(len(pages) / duration, 1),
+        'latency_ms': summarize_latencies(samples)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=400, help='Pages parsed per mode')
+    parser.add_argument('--threads', type=int, default=8, help='Request threads parsing at once')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='Largest pool size swept')
+    parser.add_argument('--page', choices=list(PAGES), help='Parse only this fixture page; default all of them')
+    parser.add_argument('--parser-backend', default='single_pass', help='Parser backend for every mode')
+    args = parser.parse_args()
+
+    pages = corpus(args.page, args.pages)
+    analyzer = SEOAnalyzer(parser_backend=args.parser_backend)
+    report: Dict[str, Any] = {
+        'pages': args.pages,
+        'page_bytes': sum(len(content) for content in pages),
+        'threads': args.threads,
+        'cpu_count': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'modes': {'in-thread': run_mode(analyzer._derive, pages, args.threads)}
+    }
+
+    baseline = report['modes']['in-thread']['pages_per_s']
+    best: Tuple[str, float] = ('in-thread', baseline)
+    for workers in range(1, max(1, args.max_workers) + 1):
+        pool = ParsePool(workers, args.parser_backend, RuleSet().rules).start()
+        try:
+            mode = run_mode(pool.derive, pages, args.threads)
+            mode['fallbacks'] = pool.stats()['fallbacks']
+        finally:
+            pool.close()
+        mode['speedup'] = round(mode['pages_per_s'] / baseline, 2) if baseline else None
+        report['modes'][f'pool-{workers}'] = mode
+        if mode['pages_per_s'] > best[1]:
+            best = (f'pool-{workers}', mode['pages_per_s'])
+
+    report['fastest'] = best[0]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
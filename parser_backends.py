@@ -0,0 +1,321 @@
+import logging
+import re
+from html.entities import html5 as HTML5_ENTITIES
+from typing import Any, Callable, Dict, List
+
+from meta_extractor import (
+    PRESERVE_WHITESPACE_TAGS,
+    STRING_CONTAINER_TAGS,
+    apply_meta_tag,
+    collapse_whitespace,
+    decode_markup,
+    empty_meta_data,
+    extract_meta_tags,
+    is_canonical_link
+)
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional
+    LexborHTMLParser = None
+
+
+logger = logging.getLogger(__name__)
+
+# What 'auto' means: the stdlib single-pass extractor, whose meta_data matches
+# html.parser on any markup. lxml and selectolax build HTML5-style trees, so
+# they hand pages with constructs those trees disagree on to it (see
+# html5_divergent) and are opt-in
+AUTO_BACKEND = 'single_pass'
+
+# Fastest first; 'fastest' picks the first one that is installed
+FASTEST_BACKEND_ORDER = ('selectolax', 'lxml', 'single_pass')
+
+# Backend that needs nothing beyond the standard library
+FALLBACK_BACKEND = 'single_pass'
+
+# BeautifulSoup with html.parser; SEOAnalyzer runs this one itself
+SOUP_BACKEND = 'html.parser'
+
+# Script and style bodies, which both parsers read as raw text up to the end tag
+_RAW_TEXT = re.compile(r'(<(script|style)\b[^>]*>).*?(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+
+# Markup HTML5 tree construction reads differently from html.parser wherever it
+# appears: CDATA, raw-text and template elements, <image>, non-empty iframes,
+# and a '<' or '</' that does not start a tag
+_DIVERGENT_MARKUP = re.compile(
+    r'<(?:!\[CDATA\[|(?![A-Za-z!/?])|/(?![A-Za-z])'
+    r'|(?:template|textarea|plaintext|xmp|noembed|noframes|frameset|image|isindex)\b'
+    r'|iframe\b[^>]*>(?!\s*</iframe))',
+    re.IGNORECASE
+)
+
+_TITLE_START = re.compile(r'<title\b', re.IGNORECASE)
+_TITLE = re.compile(r'<title\b[^>]*>[^<]*</title\s*>', re.IGNORECASE)
+
+# Inline SVG and MathML; HTML5 parses their content as foreign elements
+_FOREIGN = re.compile(r'<(svg|math)\b.*?(</\1\s*>|$)', re.IGNORECASE | re.DOTALL)
+# Start tags that break out of foreign content, or that HTML5 parses differently inside it
+_FOREIGN_BREAKOUT = re.compile(
+    r'<(?:b|big|blockquote|body|br|center|code|dd|div|dl|dt|em|embed|h[1-6]|head|hr|i|img|li|listing|menu|meta'
+    r'|nobr|ol|p|pre|ruby|s|small|span|strong|strike|sub|sup|table|tt|u|ul|var|font|style|script|title)\b',
+    re.IGNORECASE
+)
+
+_TAG = re.compile(r'<(/?)([A-Za-z][^\s/>]*)')
+_HEADING_TAG = re.compile(r'<(/?)(h[1-6])(?=[\s/>])', re.IGNORECASE)
+# Tags a heading may contain for both parsers to end it in the same place
+_HEADING_INLINE = {
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'kbd', 'mark', 'q', 's',
+    'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'script', 'style'
+}
+_HEADING_VOID = {'br', 'img', 'wbr'}
+
+_REFERENCE = re.compile(r'&(#?)([0-9A-Za-z]*)(;?)')
+_NUMERIC_REFERENCE = re.compile(r'[0-9]+|[xX][0-9a-fA-F]+')
+# Named references HTML5 decodes without a semicolon, even as the prefix of a longer word
+_LEGACY_REFERENCE = re.compile('|'.join(sorted(
+    (name for name in HTML5_ENTITIES if not name.endswith(';')), key=len, reverse=True
+)))
+
+
+def _unsafe_reference(match) -> bool:
+    """Whether html.parser and HTML5 decode this character reference differently"""
+    numeric, name, semicolon = match.groups()
+    if numeric:
+        return not (semicolon and _NUMERIC_REFERENCE.fullmatch(name))
+    if not name:
+        return False
+    if semicolon:
+        return name + ';' not in HTML5_ENTITIES
+    return _LEGACY_REFERENCE.match(name) is not None
+
+
+def _unbalanced_headings(markup: str) -> bool:
+    """Whether a heading is left open, nested, or holds anything but balanced inline markup"""
+    position = 0
+    while True:
+        start = _HEADING_TAG.search(markup, position)
+        if start is None:
+            return False
+        if start.group(1):
+            return True
+
+        heading, inline = start.group(2).lower(), []
+        for match in _TAG.finditer(markup, start.end()):
+            closing, tag = match.group(1), match.group(2).lower()
+            if tag in _HEADING_VOID and not closing:
+                continue
+            if tag == heading and closing and not inline:
+                position = match.end()
+                break
+            if tag not in _HEADING_INLINE:
+                return True
+            if not closing:
+                inline.append(tag)
+            elif inline and inline[-1] == tag:
+                inline.pop()
+            else:
+                return True
+        else:
+            return True
+
+
+def html5_divergent(markup: str) -> bool:
+    """Whether an HTML5 parser may read this page differently from html.parser
+
+    A conservative scan of the raw markup for the constructs the two
+    disagree on: unclosed titles or markup inside them, raw-text and
+    template elements, headings that are not closed cleanly, HTML inside
+    SVG or MathML, references html.parser leaves undecoded, stray '<' and
+    pages cut off inside a tag. The fast backends hand such pages to the
+    single-pass extractor, so their meta_data always matches html.parser's.
+    """
+    markup = _RAW_TEXT.sub(r'\1\3', markup)
+
+    # A page cut off inside a tag ends in different places for the two
+    if _DIVERGENT_MARKUP.search(markup) or markup.rfind('<') > markup.rfind('>'):
+        return True
+    if any(not _TITLE.match(markup, match.start()) for match in _TITLE_START.finditer(markup)):
+        return True
+    if any(not match.group(2) or _FOREIGN_BREAKOUT.search(match.group(0))
+           for match in _FOREIGN.finditer(markup)):
+        return True
+    if _unbalanced_headings(markup):
+        return True
+    return any(_unsafe_reference(match) for match in _REFERENCE.finditer(markup))
+
+
+def _lxml_text(element) -> str:
+    """get_text() equivalent for an lxml element
+
+    Walks with an explicit stack, so deeply nested markup cannot exhaust
+    the recursion limit.
+    """
+    parts = []
+    # Elements still to visit, and tails to emit once their element is done, in reverse order
+    stack = [(element, False)]
+
+    while stack:
+        item, preserve = stack.pop()
+        if isinstance(item, str):
+            parts.append(item if preserve else collapse_whitespace(item))
+            continue
+
+        preserve = preserve or item.tag in PRESERVE_WHITESPACE_TAGS
+        if item.text:
+            parts.append(item.text if preserve else collapse_whitespace(item.text))
+
+        for child in reversed(item):
+            if child.tail:
+                stack.append((child.tail, preserve))
+            # Comments and processing instructions have a callable tag
+            if isinstance(child.tag, str) and child.tag not in STRING_CONTAINER_TAGS:
+                stack.append((child, preserve))
+
+    return ''.join(parts)
+
+
+def extract_with_lxml(content: bytes) -> Dict[str, Any]:
+    """Extract meta_data using lxml's libxml2 HTML parser"""
+    text = decode_markup(content)
+    if html5_divergent(text):
+        return extract_meta_tags(text)
+
+    markup = text.encode('utf-8')
+    parser = etree.HTMLParser(encoding='utf-8')
+    root = etree.fromstring(markup, parser)
+    if any(error.type_name == 'ERR_RESOURCE_LIMIT' for error in parser.error_log):
+        # libxml2 stops building the tree past 256 levels of nesting and drops the rest
+        return extract_meta_tags(markup)
+
+    meta_data = empty_meta_data()
+    if root is None:
+        return meta_data
+
+    title_found = canonical_found = False
+    for element in root.iter('title', 'meta', 'link', 'h1', 'h2', 'img'):
+        tag = element.tag
+        attributes = {key: value or '' for key, value in element.attrib.items()}
+
+        if tag == 'meta':
+            apply_meta_tag(meta_data, attributes)
+        elif tag == 'title':
+            if not title_found:
+                meta_data['title'] = _lxml_text(element).strip()
+                title_found = True
+        elif tag == 'link':
+            if not canonical_found and is_canonical_link(attributes):
+                meta_data['canonical'] = attributes.get('href', '')
+                canonical_found = True
+        elif tag == 'img':
+            meta_data['total_images'] += 1
+            if not attributes.get('alt'):
+                meta_data['image_alt_missing'] += 1
+        else:
+            meta_data[tag + '_tags'].append(_lxml_text(element).strip())
+
+    return meta_data
+
+
+def _lexbor_text(node) -> str:
+    """get_text() equivalent for a selectolax node, walked with an explicit stack"""
+    parts = []
+    stack = [(node, False)]
+
+    while stack:
+        item, preserve = stack.pop()
+        if item.tag == '-text':
+            text = item.text_content or ''
+            parts.append(text if preserve else collapse_whitespace(text))
+            continue
+
+        preserve = preserve or item.tag in PRESERVE_WHITESPACE_TAGS
+        children = [
+            child for child in item.iter(include_text=True)
+            # Comments and processing instructions have a tag starting with '-', or none
+            if child.tag == '-text' or (child.tag and not child.tag.startswith('-')
+                                        and child.tag not in STRING_CONTAINER_TAGS)
+        ]
+        stack.extend((child, preserve) for child in reversed(children))
+
+    return ''.join(parts)
+
+
+def extract_with_selectolax(content: bytes) -> Dict[str, Any]:
+    """Extract meta_data using selectolax's lexbor HTML5 parser"""
+    markup = decode_markup(content)
+    if html5_divergent(markup):
+        return extract_meta_tags(markup)
+
+    tree = LexborHTMLParser(markup)
+    meta_data = empty_meta_data()
+
+    title_found = canonical_found = False
+    for node in tree.css('title, meta, link, h1, h2, img'):
+        tag = node.tag
+        attributes = {key: value or '' for key, value in node.attributes.items()}
+
+        if tag == 'meta':
+            apply_meta_tag(meta_data, attributes)
+        elif tag == 'title':
+            if not title_found:
+                meta_data['title'] = _lexbor_text(node).strip()
+                title_found = True
+        elif tag == 'link':
+            if not canonical_found and is_canonical_link(attributes):
+                meta_data['canonical'] = attributes.get('href', '')
+                canonical_found = True
+        elif tag == 'img':
+            meta_data['total_images'] += 1
+            if not attributes.get('alt'):
+                meta_data['image_alt_missing'] += 1
+        else:
+            meta_data[tag + '_tags'].append(_lexbor_text(node).strip())
+
+    return meta_data
+
+
+# Backends that turn raw page bytes into meta_data directly
+BACKENDS: Dict[str, Callable[[bytes], Dict[str, Any]]] = {
+    'single_pass': extract_meta_tags,
+    'lxml': extract_with_lxml,
+    'selectolax': extract_with_selectolax
+}
+
+_BACKEND_AVAILABLE = {
+    SOUP_BACKEND: True,
+    'single_pass': True,
+    'lxml': etree is not None,
+    'selectolax': LexborHTMLParser is not None
+}
+
+
+def available_backends() -> List[str]:
+    """List the parser backends that can run in this environment"""
+    return [name for name, available in _BACKEND_AVAILABLE.items() if available]
+
+
+def resolve_backend(name: str = 'auto') -> str:
+    """Turn a configured backend name into one that is installed"""
+    if name == 'auto':
+        return AUTO_BACKEND
+
+    if name == 'fastest':
+        for candidate in FASTEST_BACKEND_ORDER:
+            if _BACKEND_AVAILABLE[candidate]:
+                return candidate
+
+    if name not in _BACKEND_AVAILABLE:
+        raise ValueError(f'Unknown parser backend: {name}')
+
+    if not _BACKEND_AVAILABLE[name]:
+        logger.warning(f"Parser backend '{name}' is not installed, using '{FALLBACK_BACKEND}'")
+        return FALLBACK_BACKEND
+
+    return name
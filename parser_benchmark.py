@@ -0,0 +1,71 @@
+"""Parse throughput of each installed parser backend on the fixture pages
+
+Times SEOAnalyzer._parse (parse plus meta_data extraction) for every
+backend, including the original BeautifulSoup path ('html.parser'), and
+prints documents and megabytes per second as JSON:
+
+    python parser_benchmark.py --seconds 2 [--pages huge,typical] [--file page.html]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+import parser_backends
+from fixture_server import PAGES
+from seo_analyzer import SEOAnalyzer
+
+
+def measure(analyzer: SEOAnalyzer, content: bytes, seconds: float) -> Dict[str, Any]:
+    """Parse content repeatedly for about the given time"""
+    runs = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while runs == 0 or elapsed < seconds:
+        analyzer._parse(content)
+        runs += 1
+        elapsed = time.perf_counter() - started
+    return {
+        'docs_per_s': round(runs / elapsed, 2),
+        'mb_per_s': round(runs * len(content) / elapsed / (1 << 20), 2),
+        'ms_per_doc': round(elapsed / runs * 1000, 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent per backend and page')
+    parser.add_argument('--pages', default=','.join(PAGES), help=f'Fixture pages, from {", ".join(PAGES)}')
+    parser.add_argument('--file', action='append', default=[], help='Also benchmark this saved HTML file (repeatable)')
+    args = parser.parse_args()
+
+    documents: Dict[str, bytes] = {}
+    for page in [page.strip() for page in args.pages.split(',') if page.strip()]:
+        if page not in PAGES:
+            parser.error(f'Unknown page: {page}')
+        documents[page] = PAGES[page]().encode('utf-8')
+    for path in args.file:
+        with open(path, 'rb') as handle:
+            documents[os.path.basename(path)] = handle.read()
+
+    backends = parser_backends.available_backends()
+    report: Dict[str, Any] = {
+        'python': sys.version.split()[0],
+        'backends': backends,
+        'auto': parser_backends.resolve_backend('auto'),
+        'pages': {}
+    }
+    for name, content in documents.items():
+        results = {backend: measure(SEOAnalyzer(parser_backend=backend), content, args.seconds) for backend in backends}
+        baseline = results[parser_backends.SOUP_BACKEND]['docs_per_s']
+        for result in results.values():
+            result['vs_html_parser'] = round(result['docs_per_s'] / baseline, 2)
+        report['pages'][name] = {'bytes': len(content), 'backends': results}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Buffer analysis rows and write them to the database in batches
+
+    Rows are queued by request threads and flushed by one background thread
+    per process, either when batch_size rows are waiting or flush_interval
+    seconds after the first row of a batch arrived. The queue is bounded:
+    when it is full the caller writes its row synchronously instead. Pending
+    rows are flushed when the process exits.
+    """
+
+    def __init__(self, flush_batch: Callable[[List[Dict[str, Any]]], None], max_queue: int = 10000,
+                 batch_size: int = 200, flush_interval: float = 1.0):
+        self.flush_batch = flush_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'batches': 0,
+            'failed': 0,
+            'sync_fallbacks': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0
+        }
+        atexit.register(self.shutdown)
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Queue a row, writing it synchronously if the buffer is full"""
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._record(sync_fallbacks=1)
+            self._flush([row])
+            return
+
+        self._record(submitted=1)
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Flush everything still queued and stop the writer thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._thread_pid != os.getpid():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth, throughput and flush latency"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats.pop('batches')
+        total_flush = stats.pop('total_flush_seconds')
+        stats['batches'] = batches
+        stats['avg_flush_seconds'] = round(total_flush / batches, 4) if batches else 0.0
+        stats['queue_depth'] = self._queue.qsize()
+        # Queued plus taken off the queue into a batch that has not been written yet
+        stats['pending'] = stats['submitted'] + stats['sync_fallbacks'] - stats['written'] - stats['failed']
+        stats['max_queue'] = self.max_queue
+        stats['batch_size'] = self.batch_size
+        stats['flush_interval'] = self.flush_interval
+        return stats
+
+    def _ensure_started(self) -> None:
+        """Start the writer thread in this process, e.g. after a gunicorn fork"""
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._thread is None or self._thread_pid != pid or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='seo-write-behind', daemon=True)
+                self._thread_pid = pid
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Collect rows into batches and flush them until told to stop"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # Drain anything that arrived after the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            self._flush(leftover[start:start + self.batch_size])
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            self.flush_batch(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} analyses to database: {str(e)}")
+            self._record(failed=len(batch))
+            return
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['last_flush_seconds'] = round(elapsed, 4)
+            self._stats['max_flush_seconds'] = round(max(self._stats['max_flush_seconds'], elapsed), 4)
+            self._stats['total_flush_seconds'] += elapsed
+
+    def _record(self, **increments: int) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self._stats[key] += value
@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+# Responses that mean the host wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+# Seconds between checks while a coroutine waits for a host's in-flight slot
+ASYNC_POLL_INTERVAL = 0.01
+
+
+class PolitenessTimeout(Exception):
+    """Raised when a host will not accept another request within the allowed wait"""
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (now if now is not None else time.time()))
+
+
+class HostState:
+    """Token bucket, in-flight count, penalty and wait counters for one host"""
+
+    __slots__ = ('tokens', 'refilled_at', 'in_flight', 'blocked_until', 'backoff', 'requests', 'throttled',
+                 'waits', 'total_wait', 'max_wait', 'waiting')
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.refilled_at = now
+        self.in_flight = 0
+        # Monotonic time before which no request may start (Retry-After or backoff)
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waiting = 0
+
+    def is_idle(self, burst: float, rate: float, now: float) -> bool:
+        """No requests running or waiting, no penalty and a full bucket, so forgetting it changes nothing"""
+        refilled = rate <= 0 or self.tokens + (now - self.refilled_at) * rate >= burst
+        return not self.in_flight and not self.waiting and self.blocked_until <= now and refilled
+
+
+class HostScheduler:
+    """Per-host politeness for outbound fetches
+
+    Before each request, acquire(host) waits until the host has a token
+    (rate requests per second, bursts of up to burst), fewer than
+    max_in_flight requests in progress, and no penalty pending. release()
+    reports the response. A 429 or 503 blocks the host for its Retry-After
+    or the current backoff, whichever is longer. The backoff doubles from
+    backoff_base up to backoff_max while the host keeps throttling, and
+    halves again on each good response. Hosts have independent locks, so a
+    slow host never delays fetches to another. Waits longer than max_wait
+    raise PolitenessTimeout instead of tying up the caller.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4.0, max_in_flight: int = 4, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, max_wait: float = 30.0, max_retries: int = 2, max_hosts: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        # Throttled requests are retried this many times, after waiting out the penalty
+        self.max_retries = max_retries
+        self.max_hosts = max_hosts
+
+        self._hosts: 'OrderedDict[str, HostState]' = OrderedDict()
+        self._conditions: Dict[str, threading.Condition] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> float:
+        """Wait until a request to host may start; returns the seconds waited"""
+        state, condition = self._host(host)
+        started = time.monotonic()
+        deadline = started + self.max_wait
+
+        with condition:
+            state.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(state, now)
+                    delay = self._delay(state, now)
+                    if delay == 0.0:
+                        break
+                    # At max_in_flight the wait ends with a release(), so only the deadline applies
+                    if now + (delay if delay != float('inf') else 0.0) >= deadline:
+                        raise PolitenessTimeout(f'{host} is rate limited; gave up after waiting {self.max_wait:g}s')
+                    condition.wait(min(delay, deadline - now))
+            finally:
+                state.waiting -= 1
+
+            return self._take(state, started)
+
+    async def acquire_async(self, host: str) -> float:
+        """acquire() for coroutines: waits with asyncio.sleep, so the event loop keeps running
+
+        Shares the host's state with acquire(), so threads and coroutines
+        fetching the same host are limited together.
+        """
+        state, condition = self._host(host)
+        started = time.monotonic()
+        deadline = started + self.max_wait
+
+        with condition:
+            state.waiting += 1
+        try:
+            while True:
+                with condition:
+                    now = time.monotonic()
+                    self._refill(state, now)
+                    delay = self._delay(state, now)
+                    if delay == 0.0:
+                        return self._take(state, started)
+                if now + (delay if delay != float('inf') else 0.0) >= deadline:
+                    raise PolitenessTimeout(f'{host} is rate limited; gave up after waiting {self.max_wait:g}s')
+                # A release() cannot wake a coroutine, so a host at max_in_flight is polled
+                await asyncio.sleep(min(ASYNC_POLL_INTERVAL if delay == float('inf') else delay, deadline - now))
+        finally:
+            with condition:
+                state.waiting -= 1
+
+    def release(self, host: str, status_code: Optional[int] = None, retry_after: Optional[str] = None) -> bool:
+        """Report the end of a request to host; returns True if the host throttled it"""
+        state, condition = self._host(host)
+
+        with condition:
+            # Never below zero, even if the host was forgotten and recreated meanwhile
+            state.in_flight = max(0, state.in_flight - 1)
+            throttled = status_code in THROTTLE_STATUSES
+            if throttled:
+                state.throttled += 1
+                state.backoff = min(self.backoff_max, state.backoff * 2 if state.backoff else self.backoff_base)
+                penalty = max(state.backoff, parse_retry_after(retry_after) or 0.0)
+                state.blocked_until = max(state.blocked_until, time.monotonic() + penalty)
+            elif status_code is not None and state.backoff:
+                state.backoff = state.backoff / 2 if state.backoff / 2 >= self.backoff_base else 0.0
+            condition.notify_all()
+
+        return throttled
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host request, throttle and queue wait counters"""
+        now = time.monotonic()
+        hosts = {}
+        with self._lock:
+            items = list(self._hosts.items())
+        for host, state in items:
+            hosts[host] = {
+                'requests': state.requests,
+                'throttled': state.throttled,
+                'in_flight': state.in_flight,
+                'waiting': state.waiting,
+                'avg_wait_seconds': round(state.total_wait / state.waits, 4) if state.waits else 0.0,
+                'max_wait_seconds': round(state.max_wait, 4),
+                'blocked_for_seconds': round(max(0.0, state.blocked_until - now), 3),
+                'backoff_seconds': state.backoff
+            }
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'max_in_flight': self.max_in_flight,
+            'max_wait': self.max_wait,
+            'hosts': hosts
+        }
+
+    def _host(self, host: str):
+        """State and condition for host, forgetting idle hosts beyond max_hosts"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = HostState(self.burst, time.monotonic())
+                self._conditions[host] = threading.Condition()
+                self._evict()
+            else:
+                self._hosts.move_to_end(host)
+            return state, self._conditions[host]
+
+    def _evict(self) -> None:
+        """Drop the least recently used idle hosts; the lock must be held"""
+        now = time.monotonic()
+        # The newest host is the one being added
+        for host in list(self._hosts)[:-1]:
+            if len(self._hosts) <= self.max_hosts:
+                break
+            if self._hosts[host].is_idle(self.burst, self.rate, now):
+                del self._hosts[host]
+                del self._conditions[host]
+
+    def _take(self, state: HostState, started: float) -> float:
+        """Start a request on the host, whose condition must be held; returns the seconds waited"""
+        state.tokens -= 1
+        state.in_flight += 1
+        state.requests += 1
+        waited = time.monotonic() - started
+        state.waits += 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        return waited
+
+    def _refill(self, state: HostState, now: float) -> None:
+        if self.rate <= 0:
+            # No rate limit; only max_in_flight and penalties apply
+            state.tokens = self.burst
+            return
+        state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+        state.refilled_at = now
+
+    def _delay(self, state: HostState, now: float) -> float:
+        """Seconds until the next request to this host may start; inf while it is at max_in_flight"""
+        delay = max(0.0, state.blocked_until - now)
+        if state.tokens < 1:
+            delay = max(delay, (1 - state.tokens) / self.rate)
+        if delay == 0.0 and state.in_flight >= self.max_in_flight:
+            return float('inf')
+        return delay
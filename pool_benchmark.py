@@ -0,0 +1,107 @@
+"""Per-analysis latency when the same host is analyzed repeatedly, with and without the shared pool
+
+fresh opens a new requests.Session for every analysis, as module-level
+requests.get did, so each one pays for DNS, TCP and TLS setup; pooled
+uses the process-wide keep-alive pool in http_client. Prints latency
+percentiles and how many analyses had to open a connection, as JSON:
+
+    python pool_benchmark.py --requests 200 --threads 8 [--url https://example.com/]
+
+Without --url a local FixtureServer is used, where connection setup is
+cheap; a remote HTTPS host shows the handshake cost.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import requests
+
+import http_client
+from fixture_server import PAGES, FixtureServer
+from load_benchmark import summarize_latencies
+from seo_analyzer import SEOAnalyzer
+
+
+def fresh_analysis(url: str) -> Dict[str, Any]:
+    with requests.Session() as session:
+        # Same connection classes as the pool, so connection setup is timed the same way
+        adapter = http_client.TimedHTTPAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return SEOAnalyzer(session=session, instrument=True).analyze_url(url)
+
+
+def pooled_analysis(url: str) -> Dict[str, Any]:
+    return SEOAnalyzer(instrument=True).analyze_url(url)
+
+
+MODES: Dict[str, Callable[[str], Dict[str, Any]]] = {'fresh': fresh_analysis, 'pooled': pooled_analysis}
+
+
+def run_mode(analyze: Callable[[str], Dict[str, Any]], urls: List[str], threads: int) -> Dict[str, Any]:
+    def timed(url: str):
+        started = time.perf_counter()
+        results = analyze(url)
+        return time.perf_counter() - started, results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        samples = list(pool.map(timed, urls))
+    duration = time.perf_counter() - started
+
+    connect_ms = [results['timings']['connect'] for _, results in samples if 'connect' in results.get('timings', {})]
+    return {
+        'errors': sum(1 for _, results in samples if results.get('error')),
+        'throughput_rps': round(len(samples) / duration, 2),
+        'latency_ms': summarize_latencies([seconds for seconds, _ in samples]),
+        'connections_opened': len(connect_ms),
+        'connect_ms_total': round(sum(connect_ms), 2)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='Analyses per mode')
+    parser.add_argument('--threads', type=int, default=8, help='Analyses in flight at once')
+    parser.add_argument('--url', help='Analyze this URL instead of a fixture page')
+    parser.add_argument('--page', default='tiny', help=f'Fixture page, from {", ".join(PAGES)}')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fixture server waits before answering')
+    parser.add_argument('--pool-maxsize', type=int, help='Connections kept per host by the shared pool')
+    args = parser.parse_args()
+
+    if args.pool_maxsize:
+        http_client.configure_pool(pool_maxsize=args.pool_maxsize)
+
+    report: Dict[str, Any] = {
+        'requests': args.requests,
+        'threads': args.threads,
+        'python': sys.version.split()[0],
+        'pool': http_client.pool_stats(),
+        'modes': {}
+    }
+
+    def measure(url_for: Callable[[str, int], str]) -> None:
+        for mode, analyze in MODES.items():
+            report['modes'][mode] = run_mode(analyze, [url_for(mode, i) for i in range(args.requests)], args.threads)
+
+    if args.url:
+        report['url'] = args.url
+        measure(lambda mode, i: args.url)
+    else:
+        if args.page not in PAGES:
+            parser.error(f'Unknown page: {args.page}')
+        report['url'] = f'fixture:{args.page}'
+        with FixtureServer(latency=args.latency) as server:
+            measure(lambda mode, i: server.url(args.page, list(MODES).index(mode) * args.requests + i))
+
+    fresh, pooled = report['modes']['fresh'], report['modes']['pooled']
+    if pooled['latency_ms']['p50']:
+        report['p50_speedup'] = round(fresh['latency_ms']['p50'] / pooled['latency_ms']['p50'], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
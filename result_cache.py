@@ -0,0 +1,243 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class CacheEntry:
+    """A cached analysis result plus the validators needed to revalidate it"""
+
+    __slots__ = ('results', 'stored_at', 'etag', 'last_modified')
+
+    def __init__(self, results: Dict[str, Any], stored_at: float, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None):
+        self.results = results
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Check whether the entry is younger than the TTL"""
+        return time.time() - self.stored_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the origin answer 304 Not Modified"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResultCache:
+    """Base class for analyze_url result caches
+
+    Subclasses store entries; this class keeps the hit/miss/revalidation
+    counters shared by every backend.
+    """
+
+    def __init__(self, ttl: float = 900, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'refreshed': 0,
+            'evictions': 0
+        }
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    def touch(self, key: str, entry: CacheEntry) -> None:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        entry.stored_at = time.time()
+        self.set(key, entry)
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def record(self, event: str, count: int = 1) -> None:
+        """Increment one of the hits/misses/revalidated/refreshed/evictions counters"""
+        with self._stats_lock:
+            self._stats[event] += count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the counters along with the backend's current size"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated'] + stats['refreshed']
+        stats['hit_ratio'] = round((stats['hits'] + stats['revalidated']) / lookups, 3) if lookups else 0.0
+        stats['entries'] = self.size()
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        stats['backend'] = self.backend
+        return stats
+
+
+class MemoryResultCache(ResultCache):
+    """Per-process LRU cache"""
+
+    backend = 'memory'
+
+    def __init__(self, ttl: float = 900, max_entries: int = 1000):
+        super().__init__(ttl, max_entries)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            self._entries.move_to_end(key)
+
+        # Results are kept serialized so callers never share mutable dicts
+        payload, stored_at, etag, last_modified = stored
+        return CacheEntry(json.loads(payload), stored_at, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        stored = (json.dumps(entry.results), entry.stored_at, entry.etag, entry.last_modified)
+        evicted = 0
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.record('evictions', evicted)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteResultCache(ResultCache):
+    """LRU cache in a local SQLite file, shared by every worker process on the host"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str, ttl: float = 900, max_entries: int = 10000):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._local = threading.local()
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' payload TEXT NOT NULL,'
+                ' stored_at REAL NOT NULL,'
+                ' last_used REAL NOT NULL,'
+                ' etag TEXT,'
+                ' last_modified TEXT)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS ix_analysis_cache_last_used ON analysis_cache (last_used)'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection; sqlite3 connections are not shared across threads"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT payload, stored_at, etag, last_modified FROM analysis_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with connection:
+            connection.execute('UPDATE analysis_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+
+        payload, stored_at, etag, last_modified = row
+        return CacheEntry(json.loads(payload), stored_at, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO analysis_cache (key, payload, stored_at, last_used, etag, last_modified)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (key, json.dumps(entry.results), entry.stored_at, time.time(), entry.etag, entry.last_modified)
+            )
+            evicted = connection.execute(
+                'DELETE FROM analysis_cache WHERE key IN ('
+                ' SELECT key FROM analysis_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        if evicted > 0:
+            self.record('evictions', evicted)
+
+    def size(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM analysis_cache').fetchone()[0]
+
+
+class ContentHashMemo:
+    """LRU memo of parse/validate output keyed by a hash of the page bytes
+
+    Byte-identical pages (repeat crawls, tracking-parameter URL variants)
+    then skip extraction and validation entirely.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload)
+
+    def set(self, key: str, derived: Dict[str, Any]) -> None:
+        payload = json.dumps(derived)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+
+def create_cache(backend: str, ttl: float, max_entries: int, path: Optional[str] = None) -> Optional[ResultCache]:
+    """Build the cache named by configuration; 'none' disables caching"""
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryResultCache(ttl=ttl, max_entries=max_entries)
+    if backend == 'sqlite':
+        return SQLiteResultCache(path, ttl=ttl, max_entries=max_entries)
+    raise ValueError(f'Unknown cache backend: {backend}')
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from models import DomainStatsBatch, RollupBatch
+
+
+# Analyses are rolled up per hour; compaction folds old hours into days
+GRANULARITIES = ('hour', 'day')
+
+BUCKET_SIZES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_analyses(ScoreRollup, rows: Iterable[Dict[str, Any]]) -> None:
+    """Add SeoAnalysis row dicts to their hourly buckets, one upsert per bucket"""
+    batches: Dict[Tuple[str, datetime], RollupBatch] = {}
+    for row in rows:
+        key = (row['domain'], bucket_start(row['analysis_date'], 'hour'))
+        batches.setdefault(key, RollupBatch()).add(row)
+
+    for (domain, start), batch in batches.items():
+        ScoreRollup.apply_batch(domain, 'hour', start, batch)
+
+
+def _bucket_to_dict(start: datetime, batch: RollupBatch) -> Dict[str, Any]:
+    scored = batch.count - batch.error_count
+    bucket = {
+        'bucket_start': start.isoformat(),
+        'analyses': batch.count,
+        'errors': batch.error_count,
+        'min_score': batch.min_score,
+        'max_score': batch.max_score
+    }
+    for column in DomainStatsBatch.SCORE_COLUMNS:
+        bucket['avg_' + column] = round(batch.sums[column] / scored, 2) if scored else None
+    return bucket
+
+
+def query_trend(session, ScoreRollup, domain: str, granularity: str = 'day', start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Score trend for a domain between start and end, oldest bucket first
+
+    Only the rollup table is read. Daily trends combine compacted daily
+    buckets with hourly ones that have not been compacted yet.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unknown granularity: {granularity}')
+
+    query = select(ScoreRollup).where(ScoreRollup.domain == domain.lower())
+    if granularity == 'hour':
+        query = query.where(ScoreRollup.granularity == 'hour')
+    if start is not None:
+        query = query.where(ScoreRollup.bucket_start >= bucket_start(start, granularity))
+    if end is not None:
+        query = query.where(ScoreRollup.bucket_start < end)
+
+    buckets: Dict[datetime, RollupBatch] = {}
+    for rollup in session.execute(query).scalars():
+        key = bucket_start(rollup.bucket_start, granularity)
+        buckets.setdefault(key, RollupBatch()).merge(rollup)
+
+    return [_bucket_to_dict(key, buckets[key]) for key in sorted(buckets)]
+
+
+def compact_hourly(db, ScoreRollup, older_than: datetime) -> int:
+    """Merge hourly buckets from days that ended before older_than into daily ones
+
+    Each day is merged and deleted in its own short transaction, so writers
+    are never blocked for long. Returns the number of hourly buckets removed.
+    """
+    cutoff = bucket_start(older_than, 'day')
+    compacted = 0
+
+    while True:
+        oldest = db.session.execute(
+            select(ScoreRollup.bucket_start).where(
+                ScoreRollup.granularity == 'hour',
+                ScoreRollup.bucket_start < cutoff
+            ).order_by(ScoreRollup.bucket_start).limit(1)
+        ).scalar()
+        if oldest is None:
+            break
+
+        day = bucket_start(oldest, 'day')
+        hourly = db.session.execute(
+            select(ScoreRollup).where(
+                ScoreRollup.granularity == 'hour',
+                ScoreRollup.bucket_start >= day,
+                ScoreRollup.bucket_start < day + BUCKET_SIZES['day']
+            ).with_for_update()
+        ).scalars().all()
+
+        batches: Dict[str, RollupBatch] = {}
+        for rollup in hourly:
+            batches.setdefault(rollup.domain, RollupBatch()).merge(rollup)
+        for domain, batch in batches.items():
+            ScoreRollup.apply_batch(domain, 'day', day, batch)
+
+        db.session.execute(ScoreRollup.__table__.delete().where(
+            ScoreRollup.id.in_([rollup.id for rollup in hourly])
+        ))
+        db.session.commit()
+        compacted += len(hourly)
+
+    return compacted
+
+
+def rebuild_rollups(db, ScoreRollup, SeoAnalysis, chunk_size: int = 10000) -> int:
+    """Recompute every hourly bucket from seo_analyses
+
+    Buckets of archived analyses are deleted too; callers add those back
+    with record_analyses from the archive files. Rows are streamed in date order and each hour is written as soon as it
+    is complete, so memory holds one hour of buckets at a time. Returns the
+    number of analyses rolled up.
+    """
+    db.session.execute(ScoreRollup.__table__.delete())
+
+    columns = [SeoAnalysis.domain, SeoAnalysis.analysis_date, SeoAnalysis.error_message]
+    columns += [getattr(SeoAnalysis, column) for column in DomainStatsBatch.SCORE_COLUMNS]
+    query = select(*columns).order_by(SeoAnalysis.analysis_date, SeoAnalysis.id)
+
+    total = 0
+    pending: List[Dict[str, Any]] = []
+    current_hour = None
+    for row in db.session.execute(query.execution_options(yield_per=chunk_size)):
+        hour = bucket_start(row.analysis_date, 'hour')
+        if hour != current_hour and pending:
+            record_analyses(ScoreRollup, pending)
+            pending = []
+        current_hour = hour
+        pending.append(row._asdict())
+        total += 1
+
+    if pending:
+        record_analyses(ScoreRollup, pending)
+    db.session.commit()
+    return total
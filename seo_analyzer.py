@@ -1,91 +1,490 @@
+import hashlib
+import os
+import time
 import requests
+from urllib3.exceptions import EmptyPoolError
 from bs4 import BeautifulSoup
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from urllib.parse import urljoin, urlparse
 import validators
 import re
-from typing import Dict, List, Any
+import http_client
+import instrumentation
+import parser_backends
+from meta_extractor import empty_meta_data
+from politeness import HostScheduler, PolitenessTimeout
+from result_cache import CacheEntry, ContentHashMemo, ResultCache
+from seo_rules import RuleSet
+from typing import Dict, Any, Iterable, Iterator, Mapping, Optional, Tuple
+
+# Fields filled from tags that live in <body>; a streamed fetch may cut these short
+BODY_LEVEL_FIELDS = ('h1_tags', 'h2_tags', 'image_alt_missing', 'total_images')
+
+# Validation sections that are computed from body-level fields
+BODY_LEVEL_CHECKS = ('content',)
+
+
+class HeadLimitedBuffer:
+    """Collect streamed chunks until </head> plus a body byte budget has arrived"""
+    
+    marker = b'</head>'
+    
+    def __init__(self, body_byte_budget: int = 0):
+        self.body_byte_budget = body_byte_budget
+        self.buffer = bytearray()
+        self.head_end: Optional[int] = None
+        self.truncated = False
+    
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk; returns True once enough of the page has been read"""
+        if not chunk:
+            return False
+        
+        # Only rescan the tail of the previous chunk so a marker split
+        # across chunk boundaries is still found
+        scan_from = max(0, len(self.buffer) - len(self.marker) + 1)
+        self.buffer.extend(chunk)
+        
+        if self.head_end is None:
+            position = self.buffer[scan_from:].lower().find(self.marker)
+            if position != -1:
+                self.head_end = scan_from + position + len(self.marker)
+        
+        if self.head_end is not None and len(self.buffer) >= self.head_end + self.body_byte_budget:
+            self.truncated = True
+            return True
+        return False
+    
+    def content(self) -> bytes:
+        """Return what has been read, cut at the byte budget when truncated"""
+        if self.truncated:
+            return bytes(self.buffer[:self.head_end + self.body_byte_budget])
+        return bytes(self.buffer)
+
+
+class LazyPreviews(Mapping):
+    """Platform previews built from meta_data on first access instead of up front
+    
+    Behaves like the previews dict; json.dumps needs default=dict for it.
+    """
+    
+    __slots__ = ('_analyzer', '_meta_data', '_url', '_built')
+    
+    PLATFORMS = ('google', 'facebook', 'twitter', 'linkedin')
+    
+    def __init__(self, analyzer: 'SEOAnalyzer', meta_data: Dict[str, Any], url: str):
+        self._analyzer = analyzer
+        self._meta_data = meta_data
+        self._url = url
+        self._built: Dict[str, Dict[str, str]] = {}
+    
+    def __getitem__(self, platform: str) -> Dict[str, str]:
+        preview = self._built.get(platform)
+        if preview is None:
+            if platform not in self.PLATFORMS:
+                raise KeyError(platform)
+            started = time.perf_counter()
+            preview = self._analyzer._build_preview(platform, self._meta_data, self._url)
+            if self._analyzer.instrument:
+                # Built after the analysis was stored, so this only reaches the histograms
+                instrumentation.metrics.observe('previews', time.perf_counter() - started)
+            self._built[platform] = preview
+        return preview
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.PLATFORMS)
+    
+    def __len__(self) -> int:
+        return len(self.PLATFORMS)
+
 
 class SEOAnalyzer:
-    def __init__(self):
+    def __init__(self, stream_head_only: bool = False, body_byte_budget: Optional[int] = None,
+                 session: Optional[requests.Session] = None, parser_backend: str = 'auto',
+                 cache: Optional[ResultCache] = None, content_memo: Optional[ContentHashMemo] = None,
+                 max_headings: Optional[int] = None, scheduler: Optional[HostScheduler] = None,
+                 instrument: bool = False, rules: Optional[RuleSet] = None, parse_pool=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = 10
         
-        # SEO best practice limits
-        self.title_min_length = 30
-        self.title_max_length = 60
-        self.description_min_length = 120
-        self.description_max_length = 160
+        # Explicit session, otherwise the process-wide keep-alive pool is used
+        self.session = session
+        
+        # Streaming fetch: stop reading once </head> has been seen, plus an
+        # optional number of body bytes for the h1/h2/img checks
+        self.stream_head_only = stream_head_only
+        self.body_byte_budget = body_byte_budget or 0
+        self.stream_chunk_size = 16384
+        
+        # HTML parser used for extraction: 'auto' is the html.parser based
+        # single-pass extractor, identical to the BeautifulSoup path on any
+        # markup; 'fastest' opts into selectolax or lxml when installed, which
+        # can read malformed pages differently; 'html.parser' builds a BeautifulSoup tree
+        self.parser_backend = parser_backends.resolve_backend(parser_backend)
+        
+        # Optional result cache consulted by analyze_url
+        self.cache = cache
+        
+        # Optional memo of meta_data/validation keyed by a hash of the page bytes
+        self.content_memo = content_memo
+        
+        # Most H1/H2 texts kept per result after validation; None keeps all
+        self.max_headings = max_headings
+        
+        # Optional per-host rate limiter every fetch waits on
+        self.scheduler = scheduler
+        
+        # Record per-stage timings in results['timings'] and the process histograms
+        self.instrument = instrument
+        
+        # SEO best practice rules (thresholds, deductions, messages)
+        self.rules = rules or RuleSet()
+        
+        # Optional parse_pool.ParsePool running parse/extract/validate in worker processes
+        self.parse_pool = parse_pool
 
     def analyze_url(self, url: str) -> Dict[str, Any]:
         """Analyze a URL for SEO meta tags and best practices"""
+        timer = self._new_timer()
+        results = instrumentation.run_with(timer, self._analyze_url, url)
+        return self._finish_timer(results, timer)
+
+    def _analyze_url(self, url: str) -> Dict[str, Any]:
+        """analyze_url without the timing wrapper"""
         
         # Validate URL format
         if not validators.url(url):
             return {'error': 'Invalid URL format. Please enter a valid URL.'}
         
+        # Serve fresh cached results without touching the network
+        entry, cached = self._cache_lookup(url)
+        if cached is not None:
+            return cached
+        
         try:
-            # Fetch the webpage
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
+            # Fetch the webpage, revalidating a stale cache entry if there is one
+            content, fetch_info = self._fetch(url, entry.conditional_headers() if entry else None)
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            revalidated = self._cache_revalidated(url, entry, fetch_info)
+            if revalidated is not None:
+                return revalidated
             
-            # Extract meta tags
-            meta_data = self._extract_meta_tags(soup)
+            return self._cache_store(url, entry, self._analyze_content(content, url, fetch_info))
             
-            # Validate against best practices
-            validation_results = self._validate_seo_tags(meta_data)
-            
-            # Generate previews
-            previews = self._generate_previews(meta_data, url)
+        except Exception as e:
+            return {'error': self._describe_error(e)}
+
+    def analyze_urls(self, urls: Iterable[str], max_concurrency: int = 16, per_host_limit: int = 4,
+                     parse_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Analyze many URLs concurrently, yielding each result as soon as it is ready
+        
+        At most max_concurrency fetches run at once, and at most per_host_limit
+        of them against the same host. Parsing and validation run on a
+        separate worker pool so slow pages never hold up fetch slots.
+        """
+        
+        max_concurrency = max(1, max_concurrency)
+        per_host_limit = max(1, per_host_limit)
+        
+        # Queue URLs per host so a busy host never blocks the others
+        pending_by_host: Dict[str, deque] = defaultdict(deque)
+        for url in urls:
+            if not validators.url(url):
+                yield {'error': 'Invalid URL format. Please enter a valid URL.', 'url': url, 'processing_time': 0.0}
+                continue
+            pending_by_host[urlparse(url).netloc.lower()].append(url)
+        
+        ready_hosts = deque(pending_by_host)
+        in_flight_by_host: Dict[str, int] = defaultdict(int)
+        fetching: Dict[Future, Tuple[str, str, float, Any]] = {}
+        parsing: Dict[Future, Tuple[str, float, Any]] = {}
+        
+        fetch_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='seo-fetch')
+        parse_pool = ThreadPoolExecutor(max_workers=parse_workers or os.cpu_count() or 1, thread_name_prefix='seo-parse')
+        
+        try:
+            while ready_hosts or fetching or parsing:
+                # Start fetches until the global or every per-host limit is reached
+                skipped = 0
+                while ready_hosts and len(fetching) < max_concurrency and skipped < len(ready_hosts):
+                    host = ready_hosts[0]
+                    if in_flight_by_host[host] >= per_host_limit:
+                        ready_hosts.rotate(-1)
+                        skipped += 1
+                        continue
+                    
+                    url = pending_by_host[host].popleft()
+                    if not pending_by_host[host]:
+                        ready_hosts.popleft()
+                    else:
+                        ready_hosts.rotate(-1)
+                    in_flight_by_host[host] += 1
+                    timer = self._new_timer()
+                    fetching[fetch_pool.submit(instrumentation.run_with, timer, self._fetch, url)] = (
+                        url, host, time.perf_counter(), timer
+                    )
+                    skipped = 0
+                
+                done, _ = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    if future in fetching:
+                        url, host, started, timer = fetching.pop(future)
+                        in_flight_by_host[host] -= 1
+                        try:
+                            content, fetch_info = future.result()
+                        except Exception as e:
+                            yield self._finish_timer({'error': self._describe_error(e), 'url': url,
+                                                      'processing_time': time.perf_counter() - started}, timer)
+                            continue
+                        parsing[parse_pool.submit(instrumentation.run_with, timer, self._analyze_content,
+                                                  content, url, fetch_info)] = (url, started, timer)
+                    else:
+                        url, started, timer = parsing.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            results = {'error': self._describe_error(e), 'url': url}
+                        results['processing_time'] = time.perf_counter() - started
+                        yield self._finish_timer(results, timer)
+        finally:
+            # The caller may stop consuming early; drop whatever has not started
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _analyze_content(self, content: bytes, url: str, fetch_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse fetched page content, validate it and build the previews"""
+        
+        # Identical bytes always produce identical meta tags and validation
+        content_hash = hashlib.sha256(content).hexdigest()
+        # Stored meta_data is already capped, so analyzers with other caps must not share it
+        memo_key = f'{self.parser_backend}:{self.rules.version}:{self.max_headings}:{content_hash}'
+        derived = self.content_memo.get(memo_key) if self.content_memo is not None else None
+        
+        if derived is not None:
+            meta_data = derived['meta_data']
+            validation_results = derived['validation']
+        else:
+            # Off the GIL in a worker process if there is a pool, otherwise in this thread
+            pooled = self.parse_pool.derive(content) if self.parse_pool is not None else None
+            meta_data, validation_results = pooled or self._derive(content)
             
-            return {
-                'error': None,
-                'meta_data': meta_data,
-                'validation': validation_results,
-                'previews': previews,
-                'url': url
-            }
+            if self.content_memo is not None:
+                self.content_memo.set(memo_key, {'meta_data': meta_data, 'validation': validation_results})
+        
+        return {
+            'error': None,
+            'meta_data': meta_data,
+            'validation': validation_results,
+            # Built on first access; they depend on the URL as well as the content
+            'previews': LazyPreviews(self, meta_data, url),
+            'fetch': fetch_info,
+            'content_hash': content_hash,
+            'url': url
+        }
+
+    def _derive(self, content: bytes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Parse, extract and validate page content; everything that depends only on the bytes"""
+        
+        # Parse HTML and extract meta tags
+        meta_data = self._parse(content)
+        
+        # Validate against best practices
+        with instrumentation.current().stage('validate'):
+            validation_results = self._validate_seo_tags(meta_data)
+        
+        # Only keep as many headings as anyone will look at
+        self._cap_headings(meta_data)
+        
+        return meta_data, validation_results
+
+    def _new_timer(self):
+        """A timer for one analysis, or the no-op one when instrumentation is off"""
+        return instrumentation.StageTimer() if self.instrument else instrumentation.NULL_TIMER
+
+    def _finish_timer(self, results: Dict[str, Any], timer) -> Dict[str, Any]:
+        """Attach an analysis' stage timings to its results and the process histograms"""
+        if timer.enabled:
+            results['timings'] = timer.rounded()
+            instrumentation.metrics.observe_timer(timer)
+        return results
+
+    def _cache_lookup(self, url: str) -> Tuple[Optional[CacheEntry], Optional[Dict[str, Any]]]:
+        """The cached entry for url, plus the results to serve if it is still fresh"""
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None and entry.is_fresh(self.cache.ttl):
+            self.cache.record('hits')
+            return entry, self._from_cache(entry, 'hit')
+        return entry, None
+
+    def _cache_revalidated(self, url: str, entry: Optional[CacheEntry],
+                           fetch_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The cached results if the origin answered 304 Not Modified, else None"""
+        if entry is None or fetch_info['status_code'] != 304:
+            return None
+        self.cache.touch(url, entry)
+        self.cache.record('revalidated')
+        return self._from_cache(entry, 'revalidated')
+
+    def _cache_store(self, url: str, entry: Optional[CacheEntry], results: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache freshly analyzed results and mark them as a miss or a refresh"""
+        if self.cache is not None:
+            fetch_info = results['fetch']
+            self.cache.record('refreshed' if entry else 'misses')
+            # Previews are cheap to rebuild, so they are not cached
+            cached = {key: value for key, value in results.items() if key != 'previews'}
+            self.cache.set(url, CacheEntry(cached, time.time(), fetch_info['etag'], fetch_info['last_modified']))
+            results['cache'] = 'refreshed' if entry else 'miss'
+        return results
+
+    def _from_cache(self, entry: CacheEntry, status: str) -> Dict[str, Any]:
+        """A copy of cached results with the cache status and lazy previews attached
+        
+        The entry itself is left untouched; a backend may hand the same
+        dict to every reader.
+        """
+        results = dict(entry.results, cache=status)
+        if not results.get('error') and 'previews' not in results:
+            results['previews'] = LazyPreviews(self, results['meta_data'], results['url'])
+        return results
+
+    def _cap_headings(self, meta_data: Dict[str, Any]) -> None:
+        """Record the H1/H2 counts, then drop headings beyond max_headings"""
+        for field in ('h1_tags', 'h2_tags'):
+            meta_data[field[:2] + '_count'] = len(meta_data[field])
+            if self.max_headings is not None:
+                del meta_data[field][self.max_headings:]
+
+    def _describe_error(self, error: Exception) -> str:
+        """Turn a fetch or parse exception into a user-facing message"""
+        if isinstance(error, PolitenessTimeout):
+            return 'The website is rate limiting requests. Please try again later.'
+        if isinstance(error, requests.exceptions.Timeout):
+            return 'Request timed out. The website took too long to respond.'
+        if isinstance(error, EmptyPoolError):
+            return 'Too many requests to this website are in progress. Please try again in a moment.'
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return 'Could not connect to the website. Please check the URL and try again.'
+        if isinstance(error, requests.exceptions.HTTPError):
+            return f'HTTP error {error.response.status_code}: {error.response.reason}'
+        return f'An unexpected error occurred: {str(error)}'
+
+    def _get_session(self) -> requests.Session:
+        """Return the session used for outbound fetches"""
+        return self.session or http_client.get_session()
+
+    def _fetch(self, url: str, extra_headers: Optional[Dict[str, str]] = None) -> Tuple[bytes, Dict[str, Any]]:
+        """Fetch the page body, waiting for the host's politeness slot when a scheduler is set"""
+        
+        headers = dict(self.headers, **extra_headers) if extra_headers else self.headers
+        
+        if self.scheduler is None:
+            return self._fetch_page(url, headers)
+        
+        host = urlparse(url).netloc.lower()
+        attempt = 0
+        while True:
+            self.scheduler.acquire(host)
+            try:
+                content, fetch_info = self._fetch_page(url, headers)
+            except requests.exceptions.HTTPError as e:
+                throttled = self.scheduler.release(host, e.response.status_code, e.response.headers.get('Retry-After'))
+                if not throttled or attempt >= self.scheduler.max_retries:
+                    raise
+                # Try again once the host's penalty has passed
+                attempt += 1
+                continue
+            except Exception:
+                self.scheduler.release(host)
+                raise
             
-        except requests.exceptions.Timeout:
-            return {'error': 'Request timed out. The website took too long to respond.'}
-        except requests.exceptions.ConnectionError:
-            return {'error': 'Could not connect to the website. Please check the URL and try again.'}
-        except requests.exceptions.HTTPError as e:
-            return {'error': f'HTTP error {e.response.status_code}: {e.response.reason}'}
-        except Exception as e:
-            return {'error': f'An unexpected error occurred: {str(e)}'}
+            self.scheduler.release(host, fetch_info['status_code'])
+            return content, fetch_info
+
+    def _fetch_page(self, url: str, headers: Dict[str, str]) -> Tuple[bytes, Dict[str, Any]]:
+        """Fetch the page body, streaming only the head when configured"""
+        
+        timer = instrumentation.current()
+        connect_before = timer.total('connect')
+        started = time.perf_counter()
+        
+        if not self.stream_head_only:
+            response = self._get_session().get(url, headers=headers, timeout=self.timeout)
+            instrumentation.record_response(timer, started, response.elapsed.total_seconds(), connect_before)
+            response.raise_for_status()
+            fetch_info = self._full_fetch_info(response.content, response.status_code, response.headers, response.url)
+            return response.content, fetch_info
+        
+        response = self._get_session().get(url, headers=headers, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            content, truncated = self._read_until_head_end(response)
+        finally:
+            response.close()
+            instrumentation.record_response(timer, started, response.elapsed.total_seconds(), connect_before)
+        
+        fetch_info = self._stream_fetch_info(content, truncated, response.status_code, response.headers, response.url)
+        return content, fetch_info
+
+    def _read_until_head_end(self, response: requests.Response) -> Tuple[bytes, bool]:
+        """Read chunks until </head> plus the body byte budget has been received"""
+        
+        buffer = HeadLimitedBuffer(self.body_byte_budget)
+        for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+            if buffer.feed(chunk):
+                break
+        return buffer.content(), buffer.truncated
+
+    def _full_fetch_info(self, content: bytes, status_code: int, headers: Mapping[str, str],
+                         final_url: Optional[str] = None) -> Dict[str, Any]:
+        """Describe a fetch that read the whole page"""
+        return {
+            'mode': 'full',
+            'status_code': status_code,
+            'final_url': final_url,
+            'bytes_read': len(content),
+            'truncated': False,
+            'partial_checks': [],
+            'partial_fields': [],
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')
+        }
+
+    def _stream_fetch_info(self, content: bytes, truncated: bool, status_code: int,
+                           headers: Mapping[str, str], final_url: Optional[str] = None) -> Dict[str, Any]:
+        """Describe a streamed fetch and which checks saw partial content"""
+        return {
+            'mode': 'stream',
+            'status_code': status_code,
+            'final_url': final_url,
+            'bytes_read': len(content),
+            'truncated': truncated,
+            'partial_checks': list(BODY_LEVEL_CHECKS) if truncated else [],
+            'partial_fields': list(BODY_LEVEL_FIELDS) if truncated else [],
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')
+        }
+
+    def _parse(self, content: bytes) -> Dict[str, Any]:
+        """Parse page content with the configured backend and extract meta tags"""
+        timer = instrumentation.current()
+        if self.parser_backend == parser_backends.SOUP_BACKEND:
+            with timer.stage('parse'):
+                soup = BeautifulSoup(content, 'html.parser')
+            with timer.stage('extract'):
+                return self._extract_meta_tags(soup)
+        
+        # The other backends extract while they parse, in a single pass
+        with timer.stage('parse'):
+            return parser_backends.BACKENDS[self.parser_backend](content)
 
     def _extract_meta_tags(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """Extract all relevant SEO meta tags from the HTML"""
         
-        meta_data = {
-            'title': '',
-            'description': '',
-            'keywords': '',
-            'canonical': '',
-            'robots': '',
-            'viewport': '',
-            'charset': '',
-            'og_title': '',
-            'og_description': '',
-            'og_image': '',
-            'og_url': '',
-            'og_type': '',
-            'og_site_name': '',
-            'twitter_card': '',
-            'twitter_title': '',
-            'twitter_description': '',
-            'twitter_image': '',
-            'twitter_site': '',
-            'h1_tags': [],
-            'h2_tags': [],
-            'image_alt_missing': 0,
-            'total_images': 0
-        }
+        meta_data = empty_meta_data()
         
         # Title tag
         title_tag = soup.find('title')
@@ -157,170 +556,53 @@ class SEOAnalyzer:
 
     def _validate_seo_tags(self, meta_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate meta tags against SEO best practices"""
-        
-        validation = {
-            'title': {'status': 'success', 'messages': []},
-            'description': {'status': 'success', 'messages': []},
-            'og_tags': {'status': 'success', 'messages': []},
-            'twitter_tags': {'status': 'success', 'messages': []},
-            'technical': {'status': 'success', 'messages': []},
-            'content': {'status': 'success', 'messages': []},
-            'overall_score': 100
-        }
-        
-        score_deduction = 0
-        
-        # Title validation
-        title = meta_data['title']
-        if not title:
-            validation['title']['status'] = 'error'
-            validation['title']['messages'].append('Missing title tag')
-            score_deduction += 15
-        else:
-            if len(title) < self.title_min_length:
-                validation['title']['status'] = 'warning'
-                validation['title']['messages'].append(f'Title too short ({len(title)} chars). Recommended: {self.title_min_length}-{self.title_max_length} characters')
-                score_deduction += 5
-            elif len(title) > self.title_max_length:
-                validation['title']['status'] = 'warning'
-                validation['title']['messages'].append(f'Title too long ({len(title)} chars). Recommended: {self.title_min_length}-{self.title_max_length} characters')
-                score_deduction += 5
-            else:
-                validation['title']['messages'].append('Title length is optimal')
-        
-        # Description validation
-        description = meta_data['description']
-        if not description:
-            validation['description']['status'] = 'error'
-            validation['description']['messages'].append('Missing meta description')
-            score_deduction += 15
-        else:
-            if len(description) < self.description_min_length:
-                validation['description']['status'] = 'warning'
-                validation['description']['messages'].append(f'Description too short ({len(description)} chars). Recommended: {self.description_min_length}-{self.description_max_length} characters')
-                score_deduction += 5
-            elif len(description) > self.description_max_length:
-                validation['description']['status'] = 'warning'
-                validation['description']['messages'].append(f'Description too long ({len(description)} chars). Recommended: {self.description_min_length}-{self.description_max_length} characters')
-                score_deduction += 5
-            else:
-                validation['description']['messages'].append('Description length is optimal')
-        
-        # Open Graph validation
-        og_missing = []
-        if not meta_data['og_title']:
-            og_missing.append('og:title')
-        if not meta_data['og_description']:
-            og_missing.append('og:description')
-        if not meta_data['og_image']:
-            og_missing.append('og:image')
-        
-        if og_missing:
-            validation['og_tags']['status'] = 'warning'
-            validation['og_tags']['messages'].append(f'Missing Open Graph tags: {", ".join(og_missing)}')
-            score_deduction += len(og_missing) * 3
-        else:
-            validation['og_tags']['messages'].append('All essential Open Graph tags present')
-        
-        # Twitter Card validation
-        if not meta_data['twitter_card']:
-            validation['twitter_tags']['status'] = 'warning'
-            validation['twitter_tags']['messages'].append('Missing Twitter Card type')
-            score_deduction += 5
-        
-        if meta_data['twitter_card'] and not meta_data['twitter_image']:
-            validation['twitter_tags']['status'] = 'warning'
-            validation['twitter_tags']['messages'].append('Twitter Card specified but missing image')
-            score_deduction += 3
-        
-        if validation['twitter_tags']['status'] == 'success':
-            validation['twitter_tags']['messages'].append('Twitter Card tags are properly configured')
-        
-        # Technical validation
-        if not meta_data['canonical']:
-            validation['technical']['status'] = 'warning'
-            validation['technical']['messages'].append('Missing canonical URL')
-            score_deduction += 5
-        
-        if not meta_data['viewport']:
-            validation['technical']['status'] = 'warning'
-            validation['technical']['messages'].append('Missing viewport meta tag')
-            score_deduction += 5
-        
-        if validation['technical']['status'] == 'success':
-            validation['technical']['messages'].append('Technical SEO tags are properly configured')
-        
-        # Content validation
-        if not meta_data['h1_tags']:
-            validation['content']['status'] = 'warning'
-            validation['content']['messages'].append('No H1 tags found')
-            score_deduction += 10
-        elif len(meta_data['h1_tags']) > 1:
-            validation['content']['status'] = 'warning'
-            validation['content']['messages'].append(f'Multiple H1 tags found ({len(meta_data["h1_tags"])}). Use only one H1 per page')
-            score_deduction += 5
-        
-        if meta_data['image_alt_missing'] > 0:
-            validation['content']['status'] = 'warning'
-            validation['content']['messages'].append(f'{meta_data["image_alt_missing"]} out of {meta_data["total_images"]} images missing alt attributes')
-            score_deduction += min(meta_data['image_alt_missing'] * 2, 10)
-        
-        if validation['content']['status'] == 'success':
-            validation['content']['messages'].append('Content structure is well optimized')
-        
-        # Calculate overall score
-        validation['overall_score'] = max(0, 100 - score_deduction)
-        
-        return validation
+        return self.rules.validate(meta_data)
 
     def _generate_previews(self, meta_data: Dict[str, Any], url: str) -> Dict[str, Any]:
         """Generate preview data for different platforms"""
+        return {platform: self._build_preview(platform, meta_data, url) for platform in LazyPreviews.PLATFORMS}
+
+    def _build_preview(self, platform: str, meta_data: Dict[str, Any], url: str) -> Dict[str, str]:
+        """Generate preview data for one platform"""
         
         # Get domain name for fallbacks
         domain = urlparse(url).netloc
         
-        previews = {
-            'google': {
-                'title': meta_data['title'] or 'Untitled Page',
+        # Truncate for display limits
+        if platform == 'google':
+            return {
+                'title': self._truncate_text(meta_data['title'] or 'Untitled Page', 60),
                 'url': url,
-                'description': meta_data['description'] or 'No description available'
-            },
-            'facebook': {
-                'title': meta_data['og_title'] or meta_data['title'] or 'Untitled Page',
-                'description': meta_data['og_description'] or meta_data['description'] or 'No description available',
+                'description': self._truncate_text(meta_data['description'] or 'No description available', 160)
+            }
+        
+        if platform == 'facebook':
+            return {
+                'title': self._truncate_text(meta_data['og_title'] or meta_data['title'] or 'Untitled Page', 100),
+                'description': self._truncate_text(meta_data['og_description'] or meta_data['description'] or 'No description available', 300),
                 'image': meta_data['og_image'] or '',
                 'site_name': meta_data['og_site_name'] or domain,
                 'url': meta_data['og_url'] or url
-            },
-            'twitter': {
-                'title': meta_data['twitter_title'] or meta_data['og_title'] or meta_data['title'] or 'Untitled Page',
-                'description': meta_data['twitter_description'] or meta_data['og_description'] or meta_data['description'] or 'No description available',
+            }
+        
+        if platform == 'twitter':
+            return {
+                'title': self._truncate_text(meta_data['twitter_title'] or meta_data['og_title'] or meta_data['title'] or 'Untitled Page', 70),
+                'description': self._truncate_text(meta_data['twitter_description'] or meta_data['og_description'] or meta_data['description'] or 'No description available', 200),
                 'image': meta_data['twitter_image'] or meta_data['og_image'] or '',
                 'card_type': meta_data['twitter_card'] or 'summary',
                 'site': meta_data['twitter_site'] or domain
-            },
-            'linkedin': {
-                'title': meta_data['og_title'] or meta_data['title'] or 'Untitled Page',
-                'description': meta_data['og_description'] or meta_data['description'] or 'No description available',
+            }
+        
+        if platform == 'linkedin':
+            return {
+                'title': self._truncate_text(meta_data['og_title'] or meta_data['title'] or 'Untitled Page', 100),
+                'description': self._truncate_text(meta_data['og_description'] or meta_data['description'] or 'No description available', 300),
                 'image': meta_data['og_image'] or '',
                 'site_name': meta_data['og_site_name'] or domain
             }
-        }
-        
-        # Truncate for display limits
-        previews['google']['title'] = self._truncate_text(previews['google']['title'], 60)
-        previews['google']['description'] = self._truncate_text(previews['google']['description'], 160)
-        
-        previews['facebook']['title'] = self._truncate_text(previews['facebook']['title'], 100)
-        previews['facebook']['description'] = self._truncate_text(previews['facebook']['description'], 300)
-        
-        previews['twitter']['title'] = self._truncate_text(previews['twitter']['title'], 70)
-        previews['twitter']['description'] = self._truncate_text(previews['twitter']['description'], 200)
-        
-        previews['linkedin']['title'] = self._truncate_text(previews['linkedin']['title'], 100)
-        previews['linkedin']['description'] = self._truncate_text(previews['linkedin']['description'], 300)
         
-        return previews
+        raise KeyError(platform)
 
     def _truncate_text(self, text: str, max_length: int) -> str:
         """Truncate text to specified length with ellipsis"""
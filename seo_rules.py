@@ -0,0 +1,355 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, select
+
+
+# Validation sections, in the order their results are reported
+SECTIONS = ('title', 'description', 'og_tags', 'twitter_tags', 'technical', 'content')
+
+# Message added to a section none of whose rules fired, for sections that have one
+SECTION_OK_MESSAGES = {
+    'twitter_tags': 'Twitter Card tags are properly configured',
+    'technical': 'Technical SEO tags are properly configured',
+    'content': 'Content structure is well optimized'
+}
+
+# The scoring rules. Each entry is plain data; RuleSet compiles the table
+# into per-row and per-column scorers. Kinds:
+#   required     field is empty                      -> deduct
+#   length       field is present but outside min..max -> deduct (short/long), else ok
+#   all_present  some of fields are empty            -> deduct_each per empty field, else ok
+#   requires     field is set but needs is empty     -> deduct
+#   count        no items (deduct_none) or more than max (deduct_over)
+#   per_item     deduct_each per item, at most cap
+DEFAULT_RULES: Tuple[Dict[str, Any], ...] = (
+    {'section': 'title', 'kind': 'required', 'field': 'title', 'status': 'error', 'deduct': 15,
+     'message': 'Missing title tag'},
+    {'section': 'title', 'kind': 'length', 'field': 'title', 'min': 30, 'max': 60, 'deduct': 5,
+     'short': 'Title too short ({length} chars). Recommended: {min}-{max} characters',
+     'long': 'Title too long ({length} chars). Recommended: {min}-{max} characters',
+     'ok': 'Title length is optimal'},
+
+    {'section': 'description', 'kind': 'required', 'field': 'description', 'status': 'error', 'deduct': 15,
+     'message': 'Missing meta description'},
+    {'section': 'description', 'kind': 'length', 'field': 'description', 'min': 120, 'max': 160, 'deduct': 5,
+     'short': 'Description too short ({length} chars). Recommended: {min}-{max} characters',
+     'long': 'Description too long ({length} chars). Recommended: {min}-{max} characters',
+     'ok': 'Description length is optimal'},
+
+    {'section': 'og_tags', 'kind': 'all_present', 'fields': ['og_title', 'og_description', 'og_image'],
+     'labels': ['og:title', 'og:description', 'og:image'], 'deduct_each': 3,
+     'message': 'Missing Open Graph tags: {missing}', 'ok': 'All essential Open Graph tags present'},
+
+    {'section': 'twitter_tags', 'kind': 'required', 'field': 'twitter_card', 'deduct': 5,
+     'message': 'Missing Twitter Card type'},
+    {'section': 'twitter_tags', 'kind': 'requires', 'field': 'twitter_card', 'needs': 'twitter_image', 'deduct': 3,
+     'message': 'Twitter Card specified but missing image'},
+
+    {'section': 'technical', 'kind': 'required', 'field': 'canonical', 'deduct': 5,
+     'message': 'Missing canonical URL'},
+    {'section': 'technical', 'kind': 'required', 'field': 'viewport', 'deduct': 5,
+     'message': 'Missing viewport meta tag'},
+
+    {'section': 'content', 'kind': 'count', 'field': 'h1', 'max': 1, 'deduct_none': 10, 'deduct_over': 5,
+     'none': 'No H1 tags found', 'over': 'Multiple H1 tags found ({count}). Use only one H1 per page'},
+    {'section': 'content', 'kind': 'per_item', 'field': 'image_alt_missing', 'deduct_each': 2, 'cap': 10,
+     'message': '{image_alt_missing} out of {total_images} images missing alt attributes'}
+)
+
+
+# Sections whose inputs every stored analysis has. Rows stored before
+# h1_count was recorded have no content inputs, and the first release
+# saved the og/twitter fields under keys the analyzer never set, so those
+# rows cannot be rescored for the other sections
+LEGACY_SCORED_SECTIONS = ('title', 'description', 'technical')
+
+
+def stored_features(SeoAnalysis) -> Dict[str, Any]:
+    """Rule inputs as SQL expressions over stored seo_analyses columns, for section_deductions()"""
+
+    def present(column):
+        return and_(column.isnot(None), column != '')
+
+    return {
+        'title_present': SeoAnalysis.title_length > 0,
+        'title_length': SeoAnalysis.title_length,
+        'description_present': SeoAnalysis.description_length > 0,
+        'description_length': SeoAnalysis.description_length,
+        'og_title_present': present(SeoAnalysis.og_title),
+        'og_description_present': present(SeoAnalysis.og_description),
+        'og_image_present': SeoAnalysis.og_image_id.isnot(None),
+        'twitter_card_present': present(SeoAnalysis.twitter_card),
+        'twitter_image_present': present(SeoAnalysis.twitter_image),
+        'canonical_present': present(SeoAnalysis.canonical_url),
+        'viewport_present': present(SeoAnalysis.viewport),
+        'h1_count': SeoAnalysis.h1_count,
+        'image_alt_missing': SeoAnalysis.image_alt_missing,
+        'total_images': SeoAnalysis.total_images
+    }
+
+
+# Compiled form of one rule: a row checker over meta_data returning (deduction,
+# status, message) or None, and a column scorer over rule inputs (see
+# stored_features) returning one deduction per row.
+RowCheck = Callable[[Dict[str, Any]], Optional[Tuple[int, str, str]]]
+ColumnScore = Callable[[Dict[str, List[Any]]], List[int]]
+
+
+def _compile_required(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    present, deduct = rule['field'] + '_present', rule['deduct']
+    status, message = rule.get('status', 'warning'), rule['message']
+
+    field = rule['field']
+
+    def check(meta_data):
+        if not meta_data[field]:
+            return deduct, status, message
+        return None
+
+    def score(columns):
+        return [0 if value else deduct for value in columns[present]]
+
+    return check, score
+
+
+def _compile_length(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    length_key, deduct = rule['field'] + '_length', rule['deduct']
+    minimum, maximum = rule['min'], rule['max']
+    status = rule.get('status', 'warning')
+    short, long, ok = rule['short'], rule['long'], rule.get('ok')
+
+    field = rule['field']
+
+    def check(meta_data):
+        length = len(meta_data[field] or '')
+        if not length:
+            return None
+        if length < minimum:
+            return deduct, status, short.format(length=length, min=minimum, max=maximum)
+        if length > maximum:
+            return deduct, status, long.format(length=length, min=minimum, max=maximum)
+        return (0, 'success', ok) if ok else None
+
+    def score(columns):
+        return [deduct if length and (length < minimum or length > maximum) else 0
+                for length in columns[length_key]]
+
+    return check, score
+
+
+def _compile_all_present(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    keys = [field + '_present' for field in rule['fields']]
+    labels, each = rule['labels'], rule['deduct_each']
+    status, message, ok = rule.get('status', 'warning'), rule['message'], rule.get('ok')
+
+    fields = list(zip(rule['fields'], labels))
+
+    def check(meta_data):
+        missing = [label for field, label in fields if not meta_data[field]]
+        if missing:
+            return len(missing) * each, status, message.format(missing=', '.join(missing))
+        return (0, 'success', ok) if ok else None
+
+    def score(columns):
+        return [each * sum(not value for value in values) for values in zip(*(columns[key] for key in keys))]
+
+    return check, score
+
+
+def _compile_requires(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    present, needed, deduct = rule['field'] + '_present', rule['needs'] + '_present', rule['deduct']
+    status, message = rule.get('status', 'warning'), rule['message']
+
+    field, needs = rule['field'], rule['needs']
+
+    def check(meta_data):
+        if meta_data[field] and not meta_data[needs]:
+            return deduct, status, message
+        return None
+
+    def score(columns):
+        return [deduct if has and not has_needed else 0 for has, has_needed in zip(columns[present], columns[needed])]
+
+    return check, score
+
+
+def _compile_count(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    count_key, maximum = rule['field'] + '_count', rule['max']
+    deduct_none, deduct_over = rule['deduct_none'], rule['deduct_over']
+    status, none, over = rule.get('status', 'warning'), rule['none'], rule['over']
+
+    items_key = rule['field'] + '_tags'
+
+    def check(meta_data):
+        count = len(meta_data[items_key])
+        if not count:
+            return deduct_none, status, none
+        if count > maximum:
+            return deduct_over, status, over.format(count=count)
+        return None
+
+    def score(columns):
+        # Rows stored before the count was recorded score nothing here
+        return [0 if count is None else deduct_none if not count else deduct_over if count > maximum else 0
+                for count in columns[count_key]]
+
+    return check, score
+
+
+def _compile_per_item(rule: Dict[str, Any]) -> Tuple[RowCheck, ColumnScore]:
+    key, each, cap = rule['field'], rule['deduct_each'], rule['cap']
+    status, message = rule.get('status', 'warning'), rule['message']
+
+    def check(meta_data):
+        items = meta_data[key]
+        if items > 0:
+            return min(items * each, cap), status, message.format(**meta_data)
+        return None
+
+    def score(columns):
+        return [min(items * each, cap) if items else 0 for items in columns[key]]
+
+    return check, score
+
+
+RULE_KINDS = {
+    'required': _compile_required,
+    'length': _compile_length,
+    'all_present': _compile_all_present,
+    'requires': _compile_requires,
+    'count': _compile_count,
+    'per_item': _compile_per_item
+}
+
+
+class RuleSet:
+    """A compiled rule table
+
+    validate() builds the full per-section validation for one page, exactly
+    as the hand-written checks did. section_deductions() scores whole
+    columns of stored rule inputs at once, for re-scoring without refetching.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = DEFAULT_RULES):
+        self.rules = [dict(rule) for rule in rules]
+        for rule in self.rules:
+            if rule['section'] not in SECTIONS:
+                raise ValueError(f"Unknown rule section: {rule['section']}")
+            if rule['kind'] not in RULE_KINDS:
+                raise ValueError(f"Unknown rule kind: {rule['kind']}")
+
+        self._checks: List[Tuple[str, RowCheck]] = []
+        self._scores: List[Tuple[str, ColumnScore]] = []
+        for rule in self.rules:
+            check, score = RULE_KINDS[rule['kind']](rule)
+            self._checks.append((rule['section'], check))
+            self._scores.append((rule['section'], score))
+
+        # Identifies the table, e.g. to keep memoized validations from other rules apart
+        self.version = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def validate(self, meta_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-section statuses and messages plus the overall score for one page"""
+        validation: Dict[str, Any] = {section: {'status': 'success', 'messages': []} for section in SECTIONS}
+        deduction = 0
+
+        for section, check in self._checks:
+            outcome = check(meta_data)
+            if outcome is None:
+                continue
+            points, status, message = outcome
+            result = validation[section]
+            if status != 'success' and result['status'] != 'error':
+                result['status'] = status
+            result['messages'].append(message)
+            deduction += points
+
+        for section, message in SECTION_OK_MESSAGES.items():
+            if validation[section]['status'] == 'success':
+                validation[section]['messages'].append(message)
+
+        validation['overall_score'] = max(0, 100 - deduction)
+        return validation
+
+    def section_deductions(self, columns: Dict[str, List[Any]]) -> Dict[str, List[int]]:
+        """Points deducted per section for every row of a chunk of rule input columns"""
+        size = len(next(iter(columns.values()))) if columns else 0
+        totals = {section: [0] * size for section in SECTIONS}
+        for section, score in self._scores:
+            totals[section] = [total + points for total, points in zip(totals[section], score(columns))]
+        return totals
+
+
+def load_rules(path: str) -> RuleSet:
+    """Compile a rule table stored as a JSON list in the DEFAULT_RULES format"""
+    with open(path, encoding='utf-8') as handle:
+        return RuleSet(json.load(handle))
+
+
+def rescore_analyses(db, SeoAnalysis, rules: RuleSet, chunk_size: int = 5000) -> Dict[str, int]:
+    """Recompute overall_score of every stored successful analysis, without refetching
+
+    Rows are read by id in chunks, selecting only the rule inputs, which
+    are scored a column at a time; only rows whose score changed are
+    written, one transaction per chunk.
+
+    Rows stored before h1_count was recorded are only rescored for
+    LEGACY_SCORED_SECTIONS. The first rescore works out what the other
+    sections deducted under DEFAULT_RULES, which scored them, and keeps
+    that in legacy_deduction for this and every later rescore.
+    """
+    inputs = stored_features(SeoAnalysis)
+    names = list(inputs)
+    legacy_rules = RuleSet(DEFAULT_RULES)
+    table = SeoAnalysis.__table__
+
+    last_id, scanned, changed = 0, 0, 0
+    while True:
+        rows = db.session.execute(
+            select(SeoAnalysis.id, SeoAnalysis.overall_score, SeoAnalysis.legacy_deduction,
+                   *[expression.label(name) for name, expression in inputs.items()])
+            .where(SeoAnalysis.id > last_id, SeoAnalysis.error_message.is_(None))
+            .order_by(SeoAnalysis.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        columns = {name: [getattr(row, name) for row in rows] for name in names}
+        for name in ('title_length', 'description_length', 'image_alt_missing', 'total_images'):
+            columns[name] = [value or 0 for value in columns[name]]
+        deductions = rules.section_deductions(columns)
+
+        # What the sections without stored inputs deducted from rows that predate them.
+        # Not clamped: with unchanged rules the score must come out exactly as stored
+        legacy = [row.legacy_deduction for row in rows]
+        needs_legacy = [i for i, row in enumerate(rows) if row.h1_count is None and legacy[i] is None]
+        if needs_legacy:
+            old = legacy_rules.section_deductions(columns)
+            for i in needs_legacy:
+                scored = sum(old[section][i] for section in LEGACY_SCORED_SECTIONS)
+                legacy[i] = 100 - (rows[i].overall_score or 0) - scored
+
+        updates = []
+        for i, row in enumerate(rows):
+            if row.h1_count is None:
+                total = legacy[i] + sum(deductions[section][i] for section in LEGACY_SCORED_SECTIONS)
+            else:
+                total = sum(deductions[section][i] for section in SECTIONS)
+            score = max(0, 100 - total)
+            if score != row.overall_score or legacy[i] != row.legacy_deduction:
+                updates.append({'row_id': row.id, 'score': score, 'legacy': legacy[i]})
+
+        if updates:
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('row_id'))
+                .values(overall_score=bindparam('score'), legacy_deduction=bindparam('legacy')),
+                updates
+            )
+            changed += len(updates)
+        db.session.commit()
+
+    return {'scanned': scanned, 'changed': changed}
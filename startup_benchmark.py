@@ -0,0 +1,92 @@
+"""Measure cold start: time to import app.py and to serve its first response
+
+Every sample runs in a fresh interpreter, once with the default startup
+and once with SEO_FAST_START=1, and the results are printed as JSON so
+runs can be compared. A throwaway SQLite database is used unless
+DATABASE_URL is set.
+
+    python startup_benchmark.py --runs 10 [--path /]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+
+# Runs inside each fresh interpreter; prints one JSON line
+SAMPLE = r'''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+answered = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'first_response': answered - started,
+    'status': response.status_code,
+    'heavy_modules_loaded': sorted(name for name in ('requests', 'bs4', 'lxml', 'seo_analyzer') if name in sys.modules)
+}))
+'''
+
+MODES = {'default': {}, 'fast_start': {'SEO_FAST_START': '1'}}
+
+
+def run_sample(env: Dict[str, str], path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', SAMPLE, path], env=env, capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    sample = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Interpreter start and shutdown included
+    sample['process'] = time.perf_counter() - started
+    return sample
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'median_ms': round(statistics.median(values) * 1000, 1),
+        'min_ms': round(min(values) * 1000, 1),
+        'max_ms': round(max(values) * 1000, 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per mode')
+    parser.add_argument('--path', default='/', help='Route requested as the first response')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='seo-startup-')
+    try:
+        base_env = dict(os.environ)
+        base_env.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(scratch, "startup.db")}')
+        base_env.setdefault('SEO_ARCHIVE_DIR', os.path.join(scratch, 'archive'))
+        base_env.setdefault('SEO_CACHE_PATH', os.path.join(scratch, 'cache.db'))
+        base_env.setdefault('SEO_LOG_LEVEL', 'WARNING')
+
+        # Fast start expects the schema to exist already, as after `flask init-db`
+        run_sample(base_env, args.path)
+
+        report: Dict[str, Any] = {'runs': args.runs, 'path': args.path, 'python': sys.version.split()[0]}
+        for mode, overrides in MODES.items():
+            samples = [run_sample(dict(base_env, **overrides), args.path) for _ in range(args.runs)]
+            report[mode] = {
+                'import': summarize([sample['import'] for sample in samples]),
+                'first_response': summarize([sample['first_response'] for sample in samples]),
+                'process': summarize([sample['process'] for sample in samples]),
+                'status': samples[-1]['status'],
+                'heavy_modules_loaded': samples[-1]['heavy_modules_loaded']
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
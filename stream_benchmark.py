@@ -0,0 +1,94 @@
+"""Compare full and head-only streamed fetches: bytes read and time per analysis
+
+Analyzes the same pages with SEOAnalyzer(stream_head_only=False) and
+SEOAnalyzer(stream_head_only=True) and prints bytes read, latency and
+which checks ran on partial content, as JSON. Pages come from a local
+FixtureServer unless --url is given:
+
+    python stream_benchmark.py --runs 20 --pages huge,typical [--body-budget 16384]
+    python stream_benchmark.py --runs 5 --url https://example.com/
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from fixture_server import PAGES, FixtureServer
+from load_benchmark import summarize_latencies
+from seo_analyzer import SEOAnalyzer
+
+
+MODES = ('full', 'stream')
+
+
+def run_mode(analyzer: SEOAnalyzer, urls: List[str]) -> Dict[str, Any]:
+    seconds, bytes_read, results = [], [], None
+    for url in urls:
+        started = time.perf_counter()
+        results = analyzer.analyze_url(url)
+        seconds.append(time.perf_counter() - started)
+        if results.get('error'):
+            raise RuntimeError(f'{url}: {results["error"]}')
+        bytes_read.append(results['fetch']['bytes_read'])
+    return {
+        'bytes_read': int(statistics.median(bytes_read)),
+        'latency_ms': summarize_latencies(seconds),
+        'truncated': results['fetch']['truncated'],
+        'partial_checks': results['fetch']['partial_checks'],
+        'overall_score': results['validation']['overall_score']
+    }
+
+
+def benchmark(url_for_run, runs: int, body_budget: int, parser_backend: str) -> Dict[str, Any]:
+    """Both modes for one page; url_for_run(mode, i) gives distinct URLs where the server allows it"""
+    analyzers = {
+        'full': SEOAnalyzer(parser_backend=parser_backend),
+        'stream': SEOAnalyzer(stream_head_only=True, body_byte_budget=body_budget, parser_backend=parser_backend)
+    }
+    report = {mode: run_mode(analyzers[mode], [url_for_run(mode, i) for i in range(runs)]) for mode in MODES}
+    full, stream = report['full'], report['stream']
+    report['bytes_saved_pct'] = round((1 - stream['bytes_read'] / full['bytes_read']) * 100, 1) if full['bytes_read'] else 0.0
+    report['p50_speedup'] = round(full['latency_ms']['p50'] / stream['latency_ms']['p50'], 2) if stream['latency_ms']['p50'] else None
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='Analyses per page and mode')
+    parser.add_argument('--pages', default='huge,typical,many-images', help=f'Fixture pages, from {", ".join(PAGES)}')
+    parser.add_argument('--url', action='append', default=[], help='Benchmark this URL instead of the fixture pages (repeatable)')
+    parser.add_argument('--body-budget', type=int, default=0, help='Body bytes kept after </head> in stream mode')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fixture server waits before answering')
+    parser.add_argument('--parser-backend', default='single_pass', help='Parser backend for both modes')
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        'runs': args.runs,
+        'body_budget': args.body_budget,
+        'parser_backend': args.parser_backend,
+        'python': sys.version.split()[0],
+        'pages': {}
+    }
+
+    if args.url:
+        for url in args.url:
+            report['pages'][url] = benchmark(lambda mode, i, url=url: url, args.runs, args.body_budget,
+                                             args.parser_backend)
+    else:
+        with FixtureServer(latency=args.latency) as server:
+            for page in [page.strip() for page in args.pages.split(',') if page.strip()]:
+                if page not in PAGES:
+                    parser.error(f'Unknown page: {page}')
+                # Distinct URLs per mode and run, as a real crawl would fetch
+                report['pages'][page] = benchmark(
+                    lambda mode, i, page=page: server.url(page, MODES.index(mode) * args.runs + i), args.runs,
+                    args.body_budget, args.parser_backend
+                )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
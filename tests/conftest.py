@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app reads its configuration at import, so point it at throwaway storage first
+SCRATCH = tempfile.mkdtemp(prefix='seo-tests-')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(SCRATCH, "test.db")}')
+os.environ.setdefault('SEO_ARCHIVE_DIR', os.path.join(SCRATCH, 'archive'))
+os.environ.setdefault('SEO_CACHE_PATH', os.path.join(SCRATCH, 'cache.db'))
+os.environ.setdefault('SEO_LOG_LEVEL', 'WARNING')
+
+from fixture_server import FixtureServer  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture
+def fixture_site():
+    """A local FixtureServer answering straight away"""
+    with FixtureServer() as server:
+        yield server
+
+
+@pytest.fixture
+def app_db():
+    """The app module with freshly created, empty tables, inside an app context"""
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.db.session.remove()
+        app_module.db.drop_all()
+        # Cached dimension ids point at rows that no longer exist
+        app_module.dimension_resolver._known.clear()
+        app_module.init_database()
+        yield app_module
+        app_module.db.session.remove()
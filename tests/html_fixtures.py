@@ -0,0 +1,37 @@
+"""Saved pages and generated malformed markup shared by the parser tests"""
+import os
+import random
+from typing import Dict
+
+from fixture_server import PAGES
+
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'pages')
+
+
+def saved_pages() -> Dict[str, bytes]:
+    """The pages in tests/pages plus the load-test corpus, by name"""
+    pages = {}
+    for filename in sorted(os.listdir(PAGES_DIR)):
+        with open(os.path.join(PAGES_DIR, filename), 'rb') as handle:
+            pages[filename] = handle.read()
+    for name, build in PAGES.items():
+        pages[f'fixture:{name}'] = build().encode('utf-8')
+    return pages
+
+
+# Fragments random_document strings together, unbalanced on purpose
+FRAGMENTS = (
+    '<title>', '</title>', '<h1>', '</h1>', '<h2>', '</h2>', '<p>', '</p>', '<div>', '</div>',
+    '<span>', '</span>', '<pre>', '</pre>', '<textarea>', '</textarea>', '<script>', '</script>',
+    '<style>', '</style>', '<template>', '</template>', '<br>', '</br>', '<img src="a.png">',
+    '<img src="b.png" alt="B">', '<img alt="" />', '<meta name="description" content=" Desc ">',
+    '<meta property="og:title" content="OG">', '<meta name="twitter:card" content="summary">',
+    '<meta charset="utf-8">', '<link rel="canonical" href="/c">', '<head>', '</head>', '<body>', '</body>',
+    '<!-- comment -->', '<![CDATA[cdata]]>', '&amp;', '&copy', '&#65;', '&#x42;', '&bogus;',
+    ' ', '\n', '   \n  ', 'Text', 'More words', '<', '>', '</'
+)
+
+
+def random_document(rng: random.Random, length: int = 30) -> str:
+    return ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, length)))
@@ -0,0 +1,78 @@
+"""seo_analyses and domain_stats as the first release created them, for upgrade tests"""
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, Text
+
+metadata = MetaData()
+
+seo_analyses = Table(
+    'seo_analyses', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('url', String(2048), nullable=False, index=True),
+    Column('domain', String(255), nullable=False, index=True),
+    Column('title', Text),
+    Column('title_length', Integer),
+    Column('description', Text),
+    Column('description_length', Integer),
+    Column('keywords', Text),
+    Column('og_title', Text),
+    Column('og_description', Text),
+    Column('og_image', String(2048)),
+    Column('og_url', String(2048)),
+    Column('og_type', String(100)),
+    Column('og_site_name', String(255)),
+    Column('twitter_card', String(100)),
+    Column('twitter_title', Text),
+    Column('twitter_description', Text),
+    Column('twitter_image', String(2048)),
+    Column('twitter_site', String(255)),
+    Column('overall_score', Integer, default=0),
+    Column('title_score', Integer, default=0),
+    Column('description_score', Integer, default=0),
+    Column('og_score', Integer, default=0),
+    Column('twitter_score', Integer, default=0),
+    Column('has_title', Boolean, default=False),
+    Column('has_description', Boolean, default=False),
+    Column('has_keywords', Boolean, default=False),
+    Column('has_og_tags', Boolean, default=False),
+    Column('has_twitter_cards', Boolean, default=False),
+    Column('analysis_date', DateTime, default=datetime.utcnow, nullable=False),
+    Column('processing_time', Float),
+    Column('error_message', Text),
+    Column('canonical_url', String(2048)),
+    Column('robots', String(255)),
+    Column('viewport', String(255)),
+    Column('charset', String(50)),
+)
+
+domain_stats = Table(
+    'domain_stats', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('domain', String(255), unique=True, nullable=False, index=True),
+    Column('total_analyses', Integer, default=0),
+    Column('last_analysis', DateTime),
+    Column('avg_overall_score', Float, default=0.0),
+    Column('avg_title_score', Float, default=0.0),
+    Column('avg_description_score', Float, default=0.0),
+    Column('avg_og_score', Float, default=0.0),
+    Column('avg_twitter_score', Float, default=0.0),
+    Column('best_score', Integer, default=0),
+    Column('worst_score', Integer, default=100),
+    Column('created_date', DateTime, default=datetime.utcnow, nullable=False),
+    Column('updated_date', DateTime, default=datetime.utcnow),
+)
+
+
+def create(db, rows):
+    """Replace every table with the first release's schema holding rows, plus matching domain_stats"""
+    db.session.remove()
+    db.drop_all()
+    metadata.create_all(db.engine)
+    with db.engine.begin() as connection:
+        connection.execute(seo_analyses.insert(), rows)
+        for domain in sorted({row['domain'] for row in rows}):
+            scores = [row['overall_score'] for row in rows if row['domain'] == domain and not row.get('error_message')]
+            connection.execute(domain_stats.insert().values(
+                domain=domain, total_analyses=len(scores), avg_overall_score=sum(scores) / len(scores),
+                best_score=max(scores), worst_score=min(scores), last_analysis=datetime.utcnow()
+            ))
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import rollups
+from fixture_server import PAGES
+from seo_analyzer import SEOAnalyzer
+
+DOMAINS = ('old.example.com', 'mixed.example.com')
+
+
+@pytest.fixture
+def archived_app(app_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_db.analysis_archive, 'root', str(tmp_path / 'archive'))
+    return app_db
+
+
+def write_history(app):
+    """Seven analyses of fixture pages over three months, one of them failed"""
+    now = datetime.utcnow()
+    pages = list(PAGES)
+    plan = [
+        ('old.example.com', now - timedelta(days=95), None),
+        ('old.example.com', now - timedelta(days=94), None),
+        ('mixed.example.com', now - timedelta(days=93), None),
+        ('mixed.example.com', now - timedelta(days=92), 'Request timed out'),
+        ('mixed.example.com', now - timedelta(days=2), None),
+        ('mixed.example.com', now - timedelta(days=1), None),
+        ('old.example.com', now - timedelta(hours=1), None),
+    ]
+    analyzer = SEOAnalyzer()
+    for number, (domain, analysis_date, error) in enumerate(plan):
+        page = pages[number % len(pages)]
+        url = f'https://{domain}/{page}'
+        if error:
+            row = app.build_analysis_row(url, None, error, 0.1)
+        else:
+            results = analyzer._analyze_content(PAGES[page]().encode('utf-8'), url, {})
+            row = app.build_analysis_row(url, results, None, 0.1)
+        row['analysis_date'] = analysis_date
+        app.write_analyses([row])
+    return now
+
+
+def snapshot(app):
+    app.db.session.expire_all()
+    global_stats = app.GlobalStats.current()
+    domains = {
+        stats.domain: (stats.total_analyses, stats.sum_overall_score, stats.best_score, stats.worst_score)
+        for stats in app.DomainStats.query.all()
+    }
+    trends = {domain: rollups.query_trend(app.db.session, app.ScoreRollup, domain, 'day') for domain in DOMAINS}
+    return (global_stats.total_analyses, global_stats.error_count, global_stats.score_sum), domains, trends
+
+
+def test_rebuild_keeps_archived_analyses(archived_app):
+    app = archived_app
+    now = write_history(app)
+    before = snapshot(app)
+    assert before[0][0] == 7
+
+    assert app.analysis_archive.archive_before(app.db, app.SeoAnalysis, now - timedelta(days=30)) == 4
+    assert app.SeoAnalysis.query.count() == 3
+    assert snapshot(app) == before
+
+    app.rebuild_stats()
+    assert snapshot(app) == before
+
+
+def test_rescore_rebuild_keeps_archived_analyses(archived_app):
+    app = archived_app
+    now = write_history(app)
+    before = snapshot(app)
+    app.analysis_archive.archive_before(app.db, app.SeoAnalysis, now - timedelta(days=30))
+
+    result = app.app.test_cli_runner().invoke(args=['rescore-analyses'])
+    assert result.exit_code == 0, result.output
+    assert snapshot(app) == before
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_analyzer import AsyncSEOAnalyzer, analyze_many
+from fixture_server import FixtureServer
+from politeness import HostScheduler
+from result_cache import create_cache
+
+LATENCY = 0.2
+
+
+@pytest.fixture
+def slow_site():
+    with FixtureServer(latency=LATENCY) as server:
+        yield server
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        yield pool
+
+
+async def gather_with_ticker(analyzer, urls):
+    """Analyze urls concurrently while a ticker measures the longest stall of the event loop"""
+    gaps = []
+    running = True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    try:
+        results = await asyncio.gather(*(analyzer.analyze_url_async(url) for url in urls))
+    finally:
+        running = False
+        await tick
+        await analyzer.close()
+    return results, max(gaps)
+
+
+def test_urls_are_analyzed_concurrently_without_blocking_the_loop(slow_site, executor):
+    urls = [slow_site.url('typical', n) for n in range(8)]
+    analyzer = AsyncSEOAnalyzer(executor=executor)
+
+    started = time.perf_counter()
+    results, longest_stall = asyncio.run(gather_with_ticker(analyzer, urls))
+    elapsed = time.perf_counter() - started
+
+    assert [r['error'] for r in results] == [None] * len(urls)
+    assert [r['url'] for r in results] == urls
+    assert all(r['meta_data']['title'] == 'A typical article page with a reasonable title' for r in results)
+    # Serially this takes len(urls) * LATENCY
+    assert elapsed < len(urls) * LATENCY / 2
+    assert longest_stall < LATENCY / 2
+
+
+def test_results_match_the_sync_analyzer(fixture_site, executor):
+    url = fixture_site.url('many-images', 1)
+
+    async def run():
+        async with AsyncSEOAnalyzer(executor=executor) as analyzer:
+            return await analyzer.analyze_url_async(url)
+
+    results = asyncio.run(run())
+    expected = AsyncSEOAnalyzer().analyze_url(url)
+
+    for key in ('meta_data', 'validation', 'content_hash'):
+        assert results[key] == expected[key]
+    assert dict(results['previews']) == dict(expected['previews'])
+
+
+def test_shared_cache_serves_the_second_run(slow_site, executor):
+    cache = create_cache('memory', ttl=60, max_entries=100)
+    urls = [slow_site.url('tiny', n) for n in range(4)]
+
+    first = list(analyze_many(AsyncSEOAnalyzer(cache=cache, executor=executor), urls, concurrency=4))
+    requests_after_first = slow_site.stats()['requests']
+    second = list(analyze_many(AsyncSEOAnalyzer(cache=cache, executor=executor), urls, concurrency=4))
+
+    assert sorted(r['cache'] for r in first) == ['miss'] * 4
+    assert sorted(r['cache'] for r in second) == ['hit'] * 4
+    assert slow_site.stats()['requests'] == requests_after_first == 4
+    assert sorted(r['url'] for r in second) == sorted(urls)
+
+
+def test_host_scheduler_limits_concurrent_fetches(slow_site, executor):
+    scheduler = HostScheduler(rate=1000, burst=100, max_in_flight=2, max_wait=10)
+    urls = [slow_site.url('tiny', n) for n in range(6)]
+
+    started = time.perf_counter()
+    results = list(analyze_many(AsyncSEOAnalyzer(scheduler=scheduler, executor=executor), urls, concurrency=6))
+    elapsed = time.perf_counter() - started
+
+    assert [r['error'] for r in results] == [None] * len(urls)
+    # Two at a time against the one host: three rounds of LATENCY
+    assert elapsed >= 3 * LATENCY
+    host = scheduler.stats()['hosts'][f'127.0.0.1:{slow_site.port}']
+    assert host['requests'] == len(urls)
+    assert host['in_flight'] == 0 and host['waiting'] == 0
+
+
+def test_errors_are_reported_per_url(fixture_site, executor):
+    urls = ['not a url', fixture_site.url('missing'), fixture_site.url('tiny')]
+
+    results = {r['url']: r for r in analyze_many(AsyncSEOAnalyzer(executor=executor), urls, concurrency=3)}
+
+    assert results['not a url']['error'] == 'Invalid URL format. Please enter a valid URL.'
+    assert results[fixture_site.url('missing')]['error'].startswith('HTTP error 404')
+    assert results[fixture_site.url('tiny')]['error'] is None
+    assert all(r['processing_time'] >= 0 for r in results.values())
+
+
+def test_stopping_early_cancels_the_rest(slow_site, executor):
+    urls = [slow_site.url('tiny', n) for n in range(50)]
+
+    results = analyze_many(AsyncSEOAnalyzer(executor=executor), urls, concurrency=2)
+    first = next(results)
+    results.close()
+
+    assert first['error'] is None
+    time.sleep(LATENCY)
+    assert slow_site.stats()['requests'] < len(urls)
+
+
+def test_analyze_urls_command_saves_results(app_db, fixture_site, tmp_path):
+    urls = [fixture_site.url('typical', n) for n in range(3)]
+    listing = tmp_path / 'urls.txt'
+    listing.write_text('# to analyze\n' + '\n'.join(urls[1:]) + '\n')
+
+    outcome = app_db.app.test_cli_runner().invoke(args=['analyze-urls', urls[0], '--input', str(listing),
+                                                        '--concurrency', '3'])
+
+    assert outcome.exit_code == 0, outcome.output
+    assert 'Analyzed 3 URLs (0 failed)' in outcome.output
+    stored = app_db.db.session.query(app_db.SeoAnalysis).all()
+    assert len(stored) == 3
+    assert all(row.overall_score is not None for row in stored)
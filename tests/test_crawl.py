@@ -0,0 +1,83 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawl import SiteCrawler, site_hosts
+from seo_analyzer import SEOAnalyzer
+
+CANONICAL_HOST = 'localhost'
+
+PAGES = {
+    '/': '<a href="/a">A</a> <a href="b">B</a> <a href="http://{host}/c">C</a> <a href="/">Home</a>',
+    '/a': '<a href="/b">B</a>',
+    '/b': '<a href="/">Home</a>',
+    '/c': '',
+}
+
+
+@pytest.fixture
+def redirecting_site():
+    """A site served on localhost that redirects every request for 127.0.0.1 there, like apex to www"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            host = self.headers['Host']
+            if not host.startswith(CANONICAL_HOST + ':'):
+                self.send_response(301)
+                self.send_header('Location', f'http://{CANONICAL_HOST}:{port}{self.path}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = PAGES.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            html = f'<html><head><title>Page {self.path}</title></head><body>{body.format(host=host)}</body></html>'
+            content = html.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{port}/'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_crawl_follows_the_root_redirect_to_another_host(redirecting_site):
+    crawler = SiteCrawler(SEOAnalyzer(), max_pages=20, concurrency=2)
+    results = list(crawler.crawl(redirecting_site))
+
+    assert [result.get('error') for result in results] == [None] * 4
+    port = redirecting_site.rsplit(':', 1)[1].rstrip('/')
+    assert f'{CANONICAL_HOST}:{port}' in crawler.hosts
+    # The root is analyzed once, under the URL the crawl started from
+    assert sorted(result['url'].split(':', 2)[2] for result in results) == [
+        f'{port}/', f'{port}/a', f'{port}/b', f'{port}/c'
+    ]
+    assert crawler.stats['analyzed'] == 4
+
+
+def test_www_and_bare_hosts_are_the_same_site():
+    assert site_hosts('example.com') == {'example.com', 'www.example.com'}
+    assert site_hosts('www.example.com:8080') == {'www.example.com:8080', 'example.com:8080'}
+
+    crawler = SiteCrawler(SEOAnalyzer())
+    crawler.hosts = site_hosts('example.com')
+    for link in ('https://www.example.com/about', 'https://example.com/contact', 'https://other.example.com/',
+                 'https://www.example.org/'):
+        crawler._admit(link, 1)
+    assert [crawler.frontier.pop()[0] for _ in range(len(crawler.frontier))] == [
+        'https://www.example.com/about', 'https://example.com/contact'
+    ]
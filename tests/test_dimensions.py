@@ -0,0 +1,103 @@
+import logging
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+
+import dimensions
+import legacy_schema
+
+ROWS = [
+    {'url': 'https://a.example.com/', 'domain': 'a.example.com', 'overall_score': 80, 'title_score': 100,
+     'og_image': 'https://a.example.com/card.png', 'analysis_date': datetime(2024, 1, 2)},
+    {'url': 'https://a.example.com/about', 'domain': 'a.example.com', 'overall_score': 60, 'title_score': 70,
+     'og_site_name': 'A', 'analysis_date': datetime(2024, 1, 3)},
+    {'url': 'https://b.example.com/', 'domain': 'b.example.com', 'overall_score': 40, 'title_score': 40,
+     'twitter_site': '@b', 'analysis_date': datetime(2024, 1, 4)},
+]
+
+
+@pytest.fixture
+def legacy_app(app_db):
+    legacy_schema.create(app_db.db, [dict({'og_image': None, 'og_site_name': None, 'twitter_site': None}, **row)
+                                     for row in ROWS])
+    app_db.dimension_resolver._known.clear()
+    yield app_db
+    app_db.db.session.remove()
+
+
+def test_startup_leaves_legacy_columns_alone(legacy_app, caplog):
+    app = legacy_app
+    with caplog.at_level(logging.WARNING, logger=app.app.logger.name):
+        app.init_database()
+
+    assert dimensions.legacy_columns(app.db) == list(dimensions.LEGACY_COLUMNS)
+    assert 'migrate-dimensions' in caplog.text
+    # The sums backfill waits for the migration instead of counting no rows
+    sums = app.db.session.execute(select(app.DomainStats.sum_overall_score)).scalars().all()
+    assert sums == [None, None]
+
+
+def test_migrate_dimensions_command(legacy_app):
+    app = legacy_app
+    app.init_database()
+
+    result = app.app.test_cli_runner().invoke(args=['migrate-dimensions', '--yes'])
+    assert result.exit_code == 0, result.output
+    assert dimensions.legacy_columns(app.db) == []
+
+    app.db.session.expire_all()
+    analyses = app.SeoAnalysis.query.order_by(app.SeoAnalysis.id).all()
+    assert [(analysis.url, analysis.domain) for analysis in analyses] == [(row['url'], row['domain']) for row in ROWS]
+    assert analyses[0].og_image == 'https://a.example.com/card.png'
+    assert analyses[2].twitter_site == '@b'
+
+    stats = {stats.domain: stats for stats in app.DomainStats.query.all()}
+    assert stats['a.example.com'].total_analyses == 2
+    assert stats['a.example.com'].sum_overall_score == 140
+    assert stats['b.example.com'].sum_title_score == 40
+
+
+def test_migrate_dimensions_asks_first(legacy_app):
+    app = legacy_app
+    result = app.app.test_cli_runner().invoke(args=['migrate-dimensions'], input='n\n')
+    assert result.exit_code != 0
+    assert dimensions.legacy_columns(app.db) == list(dimensions.LEGACY_COLUMNS)
+
+
+def test_writes_and_reads_before_migrating(legacy_app):
+    app = legacy_app
+    app.init_database()
+    client = app.app.test_client()
+
+    app.save_analysis_to_db('https://c.example.com/', {
+        'meta_data': {'title': 'New page', 'og_site_name': 'C'},
+        'validation': {'overall_score': 70}
+    }, None, 0.5)
+    app.save_analysis_to_db('https://a.example.com/broken', None, 'HTTP error 500: Server Error', 0.1)
+
+    history = client.get('/api/history').get_json()['analyses']
+    assert [(row['url'], row['domain']) for row in history] == [
+        ('https://a.example.com/broken', 'a.example.com'),
+        ('https://c.example.com/', 'c.example.com'),
+    ] + [(row['url'], row['domain']) for row in reversed(ROWS)]
+    filtered = client.get('/api/history?domain=a.example.com').get_json()['analyses']
+    assert [row['url'] for row in filtered] == ['https://a.example.com/broken', 'https://a.example.com/about',
+                                               'https://a.example.com/']
+
+    # New rows carry both the inline values and their dimension ids, so the migration leaves them as they are
+    inline = app.db.session.execute(text(
+        'SELECT url, domain, og_site_name, page_id IS NOT NULL FROM seo_analyses WHERE id > 3 ORDER BY id'
+    )).all()
+    assert [tuple(row) for row in inline] == [('https://c.example.com/', 'c.example.com', 'C', 1),
+                                              ('https://a.example.com/broken', 'a.example.com', None, 1)]
+
+    result = app.app.test_cli_runner().invoke(args=['migrate-dimensions', '--yes'])
+    assert result.exit_code == 0, result.output
+    assert 'Migrated 3 analyses' in result.output
+    assert client.get('/api/history').get_json()['analyses'] == history
+
+    app.db.session.expire_all()
+    stats = {stats.domain: stats for stats in app.DomainStats.query.all()}
+    assert stats['c.example.com'].total_analyses == 1
+    assert stats['a.example.com'].sum_overall_score == 140
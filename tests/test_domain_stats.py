@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import models
+from seo_analyzer import SEOAnalyzer
+from fixture_server import PAGES
+
+THREADS = 16
+WRITES_PER_THREAD = 20
+DOMAIN = 'stress.example.com'
+
+
+def analysis_results():
+    """Real analysis results with a spread of scores, one per fixture page"""
+    analyzer = SEOAnalyzer()
+    return [analyzer._analyze_content(build().encode('utf-8'), f'https://{DOMAIN}/{name}', {})
+            for name, build in PAGES.items()]
+
+
+@pytest.mark.parametrize('upsert', [True, False], ids=['upsert', 'update-then-insert'])
+def test_concurrent_writes_to_one_domain_are_exact(app_db, monkeypatch, upsert):
+    if not upsert:
+        monkeypatch.setattr(models, 'UPSERT_DIALECTS', ())
+    app = app_db
+    results = analysis_results()
+    errors = []
+    written = []
+    lock = threading.Lock()
+
+    def writer(thread_number):
+        with app.app.app_context():
+            try:
+                for i in range(WRITES_PER_THREAD):
+                    result = results[(thread_number + i) % len(results)]
+                    row = app.build_analysis_row(result['url'], result, None, 0.01)
+                    app.write_analyses([row])
+                    with lock:
+                        written.append(row)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                app.db.session.remove()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(written) == THREADS * WRITES_PER_THREAD
+
+    app.db.session.expire_all()
+    stats = app.DomainStats.query.filter_by(domain=DOMAIN).one()
+    assert stats.total_analyses == len(written)
+    for column in models.DomainStatsBatch.SCORE_COLUMNS:
+        assert getattr(stats, 'sum_' + column) == sum(row[column] for row in written), column
+    assert stats.best_score == max(row['overall_score'] for row in written)
+    assert stats.worst_score == min(row['overall_score'] for row in written)
+    assert stats.avg_overall_score == sum(row['overall_score'] for row in written) / len(written)
+
+    global_stats = app.GlobalStats.current()
+    assert global_stats.total_analyses == len(written)
+    assert global_stats.score_sum == sum(row['overall_score'] for row in written)
+
+
+def test_rebuild_matches_incremental_stats(app_db):
+    app = app_db
+    for result in analysis_results():
+        app.write_analyses([app.build_analysis_row(result['url'], result, None, 0.01)])
+    before = app.DomainStats.query.filter_by(domain=DOMAIN).one()
+    incremental = (before.total_analyses, before.sum_overall_score, before.best_score, before.worst_score)
+
+    models.rebuild_domain_stats(app.db)
+    app.db.session.expire_all()
+    after = app.DomainStats.query.filter_by(domain=DOMAIN).one()
+    assert (after.total_analyses, after.sum_overall_score, after.best_score, after.worst_score) == incremental
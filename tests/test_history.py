@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+TIE = datetime(2025, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def history_rows(app_db):
+    """Seven analyses, five of them sharing one analysis_date"""
+    app = app_db
+    dates = [datetime(2025, 3, 1, 12, 0, 5), TIE, TIE, TIE, TIE, TIE, datetime(2025, 3, 1, 11, 59, 0)]
+    rows = []
+    for n, date in enumerate(dates):
+        url = f'https://{"ab"[n % 2]}.example.com/page/{n}'
+        if n == 3:
+            row = app.build_analysis_row(url, None, 'HTTP error 500: Internal Server Error', 0.1)
+        else:
+            row = app.build_analysis_row(url, {'meta_data': {'title': f'Page {n}'},
+                                               'validation': {'overall_score': 10 * n}}, None, 0.1)
+        row['analysis_date'] = date
+        rows.append(row)
+    app.write_analyses(rows)
+    return app
+
+
+def page_through(client, limit, **filters):
+    """Every analysis /api/history returns, following next_cursor, and the number of pages"""
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = dict(filters, limit=limit, **({'cursor': cursor} if cursor else {}))
+        body = client.get('/api/history', query_string=query).get_json()
+        seen.extend(body['analyses'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4])
+def test_paging_across_a_date_tie_skips_and_repeats_nothing(history_rows, limit):
+    app = history_rows
+    expected = [(analysis.analysis_date.isoformat(), analysis.id) for analysis in
+                app.SeoAnalysis.query.order_by(app.SeoAnalysis.analysis_date.desc(), app.SeoAnalysis.id.desc())]
+
+    seen, pages = page_through(app.app.test_client(), limit)
+
+    assert [(row['analysis_date'], row['id']) for row in seen] == expected
+    assert len({row['id'] for row in seen}) == 7
+    assert pages == -(-7 // limit)
+
+
+def test_filtered_paging_across_a_date_tie(history_rows):
+    app = history_rows
+    client = app.app.test_client()
+
+    ok, _ = page_through(client, 2, status='ok', domain='a.example.com')
+    assert [row['url'] for row in ok] == ['https://a.example.com/page/0', 'https://a.example.com/page/4',
+                                          'https://a.example.com/page/2', 'https://a.example.com/page/6']
+
+    errors, _ = page_through(client, 1, status='error')
+    assert [row['url'] for row in errors] == ['https://b.example.com/page/3']
+
+
+def test_malformed_cursor_is_rejected(history_rows):
+    response = history_rows.app.test_client().get('/api/history?cursor=not-a-cursor')
+    assert response.status_code == 400
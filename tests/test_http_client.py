@@ -0,0 +1,86 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.exceptions import EmptyPoolError
+
+import http_client
+from fixture_server import FixtureServer
+from seo_analyzer import SEOAnalyzer
+
+
+@pytest.fixture
+def small_pool():
+    """One connection per host, waiting at most 0.2s for it"""
+    http_client.configure_pool(pool_maxsize=1, pool_timeout=0.2)
+    yield
+    defaults = http_client.DEFAULT_POOL_SETTINGS
+    http_client.configure_pool(pool_maxsize=defaults['pool_maxsize'], pool_timeout=defaults['pool_timeout'])
+
+
+def test_fetch_beyond_pool_maxsize_fails_after_pool_timeout(small_pool):
+    errors = []
+
+    def fetch(url):
+        try:
+            http_client.get_session().get(url, timeout=5)
+        except Exception as e:
+            errors.append((e, time.perf_counter() - started))
+
+    with FixtureServer(latency=1.0) as server:
+        threads = [threading.Thread(target=fetch, args=(server.url('tiny', n),)) for n in range(2)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(errors) == 1
+    error, waited = errors[0]
+    assert isinstance(error, EmptyPoolError)
+    assert waited < 0.9
+
+
+def test_pool_timeout_is_reported_as_busy():
+    message = SEOAnalyzer()._describe_error(EmptyPoolError(None, 'Pool is empty'))
+    assert message.startswith('Too many requests to this website')
+
+
+def test_connections_are_reused_for_one_host(fixture_site):
+    analyzer = SEOAnalyzer(instrument=True)
+    results = [analyzer.analyze_url(fixture_site.url('tiny', n)) for n in range(5)]
+
+    assert all(result['error'] is None for result in results)
+    # Only the first analysis opens a connection; the rest reuse it
+    assert ['connect' in result['timings'] for result in results] == [True, False, False, False, False]
+
+
+def test_pooled_session_keeps_no_cookies():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            received.append(self.headers.get('Cookie'))
+            self.send_response(200)
+            if self.path == '/login':
+                self.send_header('Set-Cookie', 'session=secret; Path=/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        session = http_client.get_session()
+        session.get(base + '/login', timeout=5)
+        session.get(base + '/other', timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert received == [None, None]
+    assert len(session.cookies) == 0
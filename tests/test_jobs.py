@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+
+
+class Runner:
+    """run_job that records the order URLs ran in; held at a gate until released"""
+
+    def __init__(self):
+        self.order = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def __call__(self, url):
+        self.started.set()
+        self.gate.wait(10)
+        self.order.append(url)
+        return {'error': None, 'url': url}
+
+
+def wait_until_idle(queue, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        stats = queue.stats()
+        if stats['queue_depth'] == 0 and stats['running'] == 0:
+            return stats
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_busy_domain_cannot_starve_another():
+    runner = Runner()
+    queue = jobs.AnalysisJobQueue(runner, workers=1, max_depth=1000, max_per_domain=100)
+
+    busy = [queue.submit(f'https://busy.example.com/{n}') for n in range(100)]
+    assert runner.started.wait(5)
+    other = queue.submit('https://other.example.com/')
+    runner.gate.set()
+    stats = wait_until_idle(queue)
+
+    # The worker was already on busy's first URL; the other domain goes next but one at most
+    assert runner.order.index(other.url) <= 2
+    assert sorted(runner.order) == sorted([job.url for job in busy] + [other.url])
+    assert [url for url in runner.order if 'busy' in url] == [job.url for job in busy]
+    assert stats['completed'] == 101 and stats['rejected'] == 0
+
+
+def test_domains_take_turns():
+    runner = Runner()
+    queue = jobs.AnalysisJobQueue(runner, workers=1)
+
+    queue.submit('https://hold.example.com/')
+    assert runner.started.wait(5)
+    for n in range(3):
+        for domain in ('a', 'b', 'c'):
+            if domain != 'c' or n == 0:
+                queue.submit(f'https://{domain}.example.com/{n}')
+    runner.gate.set()
+    wait_until_idle(queue)
+
+    assert [url.split('//')[1].split('.')[0] for url in runner.order[1:]] == ['a', 'b', 'c', 'a', 'b', 'a', 'b']
+
+
+def test_submit_rejects_when_full_and_recovers():
+    runner = Runner()
+    queue = jobs.AnalysisJobQueue(runner, workers=1, max_depth=3, max_per_domain=2)
+
+    running = queue.submit('https://a.example.com/running')
+    assert runner.started.wait(5)
+    queue.submit('https://a.example.com/1')
+    queue.submit('https://a.example.com/2')
+    with pytest.raises(jobs.QueueFull, match='a.example.com'):
+        queue.submit('https://a.example.com/3')
+
+    queue.submit('https://b.example.com/1')
+    with pytest.raises(jobs.QueueFull, match='queue is full'):
+        queue.submit('https://c.example.com/1')
+
+    stats = queue.stats()
+    assert stats['queue_depth'] == 3 and stats['running'] == 1 and stats['rejected'] == 2
+
+    runner.gate.set()
+    wait_until_idle(queue)
+    assert queue.get(running.id).status == jobs.DONE
+    queue.submit('https://c.example.com/1')
+    assert wait_until_idle(queue)['completed'] == 5
+
+
+def test_jobs_api_answers_503_when_full(app_db, monkeypatch):
+    app = app_db
+    runner = Runner()
+    monkeypatch.setattr(app, 'analysis_jobs', jobs.AnalysisJobQueue(runner, workers=1, max_depth=1))
+    client = app.app.test_client()
+
+    try:
+        first = client.post('/api/jobs', json={'url': 'https://a.example.com/'})
+        assert first.status_code == 202
+        assert runner.started.wait(5)
+        assert client.post('/api/jobs', json={'url': 'https://b.example.com/'}).status_code == 202
+
+        rejected = client.post('/api/jobs', json={'url': 'https://c.example.com/'})
+        assert rejected.status_code == 503
+        assert rejected.headers['Retry-After'] == str(app.app.config['SEO_JOB_RETRY_AFTER'])
+        assert 'queue is full' in rejected.get_json()['error']
+    finally:
+        runner.gate.set()
+    wait_until_idle(app.analysis_jobs)
+    assert client.get(first.get_json()['status_url']).get_json()['status'] == jobs.DONE
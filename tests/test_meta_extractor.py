@@ -0,0 +1,48 @@
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from html_fixtures import random_document, saved_pages
+from meta_extractor import empty_meta_data, extract_meta_tags
+from seo_analyzer import SEOAnalyzer
+
+PAGES = saved_pages()
+
+
+def soup_meta_data(content):
+    """meta_data from the original BeautifulSoup traversal"""
+    return SEOAnalyzer(parser_backend='html.parser')._extract_meta_tags(BeautifulSoup(content, 'html.parser'))
+
+
+def assert_same_fields(actual, expected):
+    assert set(actual) == set(expected) == set(empty_meta_data())
+    for field, value in expected.items():
+        assert actual[field] == value, field
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_single_pass_matches_soup_extraction(name):
+    assert_same_fields(extract_meta_tags(PAGES[name]), soup_meta_data(PAGES[name]))
+
+
+def test_single_pass_matches_soup_on_generated_malformed_markup():
+    rng = random.Random(2024)
+    for _ in range(500):
+        document = random_document(rng)
+        assert extract_meta_tags(document) == soup_meta_data(document), document
+
+
+def test_full_tag_set_is_extracted():
+    meta_data = extract_meta_tags(PAGES['full-tag-set.html'])
+    assert meta_data['title'] == 'Complete page with every tag the analyzer reads'
+    assert meta_data['canonical'] == 'https://example.com/complete'
+    assert meta_data['twitter_site'] == '@example'
+    assert meta_data['h1_tags'] == ['Main heading']
+    assert meta_data['h2_tags'] == ['First section', 'Second   section']
+    assert (meta_data['total_images'], meta_data['image_alt_missing']) == (3, 2)
+
+
+def test_single_pass_decodes_like_soup():
+    assert extract_meta_tags(PAGES['latin-1.html'])['title'] == 'Café crème brûlée'
+    assert extract_meta_tags(PAGES['utf-8-bom.html'])['h1_tags'] == ['日本語']
@@ -0,0 +1,137 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+import offline
+
+PAGES = {
+    f'page-{n:02d}.html': f'<html><head><title>Saved page number {n} of the site</title></head>'
+                          f'<body><h1>Page {n}</h1></body></html>'
+    for n in range(7)
+}
+
+
+def warc_record(headers, block):
+    lines = ['WARC/1.0'] + [f'{name}: {value}' for name, value in headers.items()]
+    lines.append(f'Content-Length: {len(block)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + block + b'\r\n\r\n'
+
+
+def http_response(status, body, headers=()):
+    head = [f'HTTP/1.1 {status}'] + [f'{name}: {value}' for name, value in headers]
+    return ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+
+
+@pytest.fixture
+def saved_site(tmp_path):
+    """A directory of HTML files plus a gzipped WARC of response and resource records"""
+    site = tmp_path / 'site'
+    site.mkdir()
+    for name, html in PAGES.items():
+        (site / name).write_text(html)
+
+    body = b'<html><head><title>Archived with a chunked gzip response</title></head><body></body></html>'
+    compressed = gzip.compress(body)
+    chunked = b'%x\r\n%s\r\n0\r\n\r\n' % (len(compressed), compressed)
+    records = [
+        warc_record({'WARC-Type': 'warcinfo'}, b'software: test'),
+        warc_record({'WARC-Type': 'response', 'WARC-Target-URI': 'https://archived.example.com/'},
+                    http_response('200 OK', chunked, [('Content-Type', 'text/html'), ('Transfer-Encoding', 'chunked'),
+                                                      ('Content-Encoding', 'gzip')])),
+        warc_record({'WARC-Type': 'response', 'WARC-Target-URI': 'https://archived.example.com/missing'},
+                    http_response('404 Not Found', b'gone', [('Content-Type', 'text/html')])),
+        warc_record({'WARC-Type': 'resource', 'WARC-Target-URI': 'https://archived.example.com/stored',
+                     'Content-Type': 'text/html'}, b'<html><head><title>Stored resource</title></head></html>'),
+        warc_record({'WARC-Type': 'response', 'WARC-Target-URI': 'https://archived.example.com/plain'},
+                    http_response('200 OK', b'<title>Plain response</title>', [('Content-Type', 'text/html')])),
+    ]
+    with gzip.open(site / 'zz-archive.warc.gz', 'wb') as handle:
+        handle.write(b''.join(records))
+    return site
+
+
+def read_sources(path, output_format):
+    with open(path, encoding='utf-8') as handle:
+        if output_format == 'csv':
+            return [row[0] for row in list(csv.reader(handle))[1:]]
+        return [json.loads(line)['source'] for line in handle]
+
+
+def run(app, *args):
+    return app.app.test_cli_runner().invoke(args=['analyze-offline', *map(str, args), '--workers', '1'])
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+def test_interrupted_run_resumes_without_repeating_results(app_db, saved_site, tmp_path, monkeypatch, output_format):
+    app = app_db
+    complete = tmp_path / f'complete.{output_format}'
+    assert run(app, saved_site, '--output', complete).exit_code == 0
+    expected = read_sources(complete, output_format)
+    assert len(expected) == len(PAGES) + 3
+    assert expected[-3:] == [f'{saved_site}/zz-archive.warc.gz#{n}' for n in (2, 4, 5)]
+
+    # Stop after five results; batches of two are written, so four reach the file
+    analyze_sources = offline.analyze_sources
+
+    def interrupted(*args, **kwargs):
+        for count, results in enumerate(analyze_sources(*args, **kwargs)):
+            if count == 5:
+                raise KeyboardInterrupt
+            yield results
+
+    monkeypatch.setattr(offline, 'analyze_sources', interrupted)
+    output = tmp_path / f'resumed.{output_format}'
+    assert run(app, saved_site, '--output', output, '--batch-size', '2').exit_code != 0
+    assert read_sources(output, output_format) == expected[:4]
+    written = output.read_bytes()
+    # A kill in the middle of a write leaves a partial line behind
+    with open(output, 'ab') as handle:
+        handle.write(b'{"source": "half a li' if output_format == 'jsonl' else b'half,a,li')
+
+    monkeypatch.setattr(offline, 'analyze_sources', analyze_sources)
+    analyzed, analyze_one = [], offline._analyze_one
+    monkeypatch.setattr(offline, '_analyze_one', lambda analyzer, key, *rest: analyzed.append(key) or
+                        analyze_one(analyzer, key, *rest))
+    result = run(app, saved_site, '--output', output, '--resume')
+
+    assert result.exit_code == 0, result.output
+    assert 'Resuming after 4 results' in result.output
+    assert analyzed == expected[4:]
+    assert output.read_bytes().startswith(written)
+    assert read_sources(output, output_format) == expected
+
+
+def test_resume_refuses_changed_inputs(app_db, saved_site, tmp_path):
+    app = app_db
+    output = tmp_path / 'results.jsonl'
+    assert run(app, saved_site / 'page-00.html', saved_site / 'page-01.html', '--output', output).exit_code == 0
+
+    result = run(app, saved_site / 'page-00.html', saved_site / 'page-02.html', '--output', output, '--resume')
+
+    assert result.exit_code != 0
+    assert 'Cannot resume' in result.output
+    assert len(read_sources(output, 'jsonl')) == 2
+
+
+def test_resumed_load_stores_each_page_once(app_db, saved_site, tmp_path, monkeypatch):
+    app = app_db
+    output = tmp_path / 'results.jsonl'
+    analyze_sources = offline.analyze_sources
+
+    def interrupted(*args, **kwargs):
+        for count, results in enumerate(analyze_sources(*args, **kwargs)):
+            if count == 3:
+                raise KeyboardInterrupt
+            yield results
+
+    monkeypatch.setattr(offline, 'analyze_sources', interrupted)
+    run(app, saved_site, '--output', output, '--batch-size', '2', '--load-db')
+    monkeypatch.setattr(offline, 'analyze_sources', analyze_sources)
+    assert run(app, saved_site, '--output', output, '--resume', '--load-db').exit_code == 0
+
+    app.db.session.expire_all()
+    stored = sorted(analysis.url for analysis in app.SeoAnalysis.query.all())
+    assert stored == sorted(json.loads(line)['url'] for line in output.read_text().splitlines())
+    assert len(stored) == len(PAGES) + 3
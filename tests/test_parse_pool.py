@@ -0,0 +1,57 @@
+import os
+import signal
+
+import pytest
+
+import parse_pool
+import seo_rules
+from fixture_server import PAGES
+from seo_analyzer import SEOAnalyzer
+
+
+def _recurse(content):
+    raise RecursionError('maximum recursion depth exceeded')
+
+
+def _break_worker():
+    """Make the worker's parser fail on every page, as a pathological page would"""
+    parse_pool._worker_analyzer._derive = _recurse
+
+
+@pytest.fixture
+def pool():
+    pool = parse_pool.ParsePool(1, 'single_pass', list(seo_rules.DEFAULT_RULES)).start()
+    yield pool
+    pool.close()
+
+
+def test_derive_matches_in_thread_parsing(pool):
+    content = PAGES['typical']().encode('utf-8')
+    assert pool.derive(content) == SEOAnalyzer(parser_backend='single_pass')._derive(content)
+
+
+def test_page_errors_reach_the_caller_and_keep_the_pool(pool):
+    executor = pool._executor
+    with pytest.raises(TypeError):
+        pool.derive(None)
+    assert pool._executor is executor
+
+    # A RuntimeError subclass, once mistaken for a shut-down pool
+    executor.submit(_break_worker).result()
+    with pytest.raises(RecursionError):
+        pool.derive(PAGES['tiny']().encode('utf-8'))
+
+    assert pool._executor is executor
+    assert pool.stats()['restarts'] == 0
+    assert pool.stats()['fallbacks'] == 0
+
+
+def test_crashed_worker_falls_back_and_restarts(pool):
+    content = PAGES['tiny']().encode('utf-8')
+    for pid in list(pool._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    assert pool.derive(content) is None
+    assert pool.stats()['restarts'] == 1
+    assert pool.derive(content) is not None
+    assert pool.stats()['fallbacks'] == 1
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+import parser_backends
+from html_fixtures import random_document, saved_pages
+from meta_extractor import decode_markup
+from seo_analyzer import SEOAnalyzer
+
+PAGES = saved_pages()
+
+FAST_BACKENDS = ('lxml', 'selectolax')
+
+# Malformed pages on which HTML5-style tree construction disagrees with html.parser
+# (unclosed title, template/textarea content, CDATA, nested headings, ...); the fast
+# backends hand these to the single-pass extractor
+HTML5_DIVERGENT = {
+    'comments-and-cdata.html', 'entities.html', 'nested-headings.html', 'scripts-and-styles.html',
+    'stray-end-tags.html', 'template-and-textarea.html', 'truncated.html', 'unclosed-title.html'
+}
+
+
+def installed(backend):
+    return pytest.mark.skipif(backend not in parser_backends.available_backends(), reason=f'{backend} is not installed')
+
+
+def conformance_cases():
+    for backend in ('single_pass',) + FAST_BACKENDS:
+        for name in PAGES:
+            yield pytest.param(backend, name, marks=installed(backend), id=f'{backend}-{name}')
+
+
+def derive(backend, content):
+    return SEOAnalyzer(parser_backend=backend)._derive(content)
+
+
+@pytest.mark.parametrize('backend, name', list(conformance_cases()))
+def test_backend_matches_html_parser(backend, name):
+    meta_data, validation = derive(backend, PAGES[name])
+    expected_meta_data, expected_validation = derive('html.parser', PAGES[name])
+
+    for field, value in expected_meta_data.items():
+        assert meta_data[field] == value, field
+    assert validation == expected_validation
+
+
+def test_only_divergent_pages_leave_the_fast_path():
+    divergent = {name for name, content in PAGES.items() if parser_backends.html5_divergent(decode_markup(content))}
+    assert divergent == HTML5_DIVERGENT
+
+
+@pytest.mark.parametrize('backend', [pytest.param(name, marks=installed(name)) for name in FAST_BACKENDS])
+def test_fast_backend_matches_html_parser_on_generated_malformed_markup(backend):
+    rng = random.Random(2024)
+    fast = 0
+    for _ in range(500):
+        document = random_document(rng, 12).encode('utf-8')
+        fast += not parser_backends.html5_divergent(document.decode('utf-8'))
+        assert derive(backend, document) == derive('html.parser', document), document
+    # Enough of the documents are parsed by the backend itself for this to test it
+    assert fast > 50
+
+
+@pytest.mark.parametrize('backend', [pytest.param(name, marks=installed(name)) for name in FAST_BACKENDS])
+def test_processing_instructions_in_headings(backend):
+    document = b'<?xml version="1.0"?><html><head><title>T</title></head><body><h1>a<?php x ?>b</h1></body></html>'
+    assert not parser_backends.html5_divergent(document.decode('utf-8'))
+    assert parser_backends.BACKENDS[backend](document)['h1_tags'] == ['ab']
+
+
+def test_auto_is_equivalent_to_html_parser():
+    assert parser_backends.resolve_backend('auto') == 'single_pass'
+    assert SEOAnalyzer().parser_backend == 'single_pass'
+
+
+def test_fastest_picks_an_installed_backend():
+    backend = parser_backends.resolve_backend('fastest')
+    assert backend in parser_backends.available_backends()
+    assert backend != parser_backends.SOUP_BACKEND
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        parser_backends.resolve_backend('html5lib-please')
+
+
+@pytest.mark.parametrize('depth', [300, 5000])
+@pytest.mark.parametrize('backend', [pytest.param(name, marks=installed(name)) for name in ('single_pass',) + FAST_BACKENDS])
+def test_deeply_nested_headings(backend, depth):
+    document = ('<html><head><title>Deep</title></head><body><h1>'
+                + '<span><pre> x </pre>' * depth + 'deep' + '</span>' * depth
+                + '</h1></body></html>').encode('utf-8')
+    soup = SEOAnalyzer(parser_backend='html.parser')._extract_meta_tags(BeautifulSoup(document, 'html.parser'))
+
+    meta_data = parser_backends.BACKENDS[backend](document)
+    assert meta_data['h1_tags'] == soup['h1_tags']
+    assert meta_data['h1_tags'][0].endswith('x deep')
@@ -0,0 +1,160 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+
+from persistence import WriteBehindWriter
+
+
+class Recorder:
+    """flush_batch that keeps every batch and the thread it was written on"""
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.threads = []
+        self.entered = threading.Event()
+        self.gate = gate
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        self.entered.set()
+        if self.gate is not None and threading.current_thread().name == 'seo-write-behind':
+            self.gate.wait(5)
+        with self.lock:
+            self.batches.append(list(batch))
+            self.threads.append(threading.current_thread().name)
+
+    @property
+    def rows(self):
+        with self.lock:
+            return [row for batch in self.batches for row in batch]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_full_batches_are_flushed_without_waiting_for_the_interval():
+    recorder = Recorder()
+    writer = WriteBehindWriter(recorder, batch_size=5, flush_interval=30)
+
+    for n in range(12):
+        writer.submit({'n': n})
+    wait_for(lambda: len(recorder.rows) == 10)
+
+    assert [len(batch) for batch in recorder.batches] == [5, 5]
+    assert writer.stats()['pending'] == 2
+    writer.shutdown()
+    assert [row['n'] for row in recorder.rows] == list(range(12))
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    recorder = Recorder()
+    writer = WriteBehindWriter(recorder, batch_size=100, flush_interval=0.2)
+
+    started = time.monotonic()
+    for n in range(3):
+        writer.submit({'n': n})
+    time.sleep(0.05)
+    assert recorder.rows == []
+    wait_for(lambda: len(recorder.rows) == 3)
+
+    assert time.monotonic() - started >= 0.2
+    assert len(recorder.batches) == 1
+    stats = writer.stats()
+    assert stats['written'] == 3 and stats['batches'] == 1 and stats['pending'] == 0
+    writer.shutdown()
+
+
+def test_full_queue_falls_back_to_a_synchronous_write():
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    writer = WriteBehindWriter(recorder, max_queue=2, batch_size=1, flush_interval=30)
+
+    # The writer thread takes the first row and blocks writing it; two more fill the queue
+    writer.submit({'n': 0})
+    assert recorder.entered.wait(5)
+    writer.submit({'n': 1})
+    writer.submit({'n': 2})
+    writer.submit({'n': 3})
+
+    assert recorder.rows == [{'n': 3}]
+    assert recorder.threads == [threading.current_thread().name]
+    assert writer.stats()['sync_fallbacks'] == 1
+    gate.set()
+    writer.shutdown()
+    assert sorted(row['n'] for row in recorder.rows) == [0, 1, 2, 3]
+    assert writer.stats()['pending'] == 0
+
+
+def test_pending_rows_are_written_at_exit(tmp_path):
+    output = tmp_path / 'rows.txt'
+    script = textwrap.dedent(f'''
+        import sys
+        sys.path.insert(0, {str(Path(__file__).resolve().parent.parent)!r})
+        from persistence import WriteBehindWriter
+
+        def flush(batch):
+            with open({str(output)!r}, 'a') as handle:
+                handle.writelines(f"{{row['n']}}\\n" for row in batch)
+
+        writer = WriteBehindWriter(flush, batch_size=1000, flush_interval=60)
+        for n in range(50):
+            writer.submit({{'n': n}})
+    ''')
+    subprocess.run([sys.executable, '-c', script], check=True, timeout=30)
+
+    assert output.read_text().split() == [str(n) for n in range(50)]
+
+
+def test_every_row_is_stored_once_past_capacity(app_db):
+    app = app_db
+    writer = WriteBehindWriter(app.flush_analyses, max_queue=8, batch_size=4, flush_interval=0.05)
+    threads, per_thread = 8, 25
+    scores = {}
+
+    def submit(thread_number):
+        for i in range(per_thread):
+            url = f'https://{"abc"[i % 3]}.example.com/{thread_number}/{i}'
+            failed = i % 10 == 0
+            score = (thread_number * 7 + i) % 101
+            scores[url] = None if failed else score
+            writer.submit(app.build_analysis_row(url, None if failed else {
+                'meta_data': {'title': url}, 'validation': {'overall_score': score, 'title_score': score}
+            }, 'HTTP error 500: Server Error' if failed else None, 0.01))
+
+    workers = [threading.Thread(target=submit, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    writer.shutdown()
+
+    stats = writer.stats()
+    assert stats['sync_fallbacks'] > 0
+    assert stats['failed'] == 0 and stats['pending'] == 0
+    assert stats['written'] == threads * per_thread
+
+    app.db.session.expire_all()
+    stored = app.SeoAnalysis.query.all()
+    assert sorted(analysis.url for analysis in stored) == sorted(scores)
+
+    ok = {url: score for url, score in scores.items() if score is not None}
+    totals = app.GlobalStats.current()
+    assert totals.total_analyses == len(scores)
+    assert totals.error_count == len(scores) - len(ok)
+    assert totals.score_sum == sum(ok.values())
+
+    for stats in app.DomainStats.query.all():
+        domain_scores = [score for url, score in ok.items() if url.startswith(f'https://{stats.domain}/')]
+        assert stats.total_analyses == len(domain_scores)
+        assert stats.sum_overall_score == stats.sum_title_score == sum(domain_scores)
+        assert (stats.best_score, stats.worst_score) == (max(domain_scores), min(domain_scores))
+    assert app.db.session.query(func.count(app.DomainStats.id)).scalar() == 3
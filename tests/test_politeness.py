@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import defaultdict
+
+from politeness import HostScheduler
+
+HOSTS = ('a.example.com', 'b.example.com', 'c.example.com')
+
+
+def run_requests(scheduler, plan, hold=0.005):
+    """Run plan, a list of hosts (one thread each), recording start times and peak concurrency per host"""
+    lock = threading.Lock()
+    starts = defaultdict(list)
+    in_flight = defaultdict(int)
+    peak = defaultdict(int)
+    errors = []
+
+    def request(host):
+        try:
+            scheduler.acquire(host)
+            with lock:
+                starts[host].append(time.monotonic())
+                in_flight[host] += 1
+                peak[host] = max(peak[host], in_flight[host])
+            time.sleep(hold)
+            with lock:
+                in_flight[host] -= 1
+            scheduler.release(host, 200)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request, args=(host,)) for host in plan]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return starts, peak, errors
+
+
+def test_many_threads_respect_per_host_rate_and_concurrency():
+    scheduler = HostScheduler(rate=40.0, burst=4, max_in_flight=2, max_wait=20)
+    per_host = 40
+    plan = [host for _ in range(per_host) for host in HOSTS]
+
+    started = time.monotonic()
+    starts, peak, errors = run_requests(scheduler, plan)
+    elapsed = time.monotonic() - started
+
+    assert errors == []
+    for host in HOSTS:
+        times = sorted(starts[host])
+        assert len(times) == per_host
+        assert peak[host] <= scheduler.max_in_flight
+        # Token bucket: at most burst + rate * t starts in any window of length t (one start of slack for timing)
+        for i in range(len(times)):
+            for j in range(i + 1, len(times)):
+                assert j - i + 1 <= scheduler.burst + scheduler.rate * (times[j] - times[i]) + 1, (host, i, j)
+        stats = scheduler.stats()['hosts'][host]
+        assert stats['requests'] == per_host
+        assert stats['in_flight'] == 0 and stats['waiting'] == 0
+
+    # Hosts are limited independently, so three hosts take about as long as one, not three times as long
+    one_host = (per_host - scheduler.burst) / scheduler.rate
+    assert elapsed < one_host * 2
+
+
+def test_a_saturated_host_does_not_delay_others():
+    scheduler = HostScheduler(rate=0, burst=1, max_in_flight=1, max_wait=20)
+    waits = []
+    lock = threading.Lock()
+
+    def slow():
+        scheduler.acquire('slow.example.com')
+        time.sleep(0.1)
+        scheduler.release('slow.example.com', 200)
+
+    def fast():
+        waited = scheduler.acquire('fast.example.com')
+        scheduler.release('fast.example.com', 200)
+        with lock:
+            waits.append(waited)
+
+    # Ten slow requests queue behind each other for about a second
+    slow_threads = [threading.Thread(target=slow) for _ in range(10)]
+    for thread in slow_threads:
+        thread.start()
+    time.sleep(0.05)
+    fast_threads = [threading.Thread(target=fast) for _ in range(20)]
+    for thread in fast_threads:
+        thread.start()
+    for thread in fast_threads:
+        thread.join()
+
+    assert len(waits) == 20
+    assert max(waits) < 0.5
+    assert scheduler.stats()['hosts']['slow.example.com']['waiting'] > 0
+    for thread in slow_threads:
+        thread.join()
+    assert scheduler.stats()['hosts']['slow.example.com']['requests'] == 10
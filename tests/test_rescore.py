@@ -0,0 +1,82 @@
+import copy
+from datetime import datetime
+
+import pytest
+
+import legacy_schema
+import seo_rules
+from fixture_server import PAGES
+from seo_analyzer import SEOAnalyzer
+
+
+def baseline_row(name, meta_data, overall_score):
+    """An analysis as the first release stored it: og/twitter fields never saved, no content counts"""
+    return {
+        'url': f'https://legacy.example.com/{name}', 'domain': 'legacy.example.com',
+        'title': meta_data['title'], 'title_length': len(meta_data['title']),
+        'description': meta_data['description'], 'description_length': len(meta_data['description']),
+        'og_image': None, 'og_site_name': None, 'twitter_site': None,
+        'canonical_url': meta_data['canonical'], 'viewport': meta_data['viewport'],
+        'overall_score': overall_score, 'analysis_date': datetime(2024, 1, 1)
+    }
+
+
+@pytest.fixture
+def legacy_rows(app_db):
+    """Fixture pages scored with DEFAULT_RULES and stored in the first release's schema, then migrated"""
+    analyzer = SEOAnalyzer()
+    rules = seo_rules.RuleSet(seo_rules.DEFAULT_RULES)
+    rows, pages = [], {}
+    for name, build in PAGES.items():
+        meta_data = analyzer._analyze_content(build().encode('utf-8'), f'https://legacy.example.com/{name}', {})[
+            'meta_data']
+        for variant, changes in (('', {}), ('-bare', {'canonical': '', 'viewport': '', 'og_title': ''})):
+            page = dict(meta_data, **changes)
+            pages[name + variant] = page
+            rows.append(baseline_row(name + variant, page, rules.validate(page)['overall_score']))
+
+    legacy_schema.create(app_db.db, rows)
+    app_db.dimension_resolver._known.clear()
+    result = app_db.app.test_cli_runner().invoke(args=['migrate-dimensions', '--yes'])
+    assert result.exit_code == 0, result.output
+    return app_db, pages
+
+
+def stored_scores(app):
+    app.db.session.expire_all()
+    return {analysis.url.rsplit('/', 1)[1]: analysis.overall_score for analysis in app.SeoAnalysis.query.all()}
+
+
+def test_rescore_with_unchanged_rules_is_a_no_op(legacy_rows):
+    app, pages = legacy_rows
+    before = stored_scores(app)
+    # The og and twitter deductions are what the inference has to get right
+    assert any(page['og_title'] for page in pages.values())
+
+    rules = seo_rules.RuleSet(seo_rules.DEFAULT_RULES)
+    # The first rescore only records each row's legacy_deduction
+    seo_rules.rescore_analyses(app.db, app.SeoAnalysis, rules)
+    assert stored_scores(app) == before
+    assert seo_rules.rescore_analyses(app.db, app.SeoAnalysis, rules) == {'scanned': len(pages), 'changed': 0}
+    assert stored_scores(app) == before
+
+
+def test_rescore_applies_changed_rules_to_stored_sections(legacy_rows):
+    app, pages = legacy_rows
+    before = stored_scores(app)
+    # Initialize legacy_deduction under the rules the rows were scored with
+    seo_rules.rescore_analyses(app.db, app.SeoAnalysis, seo_rules.RuleSet(seo_rules.DEFAULT_RULES))
+
+    rules = copy.deepcopy(list(seo_rules.DEFAULT_RULES))
+    for rule in rules:
+        if rule.get('field') == 'viewport':
+            rule['deduct'] = 8
+        if rule['section'] == 'og_tags':
+            rule['deduct_each'] = 10
+    seo_rules.rescore_analyses(app.db, app.SeoAnalysis, seo_rules.RuleSet(rules))
+
+    after = stored_scores(app)
+    for name, page in pages.items():
+        # Only the viewport change can be applied; og inputs were never stored for these rows
+        expected = before[name] - (3 if not page['viewport'] else 0)
+        assert after[name] == expected, name
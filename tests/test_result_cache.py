@@ -0,0 +1,143 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fixture_server import PAGES
+from result_cache import ContentHashMemo, create_cache
+from seo_analyzer import SEOAnalyzer
+
+
+def test_content_memo_is_kept_apart_per_heading_cap():
+    memo = ContentHashMemo()
+    content = PAGES['typical']().encode('utf-8').replace(b'<h2>Section</h2>', b'<h2>One</h2><h2>Two</h2><h2>Three</h2>')
+
+    capped = SEOAnalyzer(content_memo=memo, max_headings=1)._analyze_content(content, 'https://example.com/', {})
+    uncapped = SEOAnalyzer(content_memo=memo)._analyze_content(content, 'https://example.com/', {})
+
+    assert capped['meta_data']['h2_tags'] == ['One']
+    assert uncapped['meta_data']['h2_tags'] == ['One', 'Two', 'Three']
+    assert uncapped['meta_data']['h2_count'] == 3
+    # A second analyzer with the same cap does share the memo
+    SEOAnalyzer(content_memo=memo, max_headings=1)._analyze_content(content, 'https://example.com/', {})
+    assert memo.stats()['hits'] == 1
+
+
+class Origin:
+    """A one-page site that sends an ETag and answers matching conditional requests with 304"""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.title = 'First version of the page title'
+        self.statuses = []
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.headers.get('If-None-Match') == origin.etag:
+                    origin.statuses.append(304)
+                    self.send_response(304)
+                    self.send_header('ETag', origin.etag)
+                    self.end_headers()
+                    return
+                body = f'<html><head><title>{origin.title}</title></head><body><h1>Hi</h1></body></html>'.encode()
+                origin.statuses.append(200)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', origin.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/page'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def origin():
+    origin = Origin()
+    yield origin
+    origin.close()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    return create_cache(request.param, ttl=60, max_entries=100, path=str(tmp_path / 'cache.db'))
+
+
+def expire(cache, url):
+    entry = cache.get(url)
+    entry.stored_at -= cache.ttl + 1
+    cache.set(url, entry)
+
+
+def test_fresh_entries_are_served_without_fetching(cache, origin):
+    analyzer = SEOAnalyzer(cache=cache)
+    first = analyzer.analyze_url(origin.url)
+    second = analyzer.analyze_url(origin.url)
+
+    assert first['cache'] == 'miss'
+    assert second['cache'] == 'hit'
+    assert second['meta_data']['title'] == first['meta_data']['title']
+    assert dict(second['previews']) == dict(first['previews'])
+    assert origin.statuses == [200]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_hits_do_not_change_the_cached_entry(cache, origin):
+    analyzer = SEOAnalyzer(cache=cache)
+    analyzer.analyze_url(origin.url)
+
+    hit = analyzer.analyze_url(origin.url)
+    hit['validation']['overall_score'] = -1
+    hit['extra'] = True
+
+    entry = cache.get(origin.url)
+    assert 'cache' not in entry.results and 'previews' not in entry.results and 'extra' not in entry.results
+    assert analyzer.analyze_url(origin.url)['validation']['overall_score'] != -1
+
+
+def test_expired_entry_is_revalidated_with_its_etag(cache, origin):
+    analyzer = SEOAnalyzer(cache=cache)
+    analyzer.analyze_url(origin.url)
+    expire(cache, origin.url)
+
+    results = analyzer.analyze_url(origin.url)
+    assert results['cache'] == 'revalidated'
+    assert results['meta_data']['title'] == origin.title
+    assert origin.statuses == [200, 304]
+    # Fresh again after the 304
+    assert analyzer.analyze_url(origin.url)['cache'] == 'hit'
+    assert origin.statuses == [200, 304]
+
+
+def test_changed_page_replaces_the_entry(cache, origin):
+    analyzer = SEOAnalyzer(cache=cache)
+    analyzer.analyze_url(origin.url)
+    expire(cache, origin.url)
+    origin.etag, origin.title = '"v2"', 'Second version of the page title'
+
+    results = analyzer.analyze_url(origin.url)
+    assert results['cache'] == 'refreshed'
+    assert results['meta_data']['title'] == 'Second version of the page title'
+    assert cache.get(origin.url).etag == '"v2"'
+    assert cache.stats()['refreshed'] == 1
+
+
+def test_entries_expire_after_the_ttl(cache, origin):
+    analyzer = SEOAnalyzer(cache=cache)
+    analyzer.analyze_url(origin.url)
+    assert cache.get(origin.url).is_fresh(cache.ttl)
+
+    expire(cache, origin.url)
+    assert not cache.get(origin.url).is_fresh(cache.ttl)
+    assert analyzer.analyze_url(origin.url)['cache'] != 'hit'
+    assert len(origin.statuses) == 2
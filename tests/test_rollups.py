@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+import rollups
+
+DAY = datetime(2025, 2, 10)
+SCORE_FIELDS = ['sum_' + column for column in models.DomainStatsBatch.SCORE_COLUMNS]
+
+
+def write(app, analyses):
+    """Store (domain, analysis_date, score or None for an error) analyses in one batch"""
+    rows = []
+    for n, (domain, date, score) in enumerate(analyses):
+        url = f'https://{domain}/{date:%Y%m%d%H%M}/{n}'
+        if score is None:
+            row = app.build_analysis_row(url, None, 'HTTP error 500: Server Error', 0.1)
+        else:
+            row = app.build_analysis_row(url, {'meta_data': {}, 'validation': {
+                'overall_score': score, 'title_score': score // 2, 'description_score': 100 - score,
+                'og_score': score % 7, 'twitter_score': 3
+            }}, None, 0.1)
+        row['analysis_date'] = date
+        rows.append(row)
+    app.write_analyses(rows)
+
+
+def analyses_over(days, first_day=DAY):
+    """A spread of analyses for two domains over several hours of each day, with some errors"""
+    analyses = []
+    for day in range(days):
+        for hour in (0, 5, 13, 23):
+            for n, domain in enumerate(('a.example.com', 'b.example.com', 'a.example.com')):
+                score = None if (day + hour + n) % 5 == 0 else (day * 31 + hour * 7 + n * 13) % 101
+                analyses.append((domain, first_day + timedelta(days=day, hours=hour, minutes=n), score))
+    return analyses
+
+
+def totals(app):
+    """Per domain: analyses, errors, score sums and score range over every stored bucket"""
+    summary = {}
+    for rollup in app.ScoreRollup.query.all():
+        entry = summary.setdefault(rollup.domain, {'analyses': 0, 'errors': 0, 'min': None, 'max': None})
+        entry['analyses'] += rollup.analysis_count
+        entry['errors'] += rollup.error_count
+        for field in SCORE_FIELDS:
+            entry[field] = entry.get(field, 0) + getattr(rollup, field)
+        if rollup.min_score is not None:
+            entry['min'] = rollup.min_score if entry['min'] is None else min(entry['min'], rollup.min_score)
+            entry['max'] = rollup.max_score if entry['max'] is None else max(entry['max'], rollup.max_score)
+    return summary
+
+
+def daily_trends(app):
+    return {domain: rollups.query_trend(app.db.session, app.ScoreRollup, domain, 'day')
+            for domain in ('a.example.com', 'b.example.com')}
+
+
+def buckets(app, granularity):
+    return app.ScoreRollup.query.filter_by(granularity=granularity).count()
+
+
+@pytest.mark.parametrize('upsert', [True, False], ids=['upsert', 'update-then-insert'])
+def test_compaction_keeps_counts_and_sums(app_db, monkeypatch, upsert):
+    if not upsert:
+        monkeypatch.setattr(models, 'UPSERT_DIALECTS', ())
+    app = app_db
+    write(app, analyses_over(4))
+    before, trends = totals(app), daily_trends(app)
+    assert buckets(app, 'hour') == 4 * 4 * 2
+
+    # The first three days are folded into days; the fourth keeps its hours
+    removed = rollups.compact_hourly(app.db, app.ScoreRollup, DAY + timedelta(days=3, hours=12))
+    app.db.session.expire_all()
+
+    assert removed == 3 * 4 * 2
+    assert buckets(app, 'day') == 3 * 2 and buckets(app, 'hour') == 4 * 2
+    assert totals(app) == before
+    assert daily_trends(app) == trends
+
+    # Late analyses for a compacted day land in hourly buckets again, then fold into the existing day
+    late = [('a.example.com', DAY + timedelta(days=1, hours=9), 100),
+            ('a.example.com', DAY + timedelta(days=1, hours=9), None),
+            ('b.example.com', DAY + timedelta(days=2, hours=1), 1)]
+    write(app, late)
+    before, trends = totals(app), daily_trends(app)
+
+    removed = rollups.compact_hourly(app.db, app.ScoreRollup, DAY + timedelta(days=3, hours=12))
+    app.db.session.expire_all()
+
+    assert removed == 2
+    assert buckets(app, 'day') == 3 * 2 and buckets(app, 'hour') == 4 * 2
+    assert totals(app) == before
+    assert daily_trends(app) == trends
+    assert before['a.example.com']['max'] == 100 and before['b.example.com']['min'] == 1
+    # Compacting again with nothing old left changes nothing
+    assert rollups.compact_hourly(app.db, app.ScoreRollup, DAY + timedelta(days=3, hours=12)) == 0
+    assert totals(app) == before
+
+
+def test_compaction_matches_the_stored_analyses(app_db):
+    app = app_db
+    analyses = analyses_over(3)
+    write(app, analyses)
+    rollups.compact_hourly(app.db, app.ScoreRollup, DAY + timedelta(days=2))
+    app.db.session.expire_all()
+
+    summary = totals(app)
+    for domain in ('a.example.com', 'b.example.com'):
+        mine = [score for name, _, score in analyses if name == domain]
+        scored = [score for score in mine if score is not None]
+        assert summary[domain]['analyses'] == len(mine)
+        assert summary[domain]['errors'] == len(mine) - len(scored)
+        assert summary[domain]['sum_overall_score'] == sum(scored)
+        assert (summary[domain]['min'], summary[domain]['max']) == (min(scored), max(scored))